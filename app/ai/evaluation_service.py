@@ -1,7 +1,9 @@
 from google import genai
 from google.genai import types
 from app.config import settings
+from app.utils.evaluation_retry import TransientEvaluationError, is_transient
 from typing import Dict, List, Any
+import asyncio
 import json
 import logging
 
@@ -18,6 +20,11 @@ class EvaluationService:
         self.client = client
         self.model = settings.GEMINI_MODEL
     
+    async def _generate(self, prompt: str):
+        # The sync client in a thread: evaluations may run on the web event loop (TASK_BACKEND=local),
+        # and the async client's connections would be tied to the first loop of a Celery worker
+        return await asyncio.to_thread(self.client.models.generate_content, model=self.model, contents=prompt)
+    
     async def evaluate_code(self, question: dict, answer: dict) -> dict:
         """Evaluate coding question with AI"""
         
@@ -56,15 +63,14 @@ Return ONLY valid JSON:
 """
         
         try:
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=prompt
-            )
+            response = await self._generate(prompt)
             response_text = self._clean_json_response(response.text)
             result = json.loads(response_text)
             return result
             
         except Exception as e:
+            if is_transient(e):
+                raise TransientEvaluationError(f"Gemini unavailable: {e}") from e
             logger.error(f"Error evaluating code: {e}")
             return self._get_fallback_code_evaluation()
     
@@ -99,15 +105,14 @@ Return ONLY valid JSON:
 """
         
         try:
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=prompt
-            )
+            response = await self._generate(prompt)
             response_text = self._clean_json_response(response.text)
             result = json.loads(response_text)
             return result
             
         except Exception as e:
+            if is_transient(e):
+                raise TransientEvaluationError(f"Gemini unavailable: {e}") from e
             logger.error(f"Error evaluating descriptive answer: {e}")
             return self._get_fallback_descriptive_evaluation()
     
@@ -150,15 +155,14 @@ Return ONLY valid JSON:
 """
         
         try:
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=prompt
-            )
+            response = await self._generate(prompt)
             response_text = self._clean_json_response(response.text)
             result = json.loads(response_text)
             return result
             
         except Exception as e:
+            if is_transient(e):
+                raise TransientEvaluationError(f"Gemini unavailable: {e}") from e
             logger.error(f"Error generating feedback: {e}")
             return self._get_fallback_feedback()
     
@@ -193,15 +197,14 @@ Return ONLY valid JSON:
 """
         
         try:
-            response = self.client.models.generate_content(
-                model=self.model,
-                contents=prompt
-            )
+            response = await self._generate(prompt)
             response_text = self._clean_json_response(response.text)
             result = json.loads(response_text)
             return result
             
         except Exception as e:
+            if is_transient(e):
+                raise TransientEvaluationError(f"Gemini unavailable: {e}") from e
             logger.error(f"Error generating AI reasoning: {e}")
             return self._get_fallback_reasoning()
     
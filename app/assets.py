@@ -0,0 +1,162 @@
+"""
+Static asset pipeline
+
+The build step minifies static/css/*.css and static/js/*.js, writes
+content-hashed copies to static/dist/ together with .gz/.br variants
+compressed at maximum level, and records the mapping in
+static/dist/manifest.json. Templates link assets through asset_url(),
+which falls back to the unbuilt source files when no manifest exists
+(local development).
+
+Usage:
+    python -m app.assets build
+"""
+
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.datastructures import Headers
+from starlette.types import Scope
+from app.utils.compression import negotiate_encoding, supported_encodings
+from app.config import settings
+from functools import lru_cache
+from typing import Dict
+import glob
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import stat
+import sys
+
+STATIC_DIR = "static"
+BUILD_DIR = os.path.join(STATIC_DIR, "dist")
+MANIFEST_PATH = os.path.join(BUILD_DIR, "manifest.json")
+SOURCE_PATTERNS = ("css/*.css", "js/*.js")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def _minify(path: str, source: str) -> str:
+    import rcssmin
+    import rjsmin
+
+    if path.endswith(".css"):
+        return rcssmin.cssmin(source)
+    return rjsmin.jsmin(source)
+
+
+def build_assets() -> Dict[str, str]:
+    """Minify, fingerprint and precompress every source asset; returns the manifest"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("brotli is not installed; writing gzip variants only")
+
+    shutil.rmtree(BUILD_DIR, ignore_errors=True)
+    manifest = {}
+
+    for pattern in SOURCE_PATTERNS:
+        for source_path in sorted(glob.glob(os.path.join(STATIC_DIR, pattern))):
+            rel_path = os.path.relpath(source_path, STATIC_DIR).replace(os.sep, "/")
+            with open(source_path, encoding="utf-8") as f:
+                body = _minify(rel_path, f.read()).encode("utf-8")
+
+            digest = hashlib.sha256(body).hexdigest()[:12]
+            stem, ext = os.path.splitext(rel_path)
+            hashed_path = f"{stem}.{digest}{ext}"
+            out_path = os.path.join(BUILD_DIR, hashed_path)
+            os.makedirs(os.path.dirname(out_path), exist_ok=True)
+
+            variants = {"": body, ".gz": gzip.compress(body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants[".br"] = brotli.compress(body, quality=11)
+            for suffix, data in variants.items():
+                with open(out_path + suffix, "wb") as f:
+                    f.write(data)
+
+            manifest[rel_path] = f"dist/{hashed_path}"
+            sizes = ", ".join(f"{suffix or 'min'} {len(data)}" for suffix, data in variants.items())
+            print(f"{rel_path} -> dist/{hashed_path} ({os.path.getsize(source_path)} bytes; {sizes})")
+
+    with open(MANIFEST_PATH, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    load_manifest.cache_clear()
+    return manifest
+
+
+@lru_cache()
+def load_manifest() -> Dict[str, str]:
+    try:
+        with open(MANIFEST_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def asset_url(path: str) -> str:
+    """URL of a static asset, fingerprinted when the build manifest has it"""
+    return f"{settings.STATIC_URL}/{load_manifest().get(path, path)}"
+
+
+class AssetStaticFiles(StaticFiles):
+    """StaticFiles that serves precompressed variants of fingerprinted assets.
+
+    Files under dist/ never change at a given URL, so they are cached as
+    immutable; anything else must be revalidated.
+    """
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        build_dir = os.path.realpath(BUILD_DIR)
+        fingerprinted = os.path.commonpath([os.path.realpath(full_path), build_dir]) == build_dir
+
+        if not fingerprinted:
+            response = super().file_response(full_path, stat_result, scope, status_code)
+            response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+            return response
+
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        media_type = mimetypes.guess_type(str(full_path))[0] or "text/plain"
+        encoding = negotiate_encoding(request_headers.get("accept-encoding"), supported_encodings())
+
+        if encoding is not None:
+            variant_path = f"{full_path}{ENCODING_SUFFIXES[encoding]}"
+            try:
+                variant_stat = os.stat(variant_path)
+            except OSError:
+                variant_stat = None
+            if variant_stat is not None and stat.S_ISREG(variant_stat.st_mode):
+                full_path, stat_result = variant_path, variant_stat
+                headers["Content-Encoding"] = encoding
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=media_type,
+            headers=headers
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "build"
+    if command != "build":
+        print("Usage: python -m app.assets build")
+        sys.exit(1)
+    built = build_assets()
+    print(f"Built {len(built)} assets into {BUILD_DIR}")
@@ -1,15 +1,41 @@
 from celery import Celery
+from kombu.serialization import register
 from app.config import settings
 from app.ai.evaluation_service import evaluation_service
 from motor.motor_asyncio import AsyncIOMotorClient
+from app.database import get_database
 from app.models.assessment import QuestionType
 from app.utils.helpers import calculate_percentage
+from app.utils.cache import invalidate_application_views, invalidate_rankings
+from app.utils.evaluation_progress import publish_progress
+from app.utils.recruiter_events import notify_company, ranking_row, status_delta
+from app.utils.campaigns import fail_campaign, queue_campaign
+from app.utils.digests import send_digests
+from app.utils.task_queue import drain_outbox, enqueue, local_backend, queue_evaluation
+from app.utils import local_tasks
+from app.utils import fair_queue
+from redis.exceptions import RedisError
+from app.utils.evaluation_retry import (
+    PermanentEvaluationError, TransientEvaluationError, as_evaluation_error, dead_letter, find_stuck_submissions,
+    heartbeat
+)
 import asyncio
 import logging
+import ormsgpack
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Task messages are msgpack (about half the size of JSON), encoded by ormsgpack.
+# Registered under kombu's own name, so it interoperates with the msgpack package.
+register(
+    "msgpack",
+    ormsgpack.packb,
+    ormsgpack.unpackb,
+    content_type="application/x-msgpack",
+    content_encoding="binary"
+)
+
 # Initialize Celery
 celery_app = Celery(
     "hirewave",
@@ -18,68 +44,233 @@ celery_app = Celery(
 )
 
 celery_app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
+    task_serializer=settings.CELERY_TASK_SERIALIZER,
+    # JSON is still accepted, for messages queued before a serializer change
+    accept_content=['msgpack', 'json'],
+    result_serializer=settings.CELERY_TASK_SERIALIZER,
+    # Nothing reads task return values; tasks that opt back in expire quickly
+    task_ignore_result=True,
+    result_expires=settings.CELERY_RESULT_EXPIRES_SECONDS,
+    # Evaluations are long and idempotent: ack once done, so a lost worker's task is
+    # redelivered, and reserve one task per process so idle workers can take the rest
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
     timezone='UTC',
     enable_utc=True,
+    # Fail fast on a stalled broker; unpublished tasks wait in the task outbox
+    broker_transport_options={
+        "socket_timeout": settings.TASK_PUBLISH_TIMEOUT_SECONDS,
+        "socket_connect_timeout": settings.TASK_PUBLISH_TIMEOUT_SECONDS,
+        "visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT_SECONDS,
+    },
+    beat_schedule={
+        "send-recruiter-digests": {
+            "task": "send_recruiter_digests",
+            "schedule": settings.DIGEST_CHECK_MINUTES * 60,
+        },
+        "sweep-stuck-evaluations": {
+            "task": "sweep_stuck_evaluations",
+            "schedule": settings.EVALUATION_SWEEP_MINUTES * 60,
+        },
+        "drain-task-outbox": {
+            "task": "drain_task_outbox",
+            "schedule": settings.TASK_OUTBOX_GRACE_SECONDS,
+        },
+    },
 )
 
 
 def get_db():
-    """Get database connection for Celery tasks"""
+    """Get database connection for a task: the web app's own client when tasks run in-process"""
+    if local_backend():
+        return get_database()
     client = AsyncIOMotorClient(settings.MONGODB_URL)
     return client[settings.MONGODB_DB_NAME]
 
 
-@celery_app.task(name="evaluate_submission")
+def close_db(db):
+    if not local_backend():
+        db.client.close()
+
+
+async def dispatch(db, name: str, *args, countdown: float = 0):
+    """Queue a task from inside another one.
+
+    A Celery worker publishes directly: enqueue's background publish would be
+    cut short when asyncio.run returns.
+    """
+    if local_backend():
+        await enqueue(db, name, *args, countdown=countdown)
+    else:
+        celery_app.send_task(name, args=list(args), countdown=countdown or None)
+
+
+class EvaluationTask(celery_app.Task):
+    """Dead-letters submissions whose evaluation failed for good (see app/utils/evaluation_retry.py)"""
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        asyncio.run(record_failed_evaluation(args[0], exc, self.request.retries))
+
+
+@celery_app.task(
+    name="evaluate_submission",
+    base=EvaluationTask,
+    autoretry_for=(TransientEvaluationError,),
+    max_retries=settings.EVALUATION_MAX_RETRIES,
+    retry_backoff=settings.EVALUATION_RETRY_BACKOFF_SECONDS,
+    retry_backoff_max=settings.EVALUATION_RETRY_BACKOFF_MAX_SECONDS,
+    retry_jitter=True,
+)
 def evaluate_submission_task(submission_id: str):
     """Async task to evaluate a submission"""
     return asyncio.run(evaluate_submission(submission_id))
 
 
+@celery_app.task(
+    name="evaluate_next",
+    autoretry_for=(RedisError,),
+    max_retries=settings.EVALUATION_MAX_RETRIES,
+    retry_backoff=settings.EVALUATION_RETRY_BACKOFF_SECONDS,
+    retry_jitter=True,
+)
+def evaluate_next_task():
+    """Evaluate the submission the fair-share scheduler picks (see app/utils/fair_queue.py)"""
+    return asyncio.run(evaluate_next())
+
+
+async def evaluate_next():
+    popped = await fair_queue.pop()
+    if popped is None:
+        return {"idle": True}
+    lane, submission_id = popped
+    try:
+        return await evaluate_submission(submission_id)
+    except TransientEvaluationError:
+        # Retry as a task of its own, with evaluate_submission's backoff and dead-lettering
+        db = get_db()
+        try:
+            await dispatch(db, "evaluate_submission", submission_id, countdown=settings.EVALUATION_RETRY_BACKOFF_SECONDS)
+        finally:
+            close_db(db)
+        return {"retrying": submission_id, "lane": lane}
+    except Exception as e:
+        await record_failed_evaluation(submission_id, e, 0)
+        raise
+
+
+async def record_failed_evaluation(submission_id: str, error: Exception, retries: int):
+    db = get_db()
+    try:
+        submission = await db.submissions.find_one({"_id": submission_id}, {"application_id": 1})
+        application_id = submission["application_id"] if submission else None
+        await dead_letter(db, submission_id, application_id, error, retries)
+        if application_id:
+            await publish_progress(application_id, "failed")
+    finally:
+        close_db(db)
+
+
+@celery_app.task(name="sweep_stuck_evaluations")
+def sweep_stuck_evaluations_task():
+    """Periodic: re-enqueue evaluations stuck in assessment_completed"""
+    return asyncio.run(sweep_stuck_evaluations())
+
+
+async def sweep_stuck_evaluations():
+    db = get_db()
+    try:
+        stuck = await find_stuck_submissions(db, settings.EVALUATION_SWEEP_BATCH)
+        jobs = {
+            job["_id"]: job
+            async for job in db.jobs.find(
+                {"_id": {"$in": list({s["job_id"] for s in stuck})}},
+                {"company_id": 1, "shortlist_deadline": 1}
+            )
+        } if stuck else {}
+        for submission in stuck:
+            await queue_evaluation(db, jobs.get(submission["job_id"]), submission["_id"], send=dispatch)
+            await publish_progress(submission["application_id"], "queued")
+        if stuck:
+            logger.warning(f"Re-enqueued {len(stuck)} stuck evaluations")
+        return {"success": True, "requeued": len(stuck)}
+    finally:
+        close_db(db)
+
+
 async def evaluate_submission(submission_id: str):
     """Evaluate submission with AI"""
     db = get_db()
+    submission = None
     
     try:
         # Get submission
         submission = await db.submissions.find_one({"_id": submission_id})
         if not submission:
-            logger.error(f"Submission {submission_id} not found")
-            return {"error": "Submission not found"}
+            raise PermanentEvaluationError(f"Submission {submission_id} not found")
+        
+        # Running, no longer queued (see find_stuck_submissions)
+        await heartbeat(db, submission["application_id"])
+        await fair_queue.clear_pending(submission_id)
+        
+        # Redelivered or re-enqueued after the result was saved
+        existing = await db.results.find_one({"submission_id": submission_id}, {"_id": 1})
+        if existing:
+            logger.info(f"Submission {submission_id} already evaluated")
+            await db.applications.update_one(
+                {"_id": submission["application_id"], "status": "assessment_completed"},
+                {"$set": {"status": "under_review", "updated_at": datetime.utcnow()}}
+            )
+            return {"success": True, "result_id": existing["_id"]}
         
         # Get assessment
         assessment = await db.assessments.find_one({"_id": submission["assessment_id"]})
         if not assessment:
-            logger.error(f"Assessment {submission['assessment_id']} not found")
-            return {"error": "Assessment not found"}
+            raise PermanentEvaluationError(f"Assessment {submission['assessment_id']} not found")
         
         # Get application
         application = await db.applications.find_one({"_id": submission["application_id"]})
         if not application:
-            logger.error(f"Application {submission['application_id']} not found")
-            return {"error": "Application not found"}
+            raise PermanentEvaluationError(f"Application {submission['application_id']} not found")
         
         # Get job
         job = await db.jobs.find_one({"_id": application["job_id"]})
         
-        # Evaluate each answer
+        application_id = submission["application_id"]
+        await publish_progress(application_id, "started")
+        
+        # Pair each answer with its question
+        questions_by_id = {q["question_id"]: q for q in assessment["questions"]}
+        graded = [
+            (questions_by_id[answer["question_id"]], answer)
+            for answer in submission["answers"]
+            if answer["question_id"] in questions_by_id
+        ]
+        evaluations = [None] * len(graded)
+        
+        # MCQs are scored instantly; report them before the slower AI grading
+        mcq_indexes = [i for i, (q, _) in enumerate(graded) if q["type"] == QuestionType.MCQ.value]
+        for i in mcq_indexes:
+            evaluations[i] = await evaluate_answer(*graded[i])
+        await publish_progress(
+            application_id,
+            "mcq_scored",
+            correct=sum(1 for i in mcq_indexes if evaluations[i]["is_correct"]),
+            total=len(mcq_indexes)
+        )
+        
+        ai_indexes = [i for i in range(len(graded)) if evaluations[i] is None]
+        for done, i in enumerate(ai_indexes, start=1):
+            evaluations[i] = await evaluate_answer(*graded[i])
+            await heartbeat(db, application_id)
+            await publish_progress(application_id, "grading", question=done, of=len(ai_indexes))
+        
+        # Aggregate scores in answer order
         question_evaluations = []
         total_score = 0
         skill_scores_dict = {}
         
-        for answer in submission["answers"]:
-            # Find corresponding question
-            question = next(
-                (q for q in assessment["questions"] if q["question_id"] == answer["question_id"]),
-                None
-            )
-            
-            if not question:
-                continue
-            
-            evaluation = await evaluate_answer(question, answer)
+        for (question, answer), evaluation in zip(graded, evaluations):
             question_evaluations.append(evaluation)
             
             total_score += evaluation["points_earned"]
@@ -126,6 +317,9 @@ async def evaluate_submission(submission_id: str):
             ]
         }
         
+        await heartbeat(db, application_id)
+        await publish_progress(application_id, "generating_feedback")
+        
         # Get all candidates for ranking context
         all_applications = await db.applications.find({"job_id": application["job_id"]}).to_list(None)
         
@@ -164,8 +358,8 @@ async def evaluate_submission(submission_id: str):
             "created_at": datetime.utcnow()
         }
         
-        # Save result
-        await db.results.insert_one(result)
+        # Save result (replaces the result of an earlier attempt that failed after saving)
+        await db.results.replace_one({"_id": result["_id"]}, result, upsert=True)
         
         # Update application status
         await db.applications.update_one(
@@ -177,13 +371,81 @@ async def evaluate_submission(submission_id: str):
                 }
             }
         )
+        await invalidate_application_views(submission["candidate_id"], job["company_id"] if job else None)
+        await invalidate_rankings(application["job_id"])
+        await publish_progress(application_id, "final", result_id=result["_id"], percentage=percentage)
+        await notify_company(
+            job["company_id"] if job else None,
+            "result.created",
+            application["job_id"],
+            application_id,
+            funnel={"pending_evaluations": -1, **status_delta(application["status"], "under_review")},
+            status="under_review",
+            previous_status=application["status"],
+            result=ranking_row(result, application)
+        )
         
         logger.info(f"Successfully evaluated submission {submission_id}")
         return {"success": True, "result_id": result["_id"]}
         
     except Exception as e:
-        logger.error(f"Error evaluating submission {submission_id}: {e}")
+        # Transient errors are retried by Celery; the rest fail the task (and are dead-lettered)
+        error = as_evaluation_error(e)
+        logger.error(f"Error evaluating submission {submission_id}: {error}")
+        if submission and isinstance(error, TransientEvaluationError):
+            await publish_progress(submission["application_id"], "retrying")
+        if error is e:
+            raise
+        raise error from e
+    finally:
+        close_db(db)
+
+
+@celery_app.task(name="run_campaign")
+def run_campaign_task(campaign_id: str):
+    """Queue a bulk email campaign's recipients in the outbox"""
+    return asyncio.run(run_campaign(campaign_id))
+
+
+async def run_campaign(campaign_id: str):
+    db = get_db()
+    try:
+        queued = await queue_campaign(db, campaign_id)
+        return {"success": True, "queued": queued}
+    except Exception as e:
+        logger.error(f"Error queuing campaign {campaign_id}: {e}")
+        await fail_campaign(db, campaign_id, str(e))
         return {"error": str(e)}
+    finally:
+        close_db(db)
+
+
+@celery_app.task(name="send_recruiter_digests")
+def send_recruiter_digests_task():
+    """Periodic: queue digest emails for recruiters whose interval has passed"""
+    return asyncio.run(send_recruiter_digests())
+
+
+async def send_recruiter_digests():
+    db = get_db()
+    try:
+        return {"success": True, "sent": await send_digests(db)}
+    finally:
+        close_db(db)
+
+
+@celery_app.task(name="drain_task_outbox")
+def drain_task_outbox_task():
+    """Periodic: publish tasks the web app couldn't hand to the broker"""
+    return asyncio.run(drain_task_outbox())
+
+
+async def drain_task_outbox():
+    db = get_db()
+    try:
+        return {"success": True, "published": await drain_outbox(db, celery_app.send_task)}
+    finally:
+        close_db(db)
 
 
 async def evaluate_answer(question: dict, answer: dict) -> dict:
@@ -262,3 +524,30 @@ async def evaluate_answer(question: dict, answer: dict) -> dict:
             "strengths": eval_result["strengths"],
             "improvements": eval_result["improvements"]
         }
+
+
+# The same tasks for TASK_BACKEND=local (see app/utils/local_tasks.py)
+local_tasks.register(
+    "evaluate_submission",
+    evaluate_submission,
+    retry_for=(TransientEvaluationError,),
+    max_retries=settings.EVALUATION_MAX_RETRIES,
+    backoff=settings.EVALUATION_RETRY_BACKOFF_SECONDS,
+    backoff_max=settings.EVALUATION_RETRY_BACKOFF_MAX_SECONDS,
+    on_failure=record_failed_evaluation
+)
+local_tasks.register(
+    "evaluate_next",
+    evaluate_next,
+    retry_for=(RedisError,),
+    max_retries=settings.EVALUATION_MAX_RETRIES,
+    backoff=settings.EVALUATION_RETRY_BACKOFF_SECONDS
+)
+local_tasks.register("sweep_stuck_evaluations", sweep_stuck_evaluations)
+local_tasks.register("run_campaign", run_campaign)
+local_tasks.register("send_recruiter_digests", send_recruiter_digests)
+
+# Periodic ones on celery beat's schedule (draining the outbox is Celery's alone)
+for entry in celery_app.conf.beat_schedule.values():
+    if entry["task"] in local_tasks.TASKS:
+        local_tasks.TASKS[entry["task"]].every = entry["schedule"]
@@ -17,13 +17,70 @@ class Settings(BaseSettings):
     # Database
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "hirewave"
+    MIGRATIONS_STRICT: bool = False  # Refuse to start if schema is behind
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    REDIS_SOCKET_TIMEOUT: float = 2.0
+    
+    # Caching
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_LOCAL_TTL_SECONDS: float = 5.0  # In-process tier; bounds cross-worker staleness
+    CACHE_LOCAL_MAX_ENTRIES: int = 1024
+    CACHE_STALE_TTL_SECONDS: int = 60  # Serve expired entries this long while one refresh runs
+    ASSESSMENT_SNAPSHOT_TTL_SECONDS: int = 86400
+    ASSESSMENT_SNAPSHOT_MAX_AGE: int = 3600  # Browser Cache-Control max-age
+    
+    # Answer autosave
+    AUTOSAVE_FLUSH_INTERVAL_SECONDS: float = 5.0
+    AUTOSAVE_FLUSH_BATCH: int = 500  # Drafts written to MongoDB per flush, per web worker
+    AUTOSAVE_DRAFT_TTL_SECONDS: int = 86400
+    
+    # Proctoring events
+    PROCTORING_FLUSH_INTERVAL_SECONDS: float = 2.0
+    PROCTORING_FLUSH_BATCH: int = 5000  # Events inserted per flush, per web worker
+    PROCTORING_EVENT_RETENTION_DAYS: int = 180
+    
+    # Live events (Server-Sent Events over Redis pub/sub)
+    EVENTS_QUEUE_SIZE: int = 100  # Per-connection buffer; slower clients are reset
+    EVENTS_HEARTBEAT_SECONDS: float = 15.0
     
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
+    CELERY_TASK_SERIALIZER: str = "msgpack"  # Or "json" while older workers are draining
+    CELERY_RESULT_EXPIRES_SECONDS: int = 900  # Only tasks that opt in store results
+    CELERY_VISIBILITY_TIMEOUT_SECONDS: int = 3600  # Unacked tasks are redelivered after this; above retry countdowns
+    
+    # Evaluation retries (see app/utils/evaluation_retry.py)
+    EVALUATION_MAX_RETRIES: int = 5  # Celery retries of transient failures
+    EVALUATION_RETRY_BACKOFF_SECONDS: int = 10  # Doubles per retry, with full jitter
+    EVALUATION_RETRY_BACKOFF_MAX_SECONDS: int = 600
+    EVALUATION_STUCK_MINUTES: int = 30  # Evaluations silent this long (and not queued) are re-enqueued
+    EVALUATION_SWEEP_MINUTES: int = 10  # How often celery beat looks for stuck evaluations
+    EVALUATION_SWEEP_BATCH: int = 500
+    EVALUATION_MAX_REQUEUES: int = 3  # Sweeper retries of a dead-lettered evaluation
+    EVALUATION_QUEUED_MAX_HOURS: int = 24  # A queued evaluation not started by then counts as lost
+    
+    # Task publishing and queue depth (see app/utils/task_queue.py)
+    TASK_PUBLISH_THREADS: int = 4  # Per web worker; publishes never run on the event loop
+    TASK_PUBLISH_TIMEOUT_SECONDS: float = 5.0  # Then the task waits in the task outbox
+    TASK_OUTBOX_GRACE_SECONDS: int = 30  # Also how often celery beat drains the outbox
+    TASK_OUTBOX_DRAIN_BATCH: int = 1000
+    EVALUATION_SECONDS_ESTIMATE: float = 60.0  # One evaluation, for ETAs without recent throughput
+    EVALUATION_RATE_WINDOW_SECONDS: int = 600  # Throughput measured over this window
+    QUEUE_STATS_TTL_SECONDS: float = 5.0
+    
+    # Task backend (see app/utils/local_tasks.py)
+    TASK_BACKEND: str = "celery"  # Or "local": run tasks in the web workers, no Celery worker, beat or Redis needed
+    TASK_LOCAL_CONCURRENCY: int = 2  # Tasks in flight per web worker with the local backend
+    TASK_LOCAL_POLL_SECONDS: float = 5.0  # Also how often periodic tasks are checked
+    TASK_LOCAL_CLAIM_TIMEOUT_SECONDS: int = 1800  # Rerun tasks of a web worker that died mid-task (running ones refresh their claim)
+    
+    # Fair-share evaluation scheduling (see app/utils/fair_queue.py)
+    EVALUATION_LANES: str = "company"  # "company", "job", or "off" for one FIFO queue; always off with TASK_BACKEND=local
+    EVALUATION_DEADLINE_WEIGHT: int = 4  # Lane share while a job's shortlist deadline is near
+    EVALUATION_DEADLINE_WINDOW_HOURS: int = 48
     
     # AI Configuration
     GOOGLE_API_KEY: str = ""
@@ -41,14 +98,45 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: Optional[str] = None
     SMTP_FROM_EMAIL: Optional[str] = None  # Defaults to SMTP_USER if not set
     SMTP_FROM_NAME: Optional[str] = "HireWave"
+    SMTP_STARTTLS: bool = True  # False for local relays and the dev sink (python -m app.utils.smtp_sink)
+    SMTP_POOL_SIZE: int = 4  # Authenticated connections kept open per process
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_IDLE_TIMEOUT_SECONDS: float = 30.0  # Reconnect instead of reusing a connection idle this long
+    SMTP_TIMEOUT_SECONDS: float = 10.0
+    
+    # Email outbox sender (python -m app.email_sender)
+    EMAIL_SENDER_BATCH: int = 100  # Outbox jobs claimed per poll
+    EMAIL_SENDER_POLL_SECONDS: float = 2.0  # Wait between polls once the outbox is drained
+    EMAIL_SENDER_CONCURRENCY: int = 8  # Messages in flight (one pooled SMTP connection each)
+    EMAIL_DOMAIN_CONCURRENCY: int = 2  # Messages in flight per recipient domain
+    EMAIL_MAX_ATTEMPTS: int = 6  # Then the job is dead-lettered
+    EMAIL_RETRY_BASE_SECONDS: float = 30.0  # Doubles per attempt, with jitter
+    EMAIL_RETRY_MAX_SECONDS: float = 3600.0
+    EMAIL_CLAIM_TIMEOUT_SECONDS: int = 300  # Reclaim jobs of a sender that died mid-batch
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 7  # Sent jobs are removed after this
+    
+    # Bulk email campaigns
+    CAMPAIGN_BATCH_SIZE: int = 500  # Recipients read and queued per round-trip
+    CAMPAIGN_RATE_PER_MINUTE: int = 600  # Delivery schedule per campaign
+    
+    # Recruiter application digests
+    DIGEST_INTERVAL_MINUTES: int = 60  # Default; recruiters can choose their own
+    DIGEST_CHECK_MINUTES: int = 5  # How often celery beat looks for due digests
     
     # File Upload
     MAX_UPLOAD_SIZE: int = 5242880  # 5MB
     ALLOWED_EXTENSIONS: str = "pdf,doc,docx"
     
     # Frontend
+    APP_BASE_URL: str = "http://localhost:8000"  # Public URL used in email links
     STATIC_URL: str = "/static"
     TEMPLATES_PATH: str = "templates"
+    PAGE_SHELLS_RELOAD: bool = False  # Re-render page shells per request (template development)
+    
+    # Response compression
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
     
     class Config:
         env_file = ".env"
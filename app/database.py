@@ -1,5 +1,6 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.config import settings
+from app.migrations import get_schema_version, LATEST_VERSION
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,8 +24,8 @@ async def connect_to_mongo():
         await db.client.admin.command('ping')
         logger.info("Successfully connected to MongoDB")
         
-        # Create indexes
-        await create_indexes()
+        # Indexes are managed by app.migrations; only verify the version here
+        await verify_schema_version()
         
     except Exception as e:
         logger.error(f"Could not connect to MongoDB: {e}")
@@ -38,38 +39,20 @@ async def close_mongo_connection():
         logger.info("Closed MongoDB connection")
 
 
-async def create_indexes():
-    """Create database indexes for better performance"""
-    try:
-        # Users collection
-        await db.db.users.create_index("email", unique=True)
-        await db.db.users.create_index("user_type")
-        
-        # Jobs collection
-        await db.db.jobs.create_index("company_id")
-        await db.db.jobs.create_index("status")
-        await db.db.jobs.create_index("created_at")
-        
-        # Assessments collection
-        await db.db.assessments.create_index("job_id")
-        
-        # Applications collection
-        await db.db.applications.create_index([("job_id", 1), ("candidate_id", 1)], unique=True)
-        await db.db.applications.create_index("candidate_id")
-        await db.db.applications.create_index("status")
-        
-        # Submissions collection
-        await db.db.submissions.create_index("application_id")
-        await db.db.submissions.create_index("candidate_id")
-        
-        # Results collection
-        await db.db.results.create_index("submission_id", unique=True)
-        await db.db.results.create_index("application_id")
-        
-        logger.info("Database indexes created successfully")
-        
-    except Exception as e:
-        logger.warning(f"Error creating indexes: {e}")
+async def verify_schema_version():
+    """Check that migrations have been applied (run `python -m app.migrations`)"""
+    current = await get_schema_version(db.db)
+    if current >= LATEST_VERSION:
+        logger.info(f"Database schema is current (version {current})")
+        return
+
+    message = (
+        f"Database schema version {current} is behind {LATEST_VERSION}. "
+        "Run `python -m app.migrations` to upgrade."
+    )
+    if settings.MIGRATIONS_STRICT:
+        raise RuntimeError(message)
+    logger.warning(message)
 
 
 def get_database():
@@ -0,0 +1,301 @@
+"""
+Outbox email sender
+
+Delivers the jobs routes queue in email_outbox (see app/utils/outbox.py).
+Run one or more alongside the web app:
+
+    python -m app.email_sender              # send until stopped
+    python -m app.email_sender stats        # job counts by status
+    python -m app.email_sender retry-dead   # requeue dead-lettered jobs
+
+Each poll claims up to EMAIL_SENDER_BATCH due jobs with one update_many
+(a claim token keeps concurrent senders from taking the same job), sends
+them over a pool of persistent aiosmtplib connections with at most
+EMAIL_DOMAIN_CONCURRENCY messages in flight per recipient domain, and
+records every outcome with one bulk_write. Temporary failures are retried
+with exponential backoff and jitter; permanent ones (5xx, unknown kind)
+and jobs out of attempts are dead-lettered. A sender refreshes its
+batch's claim while sending, however long the batch takes; a job whose
+sender died mid-send is reclaimed after EMAIL_CLAIM_TIMEOUT_SECONDS.
+
+Campaign jobs (app/utils/campaigns.py) in a batch are rendered together
+per campaign, and their outcomes are added to the campaign's counters.
+"""
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from jinja2 import TemplateError
+from app.config import settings
+from app.utils.campaigns import record_outcomes, reopen_dead
+from app.utils.email import email_service
+from app.utils.email_templates import email_templates
+from app.utils.helpers import generate_id
+from app.utils.outbox import PENDING, SENDING, SENT, DEAD, outbox_stats
+from app.utils.smtp_pool import AsyncSMTPPool
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from email.message import Message
+from typing import Any, Dict, List, Tuple, Union
+import aiosmtplib
+import argparse
+import asyncio
+import random
+import signal
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, in seconds"""
+    delay = min(settings.EMAIL_RETRY_MAX_SECONDS, settings.EMAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def is_permanent(error: Exception) -> bool:
+    """5xx replies (and jobs that can't be rendered) won't succeed on retry"""
+    if isinstance(error, (ValueError, TypeError, KeyError, TemplateError)):
+        return True
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(500 <= r.code < 600 for r in error.recipients)
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return 500 <= error.code < 600
+    return False
+
+
+def is_bounce(error: Exception) -> bool:
+    """The server permanently refused the recipient"""
+    return isinstance(error, aiosmtplib.SMTPRecipientsRefused) and is_permanent(error)
+
+
+class EmailSender:
+    def __init__(self, db, smtp: AsyncSMTPPool):
+        self.db = db
+        self.smtp = smtp
+
+    def _due(self, now: datetime) -> Dict[str, Any]:
+        stale = now - timedelta(seconds=settings.EMAIL_CLAIM_TIMEOUT_SECONDS)
+        return {"$or": [
+            {"status": PENDING, "next_attempt_at": {"$lte": now}},
+            {"status": SENDING, "claimed_at": {"$lt": stale}}
+        ]}
+
+    async def claim(self, limit: int) -> List[Dict[str, Any]]:
+        """Claim up to `limit` due jobs for this sender"""
+        now = datetime.utcnow()
+        due = self._due(now)
+        candidates = await self.db.email_outbox.find(due, {"_id": 1}).sort("next_attempt_at", 1).limit(limit).to_list(limit)
+        if not candidates:
+            return []
+
+        # Re-check the due condition in the update: another sender may have claimed some
+        claim = generate_id()
+        ids = [job["_id"] for job in candidates]
+        await self.db.email_outbox.update_many(
+            {"_id": {"$in": ids}, **due},
+            {"$set": {"status": SENDING, "claim": claim, "claimed_at": now}, "$inc": {"attempts": 1}}
+        )
+        return await self.db.email_outbox.find({"_id": {"$in": ids}, "claim": claim}).to_list(None)
+
+    async def render(self, jobs: List[Dict[str, Any]]) -> Dict[str, Union[Message, Exception]]:
+        """Each job's message, or the error that prevented building it"""
+        campaign_ids = list({job["campaign_id"] for job in jobs if job.get("campaign_id")})
+        shared = {}
+        if campaign_ids:
+            async for campaign in self.db.email_campaigns.find({"_id": {"$in": campaign_ids}}, {"shared": 1}):
+                shared[campaign["_id"]] = campaign["shared"]
+
+        groups = defaultdict(list)
+        for job in jobs:
+            groups[(job["kind"], job.get("campaign_id"))].append(job)
+
+        messages = {}
+        for (kind, campaign_id), group in groups.items():
+            if campaign_id in shared:
+                try:
+                    rendered = email_templates.render_many(kind, shared[campaign_id], [job["params"] for job in group])
+                    for job, (subject, html_content, text_content) in zip(group, rendered):
+                        messages[job["_id"]] = email_service.build_message(job["to"], subject, html_content, text_content)
+                    continue
+                except Exception:
+                    pass  # render the rest one by one to pin the error on the job at fault
+            for job in group:
+                if job["_id"] in messages:
+                    continue
+                try:
+                    params = {**shared[campaign_id], **job["params"]} if campaign_id else job["params"]
+                    subject, html_content, text_content = email_service.render(kind, params)
+                    messages[job["_id"]] = email_service.build_message(job["to"], subject, html_content, text_content)
+                except Exception as e:
+                    messages[job["_id"]] = e
+        return messages
+
+    async def deliver(
+        self,
+        job: Dict[str, Any],
+        message: Union[Message, Exception],
+        domain_slots: Dict[str, asyncio.Semaphore]
+    ) -> Tuple[str, UpdateOne]:
+        """Send one job; returns its outcome (sent, deferred, bounced or failed)
+        and the outbox update recording it"""
+        domain = job["to"].rpartition("@")[2].lower()
+        try:
+            if isinstance(message, Exception):
+                raise message
+            async with domain_slots[domain]:
+                await self.smtp.send(message)
+        except Exception as e:
+            now = datetime.utcnow()
+            error = f"{type(e).__name__}: {e}"[:500]
+            if is_permanent(e) or job["attempts"] >= settings.EMAIL_MAX_ATTEMPTS:
+                logger.error(f"Dead-lettering email {job['_id']} ({job['kind']} to {job['to']}): {error}")
+                outcome = "bounced" if is_bounce(e) else "failed"
+                update = {"$set": {"status": DEAD, "dead_at": now, "last_error": error, "bounced": outcome == "bounced"}}
+            else:
+                delay = retry_delay(job["attempts"])
+                logger.warning(f"Email {job['_id']} to {job['to']} failed, retrying in {delay:.0f}s: {error}")
+                outcome = "deferred"
+                update = {"$set": {
+                    "status": PENDING,
+                    "next_attempt_at": now + timedelta(seconds=delay),
+                    "last_error": error
+                }}
+            update["$set"]["settled_claim"] = job["claim"]
+            update["$unset"] = {"claim": ""}
+            return outcome, UpdateOne({"_id": job["_id"], "claim": job["claim"]}, update)
+
+        return "sent", UpdateOne(
+            {"_id": job["_id"], "claim": job["claim"]},
+            {
+                "$set": {"status": SENT, "sent_at": datetime.utcnow(), "settled_claim": job["claim"]},
+                "$unset": {"claim": "", "last_error": ""}
+            }
+        )
+
+    async def keep_claim(self, ids: List[str], claim: str):
+        """Refresh a batch's claim until cancelled, so no other sender takes over jobs still being sent"""
+        while True:
+            await asyncio.sleep(settings.EMAIL_CLAIM_TIMEOUT_SECONDS / 3)
+            try:
+                await self.db.email_outbox.update_many(
+                    {"_id": {"$in": ids}, "claim": claim},
+                    {"$set": {"claimed_at": datetime.utcnow()}}
+                )
+            except Exception as e:
+                logger.warning(f"Could not refresh email claim {claim}: {e}")
+
+    async def run_once(self) -> int:
+        """Claim and deliver one batch; returns the number of jobs processed"""
+        jobs = await self.claim(settings.EMAIL_SENDER_BATCH)
+        if not jobs:
+            return 0
+
+        ids = [job["_id"] for job in jobs]
+        claim = jobs[0]["claim"]
+        keeper = asyncio.create_task(self.keep_claim(ids, claim))
+        try:
+            messages = await self.render(jobs)
+            domains = {job["to"].rpartition("@")[2].lower() for job in jobs}
+            domain_slots = {domain: asyncio.Semaphore(settings.EMAIL_DOMAIN_CONCURRENCY) for domain in domains}
+            results = await asyncio.gather(*[self.deliver(job, messages[job["_id"]], domain_slots) for job in jobs])
+        finally:
+            keeper.cancel()
+        written = await self.db.email_outbox.bulk_write([update for _, update in results], ordered=False)
+
+        # Jobs another sender took over are counted by that sender, not here
+        settled = set(ids)
+        if written.matched_count < len(ids):
+            settled = {
+                job["_id"] async for job in self.db.email_outbox.find(
+                    {"_id": {"$in": ids}, "settled_claim": claim}, {"_id": 1}
+                )
+            }
+            logger.warning(f"{len(ids) - len(settled)} emails of claim {claim} were reclaimed by another sender")
+
+        tallies = defaultdict(Counter)
+        for job, (outcome, _) in zip(jobs, results):
+            if job.get("campaign_id") and job["_id"] in settled:
+                tallies[job["campaign_id"]][outcome] += 1
+        if tallies:
+            await record_outcomes(self.db, tallies)
+        return len(jobs)
+
+    async def run(self, stop: asyncio.Event):
+        logger.info("Email sender started")
+        while not stop.is_set():
+            try:
+                processed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Email sender batch failed: {e}")
+                processed = 0
+            if processed < settings.EMAIL_SENDER_BATCH:
+                # Outbox drained: wait for new jobs (or a stop signal)
+                try:
+                    await asyncio.wait_for(stop.wait(), settings.EMAIL_SENDER_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        logger.info("Email sender stopped")
+
+
+def create_sender(db) -> EmailSender:
+    return EmailSender(db, AsyncSMTPPool(
+        settings.SMTP_HOST,
+        settings.SMTP_PORT,
+        settings.SMTP_USER,
+        settings.SMTP_PASSWORD,
+        starttls=settings.SMTP_STARTTLS,
+        size=settings.EMAIL_SENDER_CONCURRENCY,
+        max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+        idle_timeout=settings.SMTP_IDLE_TIMEOUT_SECONDS,
+        timeout=settings.SMTP_TIMEOUT_SECONDS
+    ))
+
+
+async def _main(command: str) -> int:
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[settings.MONGODB_DB_NAME]
+
+    try:
+        if command == "stats":
+            for status, count in sorted((await outbox_stats(db)).items()):
+                print(f"{status}: {count}")
+            return 0
+
+        if command == "retry-dead":
+            await reopen_dead(db)
+            result = await db.email_outbox.update_many(
+                {"status": DEAD},
+                {"$set": {"status": PENDING, "attempts": 0, "next_attempt_at": datetime.utcnow()}}
+            )
+            print(f"Requeued {result.modified_count} dead-lettered emails")
+            return 0
+
+        if not settings.SMTP_USER or not settings.SMTP_PASSWORD:
+            logger.warning("SMTP not configured; emails stay queued in the outbox")
+            return 0
+
+        sender = create_sender(db)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        try:
+            await sender.run(stop)
+        finally:
+            await sender.smtp.close()
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="HireWave outbox email sender")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "stats", "retry-dead"])
+    args = parser.parse_args()
+
+    raise SystemExit(asyncio.run(_main(args.command)))
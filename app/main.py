@@ -1,11 +1,19 @@
 from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from app.config import settings
-from app.database import connect_to_mongo, close_mongo_connection
-from app.routes import auth, jobs, assessments, applications, submissions, results
+from app.database import connect_to_mongo, close_mongo_connection, get_database
+from app.redis_client import close_redis_connection
+from app.assets import AssetStaticFiles
+from app.pages import page_shells
+from app.utils.autosave import autosave_service
+from app.utils.proctoring import proctoring_service
+from app.utils.events import event_hub
+from app.utils.email import email_service
+from app.utils.compression import CompressionMiddleware
+from app.utils.task_queue import local_backend, queue_stats
+from app.utils.local_tasks import local_task_runner
+from app.routes import auth, jobs, assessments, applications, submissions, results, dashboard, proctoring, campaigns
 import logging
 
 # Configure logging
@@ -34,11 +42,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static files
-app.mount("/static", StaticFiles(directory="static"), name="static")
+# Compress API and page responses (streaming responses pass through)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY
+)
 
-# Templates
-templates = Jinja2Templates(directory="templates")
+# Mount static files (fingerprinted builds are served precompressed)
+app.mount("/static", AssetStaticFiles(directory="static"), name="static")
 
 # Database events
 @app.on_event("startup")
@@ -46,6 +59,11 @@ async def startup_event():
     """Initialize database connection on startup"""
     logger.info("Starting up application...")
     await connect_to_mongo()
+    page_shells.render_all()
+    autosave_service.flusher.start()
+    proctoring_service.flusher.start()
+    if local_backend():
+        local_task_runner.start()
     logger.info("Application started successfully")
 
 
@@ -53,7 +71,13 @@ async def startup_event():
 async def shutdown_event():
     """Close database connection on shutdown"""
     logger.info("Shutting down application...")
+    await autosave_service.flusher.stop()
+    await proctoring_service.flusher.stop()
+    await local_task_runner.stop()
+    await event_hub.close()
+    email_service.close()
     await close_mongo_connection()
+    await close_redis_connection()
     logger.info("Application shut down successfully")
 
 
@@ -64,85 +88,88 @@ app.include_router(assessments.router, prefix="/api")
 app.include_router(applications.router, prefix="/api")
 app.include_router(submissions.router, prefix="/api")
 app.include_router(results.router, prefix="/api")
+app.include_router(dashboard.router, prefix="/api")
+app.include_router(proctoring.router, prefix="/api")
+app.include_router(campaigns.router, prefix="/api")
 
 
 # Frontend routes
 @app.get("/", response_class=HTMLResponse)
 async def home(request: Request):
     """Home page"""
-    return templates.TemplateResponse("index.html", {"request": request})
+    return page_shells.response(request, "index.html")
 
 
 @app.get("/login", response_class=HTMLResponse)
 async def login_page(request: Request):
     """Login page"""
-    return templates.TemplateResponse("login.html", {"request": request})
+    return page_shells.response(request, "login.html")
 
 
 @app.get("/register", response_class=HTMLResponse)
 async def register_page(request: Request):
     """Register page"""
-    return templates.TemplateResponse("register.html", {"request": request})
+    return page_shells.response(request, "register.html")
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
 async def dashboard(request: Request):
     """Dashboard page - redirects based on user type"""
-    return templates.TemplateResponse("dashboard.html", {"request": request})
+    return page_shells.response(request, "dashboard.html")
 
 
 @app.get("/recruiter/dashboard", response_class=HTMLResponse)
 async def recruiter_dashboard(request: Request):
     """Recruiter dashboard page"""
-    return templates.TemplateResponse("recruiter_dashboard.html", {"request": request})
+    return page_shells.response(request, "recruiter_dashboard.html")
 
 
 @app.get("/jobs", response_class=HTMLResponse)
 async def jobs_page(request: Request):
     """Jobs listing page - redirects based on user type"""
-    return templates.TemplateResponse("jobs_redirect.html", {"request": request})
+    return page_shells.response(request, "jobs_redirect.html")
 
 
 @app.get("/candidate/jobs", response_class=HTMLResponse)
 async def candidate_jobs_page(request: Request):
     """Candidate jobs listing page"""
-    return templates.TemplateResponse("jobs.html", {"request": request})
+    return page_shells.response(request, "jobs.html")
 
 
 @app.get("/jobs/{job_id}", response_class=HTMLResponse)
 async def job_detail_page(request: Request, job_id: str):
     """Job detail page"""
-    return templates.TemplateResponse("job_detail.html", {"request": request, "job_id": job_id})
+    return page_shells.response(request, "job_detail.html")
 
 
 @app.get("/assessment/{application_id}", response_class=HTMLResponse)
 async def assessment_rules_page(request: Request, application_id: str):
     """Assessment rules and guidelines page"""
-    return templates.TemplateResponse("assessment_rules.html", {"request": request, "application_id": application_id})
+    return page_shells.response(request, "assessment_rules.html")
 
 
 @app.get("/assessment/take/{application_id}", response_class=HTMLResponse)
 async def assessment_proctored_page(request: Request, application_id: str):
     """Proctored assessment taking page"""
-    return templates.TemplateResponse("assessment_proctored.html", {"request": request, "application_id": application_id})
+    return page_shells.response(request, "assessment_proctored.html")
 
 
 @app.get("/results/{application_id}", response_class=HTMLResponse)
 async def results_page(request: Request, application_id: str):
     """Results page"""
-    return templates.TemplateResponse("results.html", {"request": request, "application_id": application_id})
+    return page_shells.response(request, "results.html")
 
 
 @app.get("/recruiter/jobs", response_class=HTMLResponse)
 async def recruiter_jobs(request: Request):
     """Recruiter jobs management"""
-    return templates.TemplateResponse("recruiter_jobs.html", {"request": request})
+    return page_shells.response(request, "recruiter_jobs.html")
 
 
 @app.get("/recruiter/candidates/{job_id}", response_class=HTMLResponse)
 async def recruiter_candidates(request: Request, job_id: str):
     """Recruiter candidates view"""
-    return templates.TemplateResponse("recruiter_candidates.html", {"request": request, "job_id": job_id})
+    return page_shells.response(request, "recruiter_candidates.html")
 
 
 # Health check
@@ -152,6 +179,12 @@ async def health_check():
     return {"status": "healthy", "app": settings.APP_NAME}
 
 
+@app.get("/health/queue")
+async def queue_health():
+    """Evaluation queue depth and estimated time to result (dashboards, autoscalers)"""
+    return await queue_stats(get_database())
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
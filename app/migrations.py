@@ -0,0 +1,268 @@
+"""
+Versioned schema migrations
+
+Index builds and other schema changes live here instead of in web startup.
+Run them once per deploy:
+
+    python -m app.migrations            # apply pending migrations
+    python -m app.migrations status     # show current/latest version
+
+Web workers only check that the stored version is current.
+"""
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+from app.config import settings
+from typing import Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timezone
+import argparse
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_COLLECTION = "schema_migrations"
+
+
+async def _create_proctoring_events(db):
+    """Time-series collection for proctoring events (MongoDB 5.0+)"""
+    existing = await db.list_collection_names(filter={"name": "proctoring_events"})
+    if not existing:
+        await db.create_collection(
+            "proctoring_events",
+            timeseries={"timeField": "ts", "metaField": "meta", "granularity": "seconds"},
+            expireAfterSeconds=settings.PROCTORING_EVENT_RETENTION_DAYS * 86400
+        )
+
+
+class Migration:
+    """A single idempotent schema step"""
+
+    def __init__(
+        self,
+        version: int,
+        description: str,
+        indexes: Optional[Dict[str, List[IndexModel]]] = None,
+        operation: Optional[Callable[..., Awaitable[None]]] = None
+    ):
+        self.version = version
+        self.description = description
+        self.indexes = indexes or {}
+        self.operation = operation
+
+    async def apply(self, db):
+        """Run custom operation, then build all indexes concurrently"""
+        if self.operation:
+            await self.operation(db)
+
+        # One createIndexes command per collection, all collections in parallel
+        await asyncio.gather(*[
+            db[collection].create_indexes(models)
+            for collection, models in self.indexes.items()
+        ])
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        1,
+        "Initial indexes",
+        indexes={
+            "users": [
+                IndexModel([("email", ASCENDING)], unique=True),
+                IndexModel([("user_type", ASCENDING)]),
+            ],
+            "jobs": [
+                IndexModel([("company_id", ASCENDING)]),
+                IndexModel([("status", ASCENDING)]),
+                IndexModel([("created_at", ASCENDING)]),
+            ],
+            "assessments": [
+                IndexModel([("job_id", ASCENDING)]),
+            ],
+            "applications": [
+                IndexModel([("job_id", ASCENDING), ("candidate_id", ASCENDING)], unique=True),
+                IndexModel([("candidate_id", ASCENDING)]),
+                IndexModel([("status", ASCENDING)]),
+            ],
+            "submissions": [
+                IndexModel([("application_id", ASCENDING)]),
+                IndexModel([("candidate_id", ASCENDING)]),
+            ],
+            "results": [
+                IndexModel([("submission_id", ASCENDING)], unique=True),
+                IndexModel([("application_id", ASCENDING)]),
+            ],
+        }
+    ),
+    Migration(
+        2,
+        "Autosaved answer drafts",
+        indexes={
+            "answer_drafts": [
+                # Drafts of abandoned attempts are dropped after 30 days
+                IndexModel([("updated_at", ASCENDING)], expireAfterSeconds=30 * 86400),
+            ],
+        }
+    ),
+    Migration(
+        3,
+        "Proctoring events time-series collection",
+        indexes={
+            "proctoring_events": [
+                IndexModel([("meta.application_id", ASCENDING), ("ts", ASCENDING)]),
+            ],
+        },
+        operation=_create_proctoring_events
+    ),
+    Migration(
+        4,
+        "Email outbox",
+        indexes={
+            "email_outbox": [
+                IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+                IndexModel([("status", ASCENDING), ("claimed_at", ASCENDING)]),
+                # Only sent jobs have sent_at; pending and dead jobs are kept
+                IndexModel([("sent_at", ASCENDING)], expireAfterSeconds=settings.EMAIL_OUTBOX_RETENTION_DAYS * 86400),
+            ],
+        }
+    ),
+    Migration(
+        5,
+        "Email campaigns",
+        indexes={
+            "email_campaigns": [
+                IndexModel([("job_id", ASCENDING), ("created_at", DESCENDING)]),
+                IndexModel([("company_id", ASCENDING), ("created_at", DESCENDING)]),
+            ],
+        }
+    ),
+    Migration(
+        6,
+        "Recruiter digest events",
+        indexes={
+            "digest_events": [
+                IndexModel([("recruiter_id", ASCENDING), ("created_at", ASCENDING)]),
+                # Events of recruiters who no longer exist are never sent
+                IndexModel([("created_at", ASCENDING)], expireAfterSeconds=30 * 86400),
+            ],
+        }
+    ),
+    Migration(
+        7,
+        "Evaluation sweeper and dead letters",
+        indexes={
+            "applications": [
+                IndexModel([("status", ASCENDING), ("assessment_completed_at", ASCENDING)]),
+            ],
+            "evaluation_dead_letters": [
+                IndexModel([("failed_at", DESCENDING)]),
+            ],
+        }
+    ),
+    Migration(
+        8,
+        "Task outbox and evaluation throughput",
+        indexes={
+            "task_outbox": [
+                IndexModel([("created_at", ASCENDING)]),
+            ],
+            "results": [
+                IndexModel([("created_at", ASCENDING)]),
+            ],
+        }
+    ),
+    Migration(
+        9,
+        "Local task backend queue",
+        indexes={
+            "task_outbox": [
+                IndexModel([("run_at", ASCENDING)]),
+            ],
+        }
+    ),
+]
+
+LATEST_VERSION = max(m.version for m in MIGRATIONS)
+
+
+async def get_schema_version(db) -> int:
+    """Return the highest applied migration version (0 if none)"""
+    doc = await db[SCHEMA_COLLECTION].find_one(
+        {"status": "applied"},
+        projection={"_id": 1},
+        sort=[("_id", DESCENDING)]
+    )
+    return doc["_id"] if doc else 0
+
+
+async def run_migrations(db) -> int:
+    """Apply pending migrations in order and return the resulting version"""
+    current = await get_schema_version(db)
+
+    for migration in sorted(MIGRATIONS, key=lambda m: m.version):
+        if migration.version <= current:
+            continue
+
+        # Claim the version so concurrent runners don't apply it twice
+        try:
+            await db[SCHEMA_COLLECTION].insert_one({
+                "_id": migration.version,
+                "description": migration.description,
+                "status": "running",
+                "started_at": datetime.now(timezone.utc)
+            })
+        except DuplicateKeyError:
+            existing = await db[SCHEMA_COLLECTION].find_one({"_id": migration.version})
+            if existing and existing.get("status") == "applied":
+                current = migration.version
+                continue
+            raise RuntimeError(
+                f"Migration {migration.version} is being applied by another runner "
+                f"(or a previous run crashed; remove its '{SCHEMA_COLLECTION}' entry to retry)"
+            )
+
+        logger.info(f"Applying migration {migration.version}: {migration.description}")
+        try:
+            await migration.apply(db)
+        except Exception:
+            await db[SCHEMA_COLLECTION].delete_one({"_id": migration.version})
+            raise
+
+        await db[SCHEMA_COLLECTION].update_one(
+            {"_id": migration.version},
+            {"$set": {"status": "applied", "applied_at": datetime.now(timezone.utc)}}
+        )
+        current = migration.version
+
+    return current
+
+
+async def _main(command: str) -> int:
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[settings.MONGODB_DB_NAME]
+
+    try:
+        if command == "status":
+            current = await get_schema_version(db)
+            print(f"Schema version: {current} (latest: {LATEST_VERSION})")
+            return 0 if current >= LATEST_VERSION else 1
+
+        version = await run_migrations(db)
+        print(f"Schema is at version {version}")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    parser = argparse.ArgumentParser(description="HireWave schema migrations")
+    parser.add_argument("command", nargs="?", default="upgrade", choices=["upgrade", "status"])
+    args = parser.parse_args()
+
+    raise SystemExit(asyncio.run(_main(args.command)))
@@ -1,15 +1,21 @@
-from .user import User, UserCreate, UserLogin, UserResponse, UserType
+from .user import User, UserCreate, UserLogin, UserResponse, UserType, ApplicationAlerts, NotificationPreferences
 from .job import Job, JobCreate, JobUpdate, JobResponse, JobStatus, JobType
-from .assessment import Assessment, AssessmentCreate, Question, QuestionType
+from .assessment import Assessment, AssessmentCreate, CandidateAssessment, Question, QuestionType
 from .application import Application, ApplicationCreate, ApplicationStatus
 from .submission import Submission, SubmissionCreate, Answer
 from .result import Result, ResultCreate, SkillScore, FeedbackReport
+from .dashboard import CandidateDashboardItem, RecruiterDashboard, JobFunnel
+from .proctoring import ProctoringEvent, ProctoringEventBatch, ProctoringEventType, ProctoringSummary
+from .campaign import Campaign, CampaignCreate, CampaignKind, CampaignStatus
 
 __all__ = [
-    "User", "UserCreate", "UserLogin", "UserResponse", "UserType",
+    "User", "UserCreate", "UserLogin", "UserResponse", "UserType", "ApplicationAlerts", "NotificationPreferences",
     "Job", "JobCreate", "JobUpdate", "JobResponse", "JobStatus", "JobType",
-    "Assessment", "AssessmentCreate", "Question", "QuestionType",
+    "Assessment", "AssessmentCreate", "CandidateAssessment", "Question", "QuestionType",
     "Application", "ApplicationCreate", "ApplicationStatus",
     "Submission", "SubmissionCreate", "Answer",
-    "Result", "ResultCreate", "SkillScore", "FeedbackReport"
+    "Result", "ResultCreate", "SkillScore", "FeedbackReport",
+    "CandidateDashboardItem", "RecruiterDashboard", "JobFunnel",
+    "ProctoringEvent", "ProctoringEventBatch", "ProctoringEventType", "ProctoringSummary",
+    "Campaign", "CampaignCreate", "CampaignKind", "CampaignStatus"
 ]
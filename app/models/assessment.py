@@ -68,6 +68,7 @@ class AssessmentCreate(BaseModel):
 
 class Assessment(AssessmentBase):
     id: str = Field(alias="_id")
+    version: int = 1  # Bump on any content change, and drop the candidate snapshot (invalidate_assessment_snapshot)
     created_by: str
     is_ai_generated: bool = True
     generation_metadata: Optional[Dict[str, Any]] = None
@@ -78,3 +79,31 @@ class Assessment(AssessmentBase):
         populate_by_name = True
         json_encoders = {datetime: lambda v: v.isoformat()}
         by_alias = False  # Use 'id' in JSON output instead of '_id'
+
+
+class CandidateQuestion(BaseModel):
+    """Question as shown to candidates (no answer key or rationale)"""
+    question_id: str
+    type: QuestionType
+    question_text: str
+    difficulty: str
+    points: int
+    options: Optional[List[MCQOption]] = None
+    test_cases: Optional[List[TestCase]] = None  # Visible cases only
+    starter_code: Optional[str] = None
+    language: Optional[str] = None
+    skill_tags: List[str] = []
+
+
+class CandidateAssessment(BaseModel):
+    """Candidate-safe assessment snapshot"""
+    id: str = Field(alias="_id")
+    job_id: str
+    version: int = 1
+    title: str
+    description: str
+    questions: List[CandidateQuestion]
+    config: AssessmentConfig
+
+    class Config:
+        populate_by_name = True
@@ -0,0 +1,43 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from datetime import datetime
+from enum import Enum
+
+
+class CampaignKind(str, Enum):
+    RESULTS_NOTIFICATION = "results_notification"
+    ASSESSMENT_INVITATION = "assessment_invitation"
+
+
+class CampaignStatus(str, Enum):
+    QUEUED = "queued"  # waiting for the worker
+    QUEUING = "queuing"  # recipients being streamed into the outbox
+    SENDING = "sending"  # every recipient queued, delivery in progress
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class CampaignCreate(BaseModel):
+    job_id: str
+    kind: CampaignKind
+
+
+class Campaign(BaseModel):
+    id: str = Field(alias="_id")
+    job_id: str
+    kind: CampaignKind
+    status: CampaignStatus
+    recipients: int = 0  # queued so far
+    sent: int = 0
+    bounced: int = 0  # recipient refused by the server
+    failed: int = 0  # out of attempts or permanent error
+    deferred: int = 0  # temporary failures (each is retried)
+    pending: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+        json_encoders = {datetime: lambda v: v.isoformat()}
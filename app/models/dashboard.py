@@ -0,0 +1,53 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from datetime import datetime
+from app.models.application import Application
+from app.models.job import JobStatus
+
+
+class DashboardJobSummary(BaseModel):
+    title: str
+    company_name: str
+    location: Optional[str] = None
+    status: JobStatus
+
+
+class DashboardResultSummary(BaseModel):
+    percentage: float
+    is_shortlisted: bool = False
+
+
+class CandidateDashboardItem(Application):
+    job: Optional[DashboardJobSummary] = None
+    result: Optional[DashboardResultSummary] = None
+
+
+class JobFunnel(BaseModel):
+    applied: int = 0
+    assessment_started: int = 0
+    assessment_completed: int = 0
+    under_review: int = 0
+    shortlisted: int = 0
+    rejected: int = 0
+    pending_evaluations: int = 0
+    average_score: Optional[float] = None
+
+
+class RecruiterJobSummary(BaseModel):
+    id: str = Field(alias="_id")
+    title: str
+    status: JobStatus
+    location: Optional[str] = None
+    assessment_id: Optional[str] = None
+    created_at: datetime
+    funnel: JobFunnel = JobFunnel()
+
+    class Config:
+        populate_by_name = True
+
+
+class RecruiterDashboard(BaseModel):
+    total_jobs: int
+    active_jobs: int
+    totals: JobFunnel
+    jobs: List[RecruiterJobSummary]
@@ -25,6 +25,7 @@ class JobBase(BaseModel):
     salary_range: Optional[str] = None
     vacancies: int = 1
     target_colleges: List[str] = []
+    shortlist_deadline: Optional[datetime] = None  # Evaluations are prioritised as it nears
 
 
 class JobCreate(JobBase):
@@ -40,6 +41,7 @@ class JobUpdate(BaseModel):
     salary_range: Optional[str] = None
     vacancies: Optional[int] = None
     target_colleges: Optional[List[str]] = None
+    shortlist_deadline: Optional[datetime] = None
     status: Optional[JobStatus] = None
 
 
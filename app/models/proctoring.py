@@ -0,0 +1,68 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+from datetime import datetime
+from enum import Enum
+
+
+class ProctoringEventType(str, Enum):
+    TAB_SWITCH = "tab_switch"
+    FOCUS_LOSS = "focus_loss"
+    COPY = "copy"
+    PASTE = "paste"
+    CUT = "cut"
+    CONTEXT_MENU = "context_menu"
+    DEVTOOLS_SHORTCUT = "devtools_shortcut"
+    FULLSCREEN_EXIT = "fullscreen_exit"
+    WARNING_SHOWN = "warning_shown"
+    DISQUALIFIED = "disqualified"
+
+
+# Events that count against the candidate (the rest record the proctor's response)
+VIOLATION_TYPES = {
+    ProctoringEventType.TAB_SWITCH,
+    ProctoringEventType.FOCUS_LOSS,
+    ProctoringEventType.COPY,
+    ProctoringEventType.PASTE,
+    ProctoringEventType.CUT,
+    ProctoringEventType.CONTEXT_MENU,
+    ProctoringEventType.DEVTOOLS_SHORTCUT,
+    ProctoringEventType.FULLSCREEN_EXIT,
+}
+
+
+class ProctoringEvent(BaseModel):
+    type: ProctoringEventType
+    ts: datetime
+    question_id: Optional[str] = None
+    detail: Optional[str] = Field(None, max_length=200)
+
+
+class ProctoringEventBatch(BaseModel):
+    events: List[ProctoringEvent] = Field(max_length=500)
+
+
+class EventTypeSummary(BaseModel):
+    count: int
+    first_at: datetime
+    last_at: datetime
+
+
+class TimelineEntry(BaseModel):
+    ts: datetime
+    type: ProctoringEventType
+    question_id: Optional[str] = None
+    detail: Optional[str] = None
+
+
+class MinuteBucket(BaseModel):
+    minute: datetime
+    violations: int
+
+
+class ProctoringSummary(BaseModel):
+    application_id: str
+    total_events: int = 0
+    violations: int = 0
+    by_type: Dict[str, EventTypeSummary] = {}
+    timeline: List[TimelineEntry] = []
+    per_minute: List[MinuteBucket] = []
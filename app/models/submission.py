@@ -32,7 +32,18 @@ class SubmissionBase(BaseModel):
 
 
 class SubmissionCreate(SubmissionBase):
-    pass
+    # Omit to submit the autosaved draft
+    answers: Optional[List[Answer]] = None
+
+
+class AnswerPatch(Answer):
+    """Latest state of one answer; stale patches (lower seq) are ignored"""
+    question_id: str = Field(pattern=r"^[^.$][^.]*$")
+    seq: int
+
+
+class DraftPatch(BaseModel):
+    patches: List[AnswerPatch] = Field(max_length=100)
 
 
 class Submission(SubmissionBase):
@@ -41,6 +52,7 @@ class Submission(SubmissionBase):
     submitted_at: datetime = Field(default_factory=datetime.utcnow)
     total_time_seconds: int
     is_practice: bool = False
+    evaluation_eta_seconds: Optional[int] = None  # Estimated time to the result, on submit
 
     class Config:
         populate_by_name = True
@@ -28,6 +28,18 @@ class UserType(str, Enum):
     CAMPUS_ADMIN = "campus_admin"
 
 
+class ApplicationAlerts(str, Enum):
+    INSTANT = "instant"  # one email per application
+    DIGEST = "digest"  # one summary email per interval
+    OFF = "off"
+
+
+class NotificationPreferences(BaseModel):
+    """Recruiter email preferences (users.notification_preferences)"""
+    new_applications: ApplicationAlerts = ApplicationAlerts.DIGEST
+    digest_interval_minutes: Optional[int] = Field(None, ge=15, le=10080)  # None: DIGEST_INTERVAL_MINUTES
+
+
 class UserBase(BaseModel):
     email: EmailStr
     full_name: str
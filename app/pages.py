@@ -0,0 +1,86 @@
+"""
+Pre-rendered page shells
+
+Frontend pages take no server-side input (ids are read from the URL by
+the page's JavaScript), so each template is rendered once into bytes,
+precompressed and given a strong ETag. Serving a page is then a memory
+copy or a 304, and nginx/browsers can cache the HTML and revalidate it.
+
+Set PAGE_SHELLS_RELOAD=True while editing templates to re-render per request.
+"""
+
+from fastapi import Request, Response
+from fastapi.templating import Jinja2Templates
+from app.assets import asset_url
+from app.utils.cache import CachedBody, etag_matches
+from app.utils.compression import compress, negotiate_encoding, supported_encodings, weak_etag
+from app.config import settings
+from typing import Dict
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# HTML may be stored by browsers/nginx but must be revalidated (deploys change it)
+PAGE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+templates = Jinja2Templates(directory=settings.TEMPLATES_PATH)
+templates.env.globals["asset_url"] = asset_url
+
+
+class PageShell:
+    """A rendered template with its precompressed variants"""
+
+    __slots__ = ("entry", "encoded")
+
+    def __init__(self, html: str):
+        self.entry = CachedBody(html.encode("utf-8"))
+        self.encoded = {
+            encoding: compress(self.entry.body, encoding, gzip_level=9, brotli_quality=11)
+            for encoding in supported_encodings()
+        }
+
+
+class PageShells:
+    def __init__(self):
+        self._shells: Dict[str, PageShell] = {}
+
+    def render(self, name: str) -> PageShell:
+        shell = PageShell(templates.get_template(name).render())
+        self._shells[name] = shell
+        return shell
+
+    def render_all(self):
+        """Render every page template (called at startup)"""
+        for name in sorted(os.listdir(settings.TEMPLATES_PATH)):
+            if name.endswith(".html") and name != "base.html":
+                self.render(name)
+        logger.info(f"Rendered {len(self._shells)} page shells")
+
+    def get(self, name: str) -> PageShell:
+        shell = self._shells.get(name)
+        if shell is None or settings.PAGE_SHELLS_RELOAD:
+            shell = self.render(name)
+        return shell
+
+    def response(self, request: Request, name: str) -> Response:
+        """Serve a page shell, or 304 when the client already has it"""
+        shell = self.get(name)
+        headers = {
+            "ETag": shell.entry.etag,
+            "Cache-Control": PAGE_CACHE_CONTROL,
+            "Vary": "Accept-Encoding"
+        }
+        if etag_matches(request, shell.entry.etag):
+            return Response(status_code=304, headers=headers)
+
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"))
+        if encoding in shell.encoded:
+            headers["Content-Encoding"] = encoding
+            headers["ETag"] = weak_etag(shell.entry.etag)
+            return Response(content=shell.encoded[encoding], media_type="text/html", headers=headers)
+        return Response(content=shell.entry.body, media_type="text/html", headers=headers)
+
+
+# Create singleton instance
+page_shells = PageShells()
@@ -0,0 +1,53 @@
+from redis import asyncio as aioredis
+from app.config import settings
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RedisConnection:
+    client: aioredis.Redis = None
+    loop: asyncio.AbstractEventLoop = None
+
+
+redis_conn = RedisConnection()
+broker_conn = RedisConnection()
+
+
+def _client(conn: RedisConnection, url: str) -> aioredis.Redis:
+    loop = asyncio.get_running_loop()
+    if conn.client is None or conn.loop is not loop:
+        conn.client = aioredis.from_url(
+            url,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT
+        )
+        conn.loop = loop
+    return conn.client
+
+
+def get_redis() -> aioredis.Redis:
+    """Get a Redis client bound to the running event loop.
+
+    The web app keeps one client for its lifetime; Celery tasks run each
+    job in a fresh loop via asyncio.run, so the client is rebuilt per loop.
+    """
+    return _client(redis_conn, settings.REDIS_URL)
+
+
+def get_broker_redis() -> aioredis.Redis:
+    """Client for the Celery broker's Redis (queue lengths); the app client if it's the same URL"""
+    if settings.CELERY_BROKER_URL == settings.REDIS_URL:
+        return get_redis()
+    return _client(broker_conn, settings.CELERY_BROKER_URL)
+
+
+async def close_redis_connection():
+    """Close Redis connection"""
+    for conn in (redis_conn, broker_conn):
+        if conn.client:
+            await conn.client.close()
+            conn.client = None
+            conn.loop = None
+    logger.info("Closed Redis connection")
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends
+from typing import List, Optional
 from app.models.application import ApplicationCreate, Application, ApplicationStatus
 from app.utils.auth import get_current_candidate, get_current_recruiter, get_current_user
 from app.database import get_database
 from app.utils.helpers import generate_id
-from app.utils.email import email_service
+from app.utils.outbox import queue_email, withdraw
+from app.utils.digests import notify_new_application
+from app.utils.cache import invalidate_application_views, invalidate_rankings
+from app.utils.recruiter_events import notify_company, status_delta
+from app.utils.serialization import fast_response, parse_fields, projection
 from datetime import datetime, timezone
 import logging
 
@@ -16,7 +20,6 @@ router = APIRouter(prefix="/applications", tags=["Applications"])
 @router.post("", response_model=Application, status_code=status.HTTP_201_CREATED)
 async def apply_to_job(
     application_data: ApplicationCreate,
-    background_tasks: BackgroundTasks,
     current_user=Depends(get_current_candidate)
 ):
     """Apply to a job"""
@@ -57,41 +60,50 @@ async def apply_to_job(
         "updated_at": datetime.now(timezone.utc)
     }
     
-    await db.applications.insert_one(application_dict)
+    # Queue email notifications ahead of the application, so one never exists without the other
+    # (delivered by the email sender): to the candidate, and to the recruiter now or in their next digest
+    queued = [("email_outbox", await queue_email(
+        db,
+        "application_confirmation",
+        user["email"],
+        candidate_name=user["full_name"],
+        job_title=job["title"],
+        company_name=job["company_name"]
+    ))]
+    recruiter = await db.users.find_one(
+        {"_id": job["company_id"]},
+        {"email": 1, "full_name": 1, "notification_preferences": 1}
+    )
+    if recruiter:
+        notice = await notify_new_application(db, recruiter, job, user)
+        if notice:
+            queued.append(notice)
+    
+    try:
+        await db.applications.insert_one(application_dict)
+    except Exception:
+        await withdraw(db, queued)
+        raise
+    logger.info(f"Email notifications queued for application {application_dict['_id']}")
     
-    # Update job applications count
+    # Update job applications count. Not invalidated: cached catalog and job bodies
+    # may show a count up to CACHE_TTL_SECONDS + CACHE_STALE_TTL_SECONDS old
+    # (recruiters' own job lists are read uncached)
     await db.jobs.update_one(
         {"_id": application_data.job_id},
         {"$inc": {"applications_count": 1}}
     )
-    
-    # Send email notifications in background
-    try:
-        # Email to candidate
-        background_tasks.add_task(
-            email_service.send_application_confirmation,
-            user["email"],
-            user["full_name"],
-            job["title"],
-            job["company_name"]
-        )
-        
-        # Email to recruiter
-        recruiter = await db.users.find_one({"_id": job["company_id"]})
-        if recruiter:
-            background_tasks.add_task(
-                email_service.send_new_application_notification,
-                recruiter["email"],
-                recruiter["full_name"],
-                user["full_name"],
-                job["title"],
-                user.get("skills", [])
-            )
-        
-        logger.info(f"Email notifications queued for application {application_dict['_id']}")
-    except Exception as e:
-        logger.error(f"Error queuing email notifications: {e}")
-        # Don't fail the application if email fails
+    await invalidate_application_views(user["_id"], job["company_id"])
+    await notify_company(
+        job["company_id"],
+        "application.created",
+        job["_id"],
+        application_dict["_id"],
+        funnel={"applied": 1},
+        status=application_dict["status"],
+        candidate_name=application_dict["candidate_name"],
+        applied_at=application_dict["applied_at"]
+    )
     
     return Application(**application_dict)
 
@@ -102,10 +114,12 @@ async def list_applications(
     status: str = None,
     skip: int = 0,
     limit: int = 50,
+    fields: Optional[str] = None,
     current_user=Depends(get_current_user)
 ):
     """List applications (candidate sees their own, recruiter sees all for their jobs)"""
     db = get_database()
+    selected = parse_fields(fields, Application)
     
     query = {}
     
@@ -132,17 +146,25 @@ async def list_applications(
     if status:
         query["status"] = status
     
-    applications = await db.applications.find(query).sort("applied_at", -1).skip(skip).limit(limit).to_list(limit)
+    applications = await db.applications.find(query, projection(selected)).sort("applied_at", -1).skip(skip).limit(limit).to_list(limit)
     
-    return [Application(**app) for app in applications]
+    return fast_response(Application, applications, fields=selected)
 
 
 @router.get("/{application_id}", response_model=Application)
-async def get_application(application_id: str, current_user=Depends(get_current_user)):
-    """Get application details"""
+async def get_application(
+    application_id: str,
+    fields: Optional[str] = None,
+    current_user=Depends(get_current_user)
+):
+    """Get application details (`fields` selects a subset of fields)"""
     db = get_database()
+    selected = parse_fields(fields, Application)
     
-    application = await db.applications.find_one({"_id": application_id})
+    application = await db.applications.find_one(
+        {"_id": application_id},
+        projection(selected, "candidate_id", "job_id")
+    )
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     
@@ -157,13 +179,12 @@ async def get_application(application_id: str, current_user=Depends(get_current_
         if not job:
             raise HTTPException(status_code=403, detail="Access denied")
     
-    return Application(**application)
+    return fast_response(Application, application, fields=selected)
 
 
 @router.post("/{application_id}/shortlist", response_model=Application)
 async def shortlist_application(
     application_id: str,
-    background_tasks: BackgroundTasks,
     current_user=Depends(get_current_recruiter)
 ):
     """Shortlist an application"""
@@ -179,30 +200,43 @@ async def shortlist_application(
     if not job:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    # Update application status
-    await db.applications.update_one(
-        {"_id": application_id},
-        {"$set": {"status": ApplicationStatus.SHORTLISTED.value, "updated_at": datetime.now(timezone.utc)}}
+    # Queue the shortlist notification ahead of the status change (delivered by the email sender)
+    email_id = await queue_email(
+        db,
+        "shortlist_notification",
+        application["candidate_email"],
+        candidate_name=application["candidate_name"],
+        job_title=job["title"],
+        company_name=job["company_name"]
     )
     
+    # Update application status
+    try:
+        await db.applications.update_one(
+            {"_id": application_id},
+            {"$set": {"status": ApplicationStatus.SHORTLISTED.value, "updated_at": datetime.now(timezone.utc)}}
+        )
+    except Exception:
+        await withdraw(db, [("email_outbox", email_id)])
+        raise
+    logger.info(f"Shortlist notification queued for {application['candidate_email']}")
+    
     # Update result
     await db.results.update_one(
         {"application_id": application_id},
         {"$set": {"is_shortlisted": True}}
     )
-    
-    # Send shortlist notification email
-    try:
-        background_tasks.add_task(
-            email_service.send_shortlist_notification,
-            application["candidate_email"],
-            application["candidate_name"],
-            job["title"],
-            job["company_name"]
-        )
-        logger.info(f"Shortlist notification queued for {application['candidate_email']}")
-    except Exception as e:
-        logger.error(f"Error queuing shortlist email: {e}")
+    await invalidate_application_views(application["candidate_id"], user["_id"])
+    await invalidate_rankings(application["job_id"])
+    await notify_company(
+        user["_id"],
+        "application.status",
+        application["job_id"],
+        application_id,
+        funnel=status_delta(application["status"], ApplicationStatus.SHORTLISTED.value),
+        status=ApplicationStatus.SHORTLISTED.value,
+        previous_status=application["status"]
+    )
     
     updated_application = await db.applications.find_one({"_id": application_id})
     return Application(**updated_application)
@@ -211,7 +245,6 @@ async def shortlist_application(
 @router.post("/{application_id}/reject", response_model=Application)
 async def reject_application(
     application_id: str,
-    background_tasks: BackgroundTasks,
     current_user=Depends(get_current_recruiter)
 ):
     """Reject an application"""
@@ -232,9 +265,20 @@ async def reject_application(
         {"_id": application_id},
         {"$set": {"status": ApplicationStatus.REJECTED.value, "updated_at": datetime.now(timezone.utc)}}
     )
+    await invalidate_application_views(application["candidate_id"], user["_id"])
+    await invalidate_rankings(application["job_id"])
+    await notify_company(
+        user["_id"],
+        "application.status",
+        application["job_id"],
+        application_id,
+        funnel=status_delta(application["status"], ApplicationStatus.REJECTED.value),
+        status=ApplicationStatus.REJECTED.value,
+        previous_status=application["status"]
+    )
     
     # Note: You can add rejection email here if needed
-    # background_tasks.add_task(email_service.send_rejection_email, ...)
+    # await queue_email(db, "rejection", application["candidate_email"], ...)
     
     updated_application = await db.applications.find_one({"_id": application_id})
     return Application(**updated_application)
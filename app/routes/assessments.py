@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks, Request
 from app.models.assessment import AssessmentCreate, Assessment
 from app.utils.auth import get_current_recruiter, get_current_user
 from app.database import get_database
 from app.utils.helpers import generate_id
+from app.utils.cache import cached_response, invalidate_job, invalidate_recruiter_dashboard
+from app.utils.assessment_snapshot import (
+    get_candidate_snapshot, invalidate_assessment_snapshot, snapshot_cache_control
+)
 from app.ai.gemini_service import gemini_service
 from datetime import datetime, timezone
 import logging
@@ -59,6 +63,7 @@ async def create_assessment(
                 "title": f"Assessment for {job['title']}",
                 "description": f"AI-generated assessment covering {', '.join(job['required_skills'])}",
                 "questions": ai_result["questions"],
+                "version": 1,
                 "config": {
                     "duration_minutes": ai_result.get("estimated_duration", 60),
                     "total_points": ai_result.get("total_points", 100),
@@ -100,6 +105,9 @@ async def create_assessment(
         {"_id": assessment_data.job_id},
         {"$set": {"assessment_id": assessment_dict["_id"], "updated_at": datetime.now(timezone.utc)}}
     )
+    await invalidate_job(assessment_data.job_id)
+    await invalidate_assessment_snapshot(assessment_dict["_id"], assessment_data.job_id)
+    await invalidate_recruiter_dashboard(user["_id"])
     
     logger.info(f"Successfully created assessment {assessment_dict['_id']} with {len(assessment_dict['questions'])} questions")
     
@@ -107,36 +115,38 @@ async def create_assessment(
 
 
 @router.get("/{assessment_id}", response_model=Assessment)
-async def get_assessment(assessment_id: str, current_user=Depends(get_current_user)):
+async def get_assessment(assessment_id: str, request: Request, current_user=Depends(get_current_user)):
     """Get assessment details"""
     db = get_database()
     
+    # Candidates get the cached snapshot without answer keys
+    if current_user.user_type == "candidate":
+        snapshot = await get_candidate_snapshot(db, assessment_id=assessment_id)
+        if not snapshot:
+            raise HTTPException(status_code=404, detail="Assessment not found")
+        return cached_response(request, snapshot, snapshot_cache_control())
+    
     assessment = await db.assessments.find_one({"_id": assessment_id})
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
-    # If candidate, hide correct answers
-    if current_user.user_type == "candidate":
-        for question in assessment["questions"]:
-            if "correct_option_id" in question:
-                del question["correct_option_id"]
-    
     return Assessment(**assessment)
 
 
 @router.get("/job/{job_id}", response_model=Assessment)
-async def get_assessment_by_job(job_id: str, current_user=Depends(get_current_user)):
+async def get_assessment_by_job(job_id: str, request: Request, current_user=Depends(get_current_user)):
     """Get assessment for a specific job"""
     db = get_database()
     
+    # Candidates get the cached snapshot without answer keys
+    if current_user.user_type == "candidate":
+        snapshot = await get_candidate_snapshot(db, job_id=job_id)
+        if not snapshot:
+            raise HTTPException(status_code=404, detail="Assessment not found for this job")
+        return cached_response(request, snapshot, snapshot_cache_control())
+    
     assessment = await db.assessments.find_one({"job_id": job_id})
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found for this job")
     
-    # If candidate, hide correct answers
-    if current_user.user_type == "candidate":
-        for question in assessment["questions"]:
-            if "correct_option_id" in question:
-                del question["correct_option_id"]
-    
     return Assessment(**assessment)
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, status, Depends
-from app.models.user import UserCreate, UserLogin, User, UserResponse, Token
-from app.utils.auth import get_password_hash, verify_password, create_access_token
+from app.models.user import UserCreate, UserLogin, User, UserResponse, Token, NotificationPreferences
+from app.utils.auth import get_password_hash, verify_password, create_access_token, get_current_recruiter
+from app.utils.digests import notification_preferences
 from app.database import get_database
 from app.utils.helpers import generate_id
 from datetime import datetime
@@ -112,3 +113,33 @@ async def get_current_user_info(db=Depends(get_database)):
     # This would need the current user from token
     # Simplified for now
     pass
+
+
+@router.get("/me/notifications", response_model=NotificationPreferences)
+async def get_notification_preferences(current_user=Depends(get_current_recruiter)):
+    """How the recruiter is told about new applications"""
+    db = get_database()
+    
+    user = await db.users.find_one({"email": current_user.email}, {"notification_preferences": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return notification_preferences(user)
+
+
+@router.put("/me/notifications", response_model=NotificationPreferences)
+async def update_notification_preferences(
+    preferences: NotificationPreferences,
+    current_user=Depends(get_current_recruiter)
+):
+    """Switch between instant alerts, a periodic digest and no application emails"""
+    db = get_database()
+    
+    result = await db.users.update_one(
+        {"email": current_user.email},
+        {"$set": {"notification_preferences": preferences.model_dump(mode="json"), "updated_at": datetime.utcnow()}}
+    )
+    if not result.matched_count:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    return preferences
@@ -0,0 +1,79 @@
+from fastapi import APIRouter, HTTPException, status, Depends
+from typing import List, Optional
+from app.models.campaign import Campaign, CampaignCreate
+from app.utils.auth import get_current_recruiter
+from app.database import get_database
+from app.utils.campaigns import ACTIVE_STATUSES, campaign_progress, new_campaign
+from app.utils.task_queue import enqueue
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/campaigns", tags=["Campaigns"])
+
+
+@router.post("", response_model=Campaign, status_code=status.HTTP_202_ACCEPTED)
+async def create_campaign(campaign_data: CampaignCreate, current_user=Depends(get_current_recruiter)):
+    """Email every eligible candidate of a job (results or assessment invitations)"""
+    db = get_database()
+    
+    user = await db.users.find_one({"email": current_user.email}, {"_id": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    job = await db.jobs.find_one(
+        {"_id": campaign_data.job_id, "company_id": user["_id"]},
+        {"title": 1, "company_id": 1}
+    )
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    running = await db.email_campaigns.find_one(
+        {"job_id": job["_id"], "kind": campaign_data.kind.value, "status": {"$in": ACTIVE_STATUSES}},
+        {"_id": 1}
+    )
+    if running:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Campaign {running['_id']} is already sending these emails"
+        )
+    
+    campaign = new_campaign(job, campaign_data.kind, user["_id"])
+    await db.email_campaigns.insert_one(campaign)
+    await enqueue(db, "run_campaign", campaign["_id"])
+    logger.info(f"Campaign {campaign['_id']} ({campaign['kind']}) created for job {job['_id']}")
+    
+    return Campaign(**campaign_progress(campaign))
+
+
+@router.get("", response_model=List[Campaign])
+async def list_campaigns(job_id: Optional[str] = None, current_user=Depends(get_current_recruiter)):
+    """Recent campaigns of the recruiter's company, optionally for one job"""
+    db = get_database()
+    
+    user = await db.users.find_one({"email": current_user.email}, {"_id": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    query = {"company_id": user["_id"]}
+    if job_id:
+        query["job_id"] = job_id
+    campaigns = await db.email_campaigns.find(query, {"shared": 0}).sort("created_at", -1).limit(50).to_list(50)
+    
+    return [Campaign(**campaign_progress(campaign)) for campaign in campaigns]
+
+
+@router.get("/{campaign_id}", response_model=Campaign)
+async def get_campaign(campaign_id: str, current_user=Depends(get_current_recruiter)):
+    """Campaign progress: recipients queued, sent, bounced, failed and pending"""
+    db = get_database()
+    
+    user = await db.users.find_one({"email": current_user.email}, {"_id": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    campaign = await db.email_campaigns.find_one({"_id": campaign_id, "company_id": user["_id"]}, {"shared": 0})
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    
+    return Campaign(**campaign_progress(campaign))
@@ -0,0 +1,186 @@
+from fastapi import APIRouter, HTTPException, Depends
+from typing import List, Optional
+from app.models.dashboard import CandidateDashboardItem, RecruiterDashboard, JobFunnel
+from app.models.job import JobStatus
+from app.utils.auth import get_current_candidate, get_current_recruiter
+from app.utils.cache import cache_service, candidate_dashboard_key, recruiter_dashboard_key
+from app.utils.events import event_hub, sse_event, sse_response
+from app.utils.recruiter_events import company_channel
+from app.config import settings
+from app.database import get_database
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+
+@router.get("/candidate", response_model=List[CandidateDashboardItem])
+async def get_candidate_dashboard(current_user=Depends(get_current_candidate)):
+    """Candidate's applications with job and result summaries in one call"""
+    db = get_database()
+
+    user = await db.users.find_one({"email": current_user.email}, {"_id": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    cache_key = candidate_dashboard_key(user["_id"])
+    cached = await cache_service.get_json(cache_key)
+    if cached is not None:
+        return cached
+
+    pipeline = [
+        {"$match": {"candidate_id": user["_id"]}},
+        {"$sort": {"applied_at": -1}},
+        {"$lookup": {
+            "from": "jobs",
+            "localField": "job_id",
+            "foreignField": "_id",
+            "pipeline": [
+                {"$project": {"_id": 0, "title": 1, "company_name": 1, "location": 1, "status": 1}}
+            ],
+            "as": "job"
+        }},
+        {"$lookup": {
+            "from": "results",
+            "localField": "_id",
+            "foreignField": "application_id",
+            "pipeline": [
+                {"$project": {"_id": 0, "percentage": 1, "is_shortlisted": 1}}
+            ],
+            "as": "result"
+        }},
+        {"$set": {
+            "job": {"$arrayElemAt": ["$job", 0]},
+            "result": {"$arrayElemAt": ["$result", 0]}
+        }}
+    ]
+
+    items = await db.applications.aggregate(pipeline).to_list(None)
+    items = [
+        CandidateDashboardItem(**item).model_dump(by_alias=True)
+        for item in items
+    ]
+
+    await cache_service.set_json(cache_key, items)
+
+    return items
+
+
+def _is_set(field: str) -> dict:
+    return {"$cond": [{"$ifNull": [field, False]}, 1, 0]}
+
+
+def _status_is(value: str) -> dict:
+    return {"$cond": [{"$eq": ["$status", value]}, 1, 0]}
+
+
+# Funnel counters shared by the per-job and overall facets
+FUNNEL_GROUP = {
+    "applied": {"$sum": 1},
+    "assessment_started": {"$sum": _is_set("$assessment_started_at")},
+    "assessment_completed": {"$sum": _is_set("$assessment_completed_at")},
+    "under_review": {"$sum": _status_is("under_review")},
+    "shortlisted": {"$sum": _status_is("shortlisted")},
+    "rejected": {"$sum": _status_is("rejected")},
+    "pending_evaluations": {"$sum": {"$cond": [
+        {"$and": [
+            {"$ifNull": ["$assessment_completed_at", False]},
+            {"$not": [{"$ifNull": ["$result", False]}]}
+        ]},
+        1,
+        0
+    ]}},
+    "average_score": {"$avg": "$result.percentage"}
+}
+
+
+@router.get("/recruiter", response_model=RecruiterDashboard)
+async def get_recruiter_dashboard(current_user=Depends(get_current_recruiter)):
+    """Recruiter's jobs with funnel counts and score summaries in one call"""
+    db = get_database()
+
+    user = await db.users.find_one({"email": current_user.email}, {"_id": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    cache_key = recruiter_dashboard_key(user["_id"])
+    cached = await cache_service.get_json(cache_key)
+    if cached is not None:
+        return cached
+
+    jobs = await db.jobs.find(
+        {"company_id": user["_id"]},
+        {"title": 1, "status": 1, "location": 1, "assessment_id": 1, "created_at": 1}
+    ).sort("created_at", -1).to_list(None)
+    job_ids = [job["_id"] for job in jobs]
+
+    pipeline = [
+        {"$match": {"job_id": {"$in": job_ids}}},
+        {"$lookup": {
+            "from": "results",
+            "localField": "_id",
+            "foreignField": "application_id",
+            "pipeline": [{"$project": {"_id": 0, "percentage": 1}}],
+            "as": "result"
+        }},
+        {"$set": {"result": {"$arrayElemAt": ["$result", 0]}}},
+        {"$facet": {
+            "by_job": [{"$group": {"_id": "$job_id", **FUNNEL_GROUP}}],
+            "totals": [{"$group": {"_id": None, **FUNNEL_GROUP}}]
+        }}
+    ]
+
+    facets = await db.applications.aggregate(pipeline).to_list(1)
+    facets = facets[0] if facets else {"by_job": [], "totals": []}
+
+    funnels = {row.pop("_id"): JobFunnel(**row) for row in facets["by_job"]}
+    totals = facets["totals"][0] if facets["totals"] else {}
+    totals.pop("_id", None)
+
+    for job in jobs:
+        job["funnel"] = funnels.get(job["_id"], JobFunnel())
+
+    dashboard = RecruiterDashboard(
+        total_jobs=len(jobs),
+        active_jobs=sum(1 for job in jobs if job.get("status") == JobStatus.ACTIVE.value),
+        totals=JobFunnel(**totals),
+        jobs=jobs
+    ).model_dump(by_alias=True)
+
+    await cache_service.set_json(cache_key, dashboard)
+
+    return dashboard
+
+
+@router.get("/recruiter/events")
+async def stream_recruiter_events(job_id: Optional[str] = None, current_user=Depends(get_current_recruiter)):
+    """Server-Sent Events stream of dashboard deltas for the recruiter's jobs.
+
+    Pass `job_id` to receive only one job's events (the candidates page).
+    A "reset" event means events were dropped: reload over HTTP and reconnect.
+    """
+    db = get_database()
+
+    user = await db.users.find_one({"email": current_user.email}, {"_id": 1})
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if job_id and not await db.jobs.find_one({"_id": job_id, "company_id": user["_id"]}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    subscription = await event_hub.subscribe(company_channel(user["_id"]))
+
+    async def stream():
+        try:
+            yield sse_event({"type": "ready"}, "ready")
+            while True:
+                event = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield b": keep-alive\n\n"
+                    continue
+                if job_id and event.get("job_id") not in (None, job_id):
+                    continue
+                yield sse_event(event, event["type"])
+                if event["type"] == "reset":
+                    return
+        finally:
+            await subscription.close()
+
+    return sse_response(stream())
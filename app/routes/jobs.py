@@ -1,15 +1,25 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request
 from typing import List, Optional
 from app.models.job import JobCreate, JobUpdate, Job, JobResponse, JobStatus
 from app.utils.auth import get_current_recruiter, get_current_user
 from app.database import get_database
 from app.utils.helpers import generate_id
+from app.utils.cache import (
+    cache_service, cached_response, dumps_json, invalidate_job, invalidate_recruiter_dashboard,
+    job_detail_key, CachedBody, JOBS_NAMESPACE
+)
+from app.utils.assessment_snapshot import get_candidate_snapshot
+from app.utils.serialization import fast_response, from_db, parse_fields, projection
 from datetime import datetime, timezone
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 security = HTTPBearer(auto_error=False)  # Make auth optional
 
+# Public catalog responses may be stored by browsers/nginx but must be revalidated
+PUBLIC_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
 
 async def get_optional_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)):
     """Get current user if authenticated, None otherwise"""
@@ -46,20 +56,28 @@ async def create_job(job_data: JobCreate, current_user=Depends(get_current_recru
     })
     
     await db.jobs.insert_one(job_dict)
+    await invalidate_job(job_dict["_id"])
+    await invalidate_recruiter_dashboard(user["_id"])
     
     return Job(**job_dict)
 
 
 @router.get("", response_model=List[Job])
 async def list_jobs(
+    request: Request,
     status: str = None,
     job_type: str = None,
     skip: int = 0,
     limit: int = 20,
+    fields: Optional[str] = None,
     current_user=Depends(get_optional_current_user)
 ):
-    """List all jobs (filtered for candidates, all for recruiters)"""
+    """List all jobs (filtered for candidates, all for recruiters).
+
+    `fields` is a comma-separated list of fields to return (default: all).
+    """
     db = get_database()
+    selected = parse_fields(fields, Job)
     
     query = {}
     
@@ -82,26 +100,56 @@ async def list_jobs(
     if job_type:
         query["job_type"] = job_type
     
-    jobs = await db.jobs.find(query).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
-    
-    return [Job(**job) for job in jobs]
+    # The public catalog (active jobs, no company filter) is shared by everyone
+    if query.get("status") == JobStatus.ACTIVE.value and "company_id" not in query:
+        version = await cache_service.namespace_version(JOBS_NAMESPACE)
+        cache_key = f"jobs:list:v{version}:{job_type}:{skip}:{limit}:{selected and ','.join(selected)}"
+        
+        async def fetch():
+            jobs = await db.jobs.find(query, projection(selected)).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
+            return CachedBody(dumps_json([from_db(Job, job, selected) for job in jobs]))
+        
+        entry = await cache_service.get_or_fetch(cache_key, fetch)
+        return cached_response(request, entry, PUBLIC_CACHE_CONTROL)
+    
+    jobs = await db.jobs.find(query, projection(selected)).sort("created_at", -1).skip(skip).limit(limit).to_list(limit)
+    
+    return fast_response(Job, jobs, fields=selected)
 
 
 @router.get("/{job_id}", response_model=Job)
-async def get_job(job_id: str, current_user=Depends(get_optional_current_user)):
-    """Get job details"""
+async def get_job(
+    job_id: str,
+    request: Request,
+    fields: Optional[str] = None,
+    current_user=Depends(get_optional_current_user)
+):
+    """Get job details (`fields` selects a subset of fields)"""
     db = get_database()
+    selected = parse_fields(fields, Job)
     
-    job = await db.jobs.find_one({"_id": job_id})
-    if not job:
+    # Versioned like the catalog, so a fill racing an update is written under the old version
+    version = await cache_service.namespace_version(JOBS_NAMESPACE)
+    cache_key = job_detail_key(job_id, version, ",".join(selected) if selected else "*")
+    
+    async def fetch():
+        job = await db.jobs.find_one({"_id": job_id}, projection(selected, "status"))
+        if not job:
+            return None
+        return CachedBody(dumps_json(from_db(Job, job, selected)), {"status": job.get("status")})
+    
+    entry = await cache_service.get_or_fetch(cache_key, fetch)
+    if entry is None:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    is_active = entry.meta.get("status") == JobStatus.ACTIVE.value
+    
     # If not authenticated or candidate, only show active jobs
     if not current_user or current_user.user_type == "candidate":
-        if job.get("status") != JobStatus.ACTIVE.value:
+        if not is_active:
             raise HTTPException(status_code=404, detail="Job not found")
     
-    return Job(**job)
+    return cached_response(request, entry, PUBLIC_CACHE_CONTROL if is_active else PRIVATE_CACHE_CONTROL)
 
 
 @router.put("/{job_id}", response_model=Job)
@@ -126,6 +174,8 @@ async def update_job(
     update_data["updated_at"] = datetime.now(timezone.utc)
     
     await db.jobs.update_one({"_id": job_id}, {"$set": update_data})
+    await invalidate_job(job_id)
+    await invalidate_recruiter_dashboard(user["_id"])
     
     updated_job = await db.jobs.find_one({"_id": job_id})
     return Job(**updated_job)
@@ -143,6 +193,8 @@ async def delete_job(job_id: str, current_user=Depends(get_current_recruiter)):
         raise HTTPException(status_code=404, detail="Job not found")
     
     await db.jobs.delete_one({"_id": job_id})
+    await invalidate_job(job_id)
+    await invalidate_recruiter_dashboard(user["_id"])
     
     return None
 
@@ -169,6 +221,11 @@ async def publish_job(job_id: str, current_user=Depends(get_current_recruiter)):
         {"_id": job_id},
         {"$set": {"status": JobStatus.ACTIVE.value, "updated_at": datetime.now(timezone.utc)}}
     )
+    await invalidate_job(job_id)
+    await invalidate_recruiter_dashboard(user["_id"])
+    
+    # Compile the candidate snapshot now rather than on the first exam start
+    await get_candidate_snapshot(db, job_id=job_id)
     
     updated_job = await db.jobs.find_one({"_id": job_id})
     return Job(**updated_job)
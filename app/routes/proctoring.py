@@ -0,0 +1,75 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from app.models.proctoring import ProctoringEventBatch, ProctoringSummary
+from app.utils.auth import get_current_candidate, get_current_recruiter
+from app.database import get_database
+from app.utils.autosave import autosave_service
+from app.utils.cache import cache_service, cached_response, dumps_json, CachedBody
+from app.utils.proctoring import proctoring_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/proctoring", tags=["Proctoring"])
+
+# Events keep arriving while an attempt is in progress
+SUMMARY_TTL_SECONDS = 15
+
+
+@router.post("/events/{application_id}", status_code=status.HTTP_202_ACCEPTED)
+async def ingest_events(
+    application_id: str,
+    batch: ProctoringEventBatch,
+    current_user=Depends(get_current_candidate)
+):
+    """Record a batch of client-side proctoring events for an attempt"""
+    db = get_database()
+
+    # The attempt registered by the session endpoint authorizes without MongoDB reads
+    try:
+        owner, candidate_id = await autosave_service.attempt(application_id)
+    except Exception as e:
+        logger.warning(f"Attempt lookup failed for {application_id}: {e}")
+        owner, candidate_id = None, None
+
+    if owner != current_user.email or not candidate_id:
+        user = await db.users.find_one({"email": current_user.email}, {"_id": 1})
+        application = await db.applications.find_one(
+            {"_id": application_id, "candidate_id": user["_id"]},
+            {"status": 1}
+        )
+        if not application:
+            raise HTTPException(status_code=404, detail="Application not found")
+        if application["status"] != "assessment_pending":
+            raise HTTPException(status_code=409, detail="Assessment is not in progress")
+        candidate_id = user["_id"]
+
+    accepted = await proctoring_service.ingest(
+        db, application_id, candidate_id, [event.model_dump() for event in batch.events]
+    )
+    return {"accepted": accepted}
+
+
+@router.get("/summary/{application_id}", response_model=ProctoringSummary)
+async def get_proctoring_summary(
+    application_id: str,
+    request: Request,
+    current_user=Depends(get_current_recruiter)
+):
+    """Violation timeline for one attempt (recruiters of the job only)"""
+    db = get_database()
+
+    user = await db.users.find_one({"email": current_user.email}, {"_id": 1})
+    application = await db.applications.find_one({"_id": application_id}, {"job_id": 1})
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+    job = await db.jobs.find_one({"_id": application["job_id"], "company_id": user["_id"]}, {"_id": 1})
+    if not job:
+        raise HTTPException(status_code=403, detail="Access denied")
+
+    async def fetch():
+        return CachedBody(dumps_json(await proctoring_service.summarize(db, application_id)))
+
+    entry = await cache_service.get_or_fetch(
+        f"proctoring:summary:{application_id}", fetch, ttl=SUMMARY_TTL_SECONDS
+    )
+    return cached_response(request, entry, "private, no-cache")
@@ -1,22 +1,40 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from typing import List, Optional
+from pymongo import UpdateOne
 from app.models.result import Result
 from app.utils.auth import get_current_user, get_current_recruiter
+from app.utils.cache import cache_service, cached_response, dumps_json, rankings_namespace, CachedBody
+from app.utils.serialization import fast_response, parse_fields, projection
+from app.utils.events import event_hub, sse_event, sse_response
+from app.utils.evaluation_progress import TERMINAL_STATES, evaluation_channel, get_progress
+from app.config import settings
 from app.database import get_database
 
 router = APIRouter(prefix="/results", tags=["Results"])
 
+# What the recruiter candidates table renders; pass fields=* for full results
+RANKINGS_DEFAULT_FIELDS = (
+    "application_id,candidate_id,percentage,total_score,max_score,is_shortlisted,"
+    "evaluated_at,feedback_report.skill_scores,ai_reasoning.confidence_score"
+)
+RANKINGS_EXTRA_FIELDS = ("rank", "total_candidates", "candidate_name", "candidate_email")
+
 
 @router.get("/application/{application_id}", response_model=Result)
 async def get_result_by_application(
     application_id: str,
+    fields: Optional[str] = None,
     current_user=Depends(get_current_user)
 ):
-    """Get result for an application"""
+    """Get result for an application (`fields` selects a subset of fields)"""
     db = get_database()
+    selected = parse_fields(fields, Result)
     
     # Get application
-    application = await db.applications.find_one({"_id": application_id})
+    application = await db.applications.find_one(
+        {"_id": application_id},
+        {"candidate_id": 1, "job_id": 1}
+    )
     if not application:
         raise HTTPException(status_code=404, detail="Application not found")
     
@@ -32,72 +50,165 @@ async def get_result_by_application(
             raise HTTPException(status_code=403, detail="Access denied")
     
     # Get result
-    result = await db.results.find_one({"application_id": application_id})
+    result = await db.results.find_one({"application_id": application_id}, projection(selected))
     if not result:
         raise HTTPException(
             status_code=404,
             detail="Result not yet available. Assessment is being evaluated."
         )
     
-    return Result(**result)
+    return fast_response(Result, result, fields=selected)
+
+
+@router.get("/application/{application_id}/events")
+async def stream_evaluation_progress(application_id: str, current_user=Depends(get_current_user)):
+    """Server-Sent Events stream of evaluation progress for the candidate's application.
+
+    Sends the current state first, then each step until the result is final.
+    """
+    db = get_database()
+    
+    user = await db.users.find_one({"email": current_user.email}, {"_id": 1})
+    application = await db.applications.find_one(
+        {"_id": application_id, "candidate_id": user["_id"]},
+        {"status": 1}
+    )
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    # Subscribe before reading the current state so no step is missed in between
+    subscription = await event_hub.subscribe(evaluation_channel(application_id))
+    
+    async def stream():
+        try:
+            current = await get_progress(application_id)
+            if current is None:
+                result = await db.results.find_one({"application_id": application_id}, {"percentage": 1})
+                if result:
+                    current = {"type": "evaluation", "state": "final", "result_id": result["_id"], "percentage": result["percentage"]}
+                elif application["status"] == "assessment_completed":
+                    current = {"type": "evaluation", "state": "queued"}
+                else:
+                    current = {"type": "evaluation", "state": "not_submitted"}
+            yield sse_event(current, "evaluation")
+            if current["state"] in TERMINAL_STATES or current["state"] == "not_submitted":
+                return
+            
+            while True:
+                event = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield sse_event(event, event["type"])
+                if event["type"] == "reset" or event.get("state") in TERMINAL_STATES:
+                    return
+        finally:
+            await subscription.close()
+    
+    return sse_response(stream())
 
 
 @router.get("/job/{job_id}/rankings")
 async def get_job_rankings(
     job_id: str,
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    fields: str = RANKINGS_DEFAULT_FIELDS,
     current_user=Depends(get_current_recruiter)
 ):
-    """Get ranked results for a job with candidate names"""
+    """Get ranked results for a job with candidate names.
+
+    Returns the slim table view by default; `fields=*` returns full results.
+    """
     db = get_database()
+    selected = parse_fields(fields, Result, extra=RANKINGS_EXTRA_FIELDS)
     
     # Verify job belongs to recruiter
     user = await db.users.find_one({"email": current_user.email})
-    job = await db.jobs.find_one({"_id": job_id, "company_id": user["_id"]})
+    job = await db.jobs.find_one({"_id": job_id, "company_id": user["_id"]}, {"_id": 1})
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    # Get all applications for this job
-    applications = await db.applications.find({"job_id": job_id}).to_list(None)
+    # Identical concurrent page loads share one ranking computation
+    version = await cache_service.namespace_version(rankings_namespace(job_id))
+    cache_key = f"rankings:{job_id}:v{version}:{skip}:{limit}:{selected and ','.join(selected)}"
+    
+    async def fetch():
+        return CachedBody(dumps_json(await _compute_rankings(db, job_id, skip, limit, selected)))
+    
+    entry = await cache_service.get_or_fetch(cache_key, fetch)
+    return cached_response(request, entry, "private, no-cache")
+
+
+async def _compute_rankings(db, job_id: str, skip: int, limit: int, fields: Optional[tuple] = None) -> list:
+    """Rank one page of results (runs once per cache fill)"""
+    # Get all applications for this job (ids only)
+    applications = await db.applications.find({"job_id": job_id}, {"_id": 1}).to_list(None)
     application_ids = [app["_id"] for app in applications]
     
-    # Get results and sort by percentage
+    # Get results and sort by percentage, decoding only the selected fields
+    result_fields = None
+    if fields is not None:
+        result_fields = tuple(f for f in fields if f.split(".")[0] not in RANKINGS_EXTRA_FIELDS)
     results = await db.results.find(
-        {"application_id": {"$in": application_ids}}
+        {"application_id": {"$in": application_ids}},
+        projection(result_fields, "candidate_id")
     ).sort("percentage", -1).skip(skip).limit(limit).to_list(limit)
     
-    # Add rank and fetch candidate names
+    # Fetch candidate names in one query
+    candidate_ids = list({result["candidate_id"] for result in results})
+    candidates = {
+        candidate["_id"]: candidate
+        for candidate in await db.users.find(
+            {"_id": {"$in": candidate_ids}},
+            {"full_name": 1, "name": 1, "email": 1}
+        ).to_list(None)
+    }
+    
+    # Add rank and candidate names
     for idx, result in enumerate(results, start=skip + 1):
         result["rank"] = idx
         result["total_candidates"] = len(application_ids)
         
-        # Fetch candidate name
-        candidate = await db.users.find_one({"_id": result["candidate_id"]})
+        candidate = candidates.get(result["candidate_id"])
         if candidate:
-            result["candidate_name"] = candidate.get("name", "Unknown")
+            result["candidate_name"] = candidate.get("full_name") or candidate.get("name", "Unknown")
             result["candidate_email"] = candidate.get("email", "")
         else:
             result["candidate_name"] = "Unknown"
             result["candidate_email"] = ""
     
     # Update ranks in database
-    for result in results:
-        await db.results.update_one(
-            {"_id": result["_id"]},
-            {"$set": {"rank": result["rank"], "total_candidates": result["total_candidates"]}}
-        )
+    if results:
+        await db.results.bulk_write([
+            UpdateOne(
+                {"_id": result["_id"]},
+                {"$set": {"rank": result["rank"], "total_candidates": result["total_candidates"]}}
+            )
+            for result in results
+        ], ordered=False)
+    
+    if fields is not None:
+        # Rank and candidate details are always part of a rankings row
+        tops = {f.split(".")[0] for f in fields} | set(RANKINGS_EXTRA_FIELDS)
+        results = [{k: v for k, v in result.items() if k in tops} for result in results]
     
     # Convert to dict for JSON response (bypass Pydantic model)
     return results
 
 
 @router.get("/{result_id}", response_model=Result)
-async def get_result(result_id: str, current_user=Depends(get_current_user)):
-    """Get specific result"""
+async def get_result(
+    result_id: str,
+    fields: Optional[str] = None,
+    current_user=Depends(get_current_user)
+):
+    """Get specific result (`fields` selects a subset of fields)"""
     db = get_database()
+    selected = parse_fields(fields, Result)
     
-    result = await db.results.find_one({"_id": result_id})
+    result = await db.results.find_one({"_id": result_id}, projection(selected, "candidate_id", "application_id"))
     if not result:
         raise HTTPException(status_code=404, detail="Result not found")
     
@@ -114,4 +225,4 @@ async def get_result(result_id: str, current_user=Depends(get_current_user)):
             if not job:
                 raise HTTPException(status_code=403, detail="Access denied")
     
-    return Result(**result)
+    return fast_response(Result, result, fields=selected)
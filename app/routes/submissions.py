@@ -1,10 +1,21 @@
-from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
-from app.models.submission import SubmissionCreate, Submission
+from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks, Response
+from pymongo import ReturnDocument
+from app.models.application import Application
+from app.models.submission import SubmissionCreate, Submission, Answer, DraftPatch
 from app.utils.auth import get_current_candidate
 from app.database import get_database
 from app.utils.helpers import generate_id
-from app.celery_worker import evaluate_submission_task
-from datetime import datetime
+from app.utils.cache import invalidate_application_views
+from app.utils.assessment_snapshot import get_candidate_snapshot
+from app.utils.autosave import autosave_service
+from app.utils.evaluation_progress import publish_progress
+from app.utils.recruiter_events import notify_company
+from app.utils.serialization import dumps, fast_response, from_db, loads
+from app.utils.task_queue import estimate_seconds, queue_evaluation, queue_stats
+from datetime import datetime, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/submissions", tags=["Submissions"])
 
@@ -42,11 +53,26 @@ async def submit_assessment(
     if not assessment:
         raise HTTPException(status_code=404, detail="Assessment not found")
     
+    # Use the autosaved draft unless the client sent the full answer set
+    if submission_data.answers is not None:
+        answers = [answer.model_dump() for answer in submission_data.answers]
+    else:
+        draft = await autosave_service.collect(db, submission_data.application_id)
+        answers = []
+        for question in assessment["questions"]:
+            answer = draft.get(question["question_id"]) or {
+                "question_id": question["question_id"],
+                "question_type": question["type"],
+                "time_spent_seconds": 0
+            }
+            answer.pop("seq", None)
+            answers.append(Answer(**answer).model_dump())
+    
     # Calculate total time
     if application.get("assessment_started_at"):
         total_time = int((datetime.utcnow() - application["assessment_started_at"]).total_seconds())
     else:
-        total_time = sum(answer.time_spent_seconds for answer in submission_data.answers)
+        total_time = sum(answer["time_spent_seconds"] for answer in answers)
     
     # Create submission
     submission_dict = {
@@ -54,7 +80,7 @@ async def submit_assessment(
         "application_id": submission_data.application_id,
         "assessment_id": submission_data.assessment_id,
         "candidate_id": user["_id"],
-        "answers": [answer.model_dump() for answer in submission_data.answers],
+        "answers": answers,
         "started_at": application.get("assessment_started_at", datetime.utcnow()),
         "submitted_at": datetime.utcnow(),
         "total_time_seconds": total_time,
@@ -62,6 +88,7 @@ async def submit_assessment(
     }
     
     await db.submissions.insert_one(submission_dict)
+    await autosave_service.discard(db, submission_data.application_id)
     
     # Update application status
     await db.applications.update_one(
@@ -74,11 +101,28 @@ async def submit_assessment(
             }
         }
     )
+    job = await db.jobs.find_one({"_id": application["job_id"]}, {"company_id": 1, "shortlist_deadline": 1})
+    await invalidate_application_views(user["_id"], job["company_id"] if job else None)
+    await notify_company(
+        job["company_id"] if job else None,
+        "application.submitted",
+        application["job_id"],
+        submission_data.application_id,
+        funnel={"assessment_completed": 1, "pending_evaluations": 1},
+        status="assessment_completed",
+        previous_status=application["status"]
+    )
     
-    # Trigger async evaluation
-    evaluate_submission_task.delay(submission_dict["_id"])
+    # Trigger async evaluation: through the company's fair-share lane (see app/utils/fair_queue.py),
+    # published off the event loop (see app/utils/task_queue.py)
+    position = await queue_evaluation(db, job, submission_dict["_id"])
+    stats = await queue_stats(db)
+    eta_seconds = stats["eta_seconds"] if position is None else estimate_seconds(
+        position, stats["evaluations_per_minute"] / 60
+    )
+    await publish_progress(submission_data.application_id, "queued", eta_seconds=eta_seconds)
     
-    return Submission(**submission_dict)
+    return Submission(**submission_dict, evaluation_eta_seconds=eta_seconds)
 
 
 @router.post("/start/{application_id}")
@@ -106,10 +150,154 @@ async def start_assessment(application_id: str, current_user=Depends(get_current
             }
         }
     )
+    job = await db.jobs.find_one({"_id": application["job_id"]}, {"company_id": 1})
+    await invalidate_application_views(user["_id"], job["company_id"] if job else None)
+    await notify_company(
+        job["company_id"] if job else None,
+        "application.started",
+        application["job_id"],
+        application_id,
+        funnel={} if application.get("assessment_started_at") else {"assessment_started": 1},
+        status="assessment_pending",
+        previous_status=application["status"]
+    )
     
     return {"message": "Assessment started", "started_at": datetime.utcnow()}
 
 
+@router.post("/session/{application_id}")
+async def start_assessment_session(application_id: str, current_user=Depends(get_current_candidate)):
+    """Start (or resume) an assessment attempt in one round-trip.
+
+    Returns the application, the candidate-safe assessment, the server-side
+    deadline and resume state. The start time is set once, so reloading the
+    exam page resumes the same attempt instead of restarting its clock.
+    """
+    db = get_database()
+    
+    user = await db.users.find_one({"email": current_user.email}, {"_id": 1})
+    
+    current = await db.applications.find_one(
+        {"_id": application_id, "candidate_id": user["_id"]},
+        {"job_id": 1}
+    )
+    if not current:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    # Before the clock starts: a missing assessment mustn't leave a running attempt behind
+    snapshot = await get_candidate_snapshot(db, job_id=current["job_id"])
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="Assessment not found")
+    
+    now = datetime.utcnow()
+    previous = await db.applications.find_one_and_update(
+        {
+            "_id": application_id,
+            "candidate_id": user["_id"],
+            "status": {"$in": ["applied", "assessment_pending"]}
+        },
+        [{
+            "$set": {
+                "status": "assessment_pending",
+                "assessment_started_at": {"$ifNull": ["$assessment_started_at", now]},
+                "updated_at": now
+            }
+        }],
+        return_document=ReturnDocument.BEFORE
+    )
+    if not previous:
+        if await db.submissions.find_one({"application_id": application_id, "is_practice": False}, {"_id": 1}):
+            raise HTTPException(status_code=409, detail="Assessment already submitted")
+        current = await db.applications.find_one({"_id": application_id}, {"status": 1}) or {}
+        raise HTTPException(
+            status_code=400,
+            detail=f"Assessment is not open for this application (status: {current.get('status')})"
+        )
+    
+    resumed = previous.get("assessment_started_at") is not None
+    started_at = previous["assessment_started_at"] if resumed else now
+    application = {
+        **previous,
+        "status": "assessment_pending",
+        "assessment_started_at": started_at,
+        "updated_at": now
+    }
+    
+    if not resumed:
+        job = await db.jobs.find_one({"_id": application["job_id"]}, {"company_id": 1})
+        await invalidate_application_views(user["_id"], job["company_id"] if job else None)
+        await notify_company(
+            job["company_id"] if job else None,
+            "application.started",
+            application["job_id"],
+            application_id,
+            funnel={"assessment_started": 1},
+            status="assessment_pending",
+            previous_status=previous["status"]
+        )
+    
+    # Authorize autosave patches for this attempt; a resumed attempt gets its draft back
+    await autosave_service.open(application_id, current_user.email, user["_id"])
+    answers = await autosave_service.collect(db, application_id) if resumed else {}
+    
+    duration_minutes = snapshot.meta.get("duration_minutes")
+    if duration_minutes is None:
+        duration_minutes = loads(snapshot.body)["config"]["duration_minutes"]
+    deadline = started_at + timedelta(minutes=duration_minutes)
+    
+    session = {
+        "started_at": started_at,
+        "deadline": deadline,
+        "server_time": now,
+        "remaining_seconds": max(0, int((deadline - now).total_seconds())),
+        "resumed": resumed,
+        "answers": answers
+    }
+    
+    # The snapshot is already serialized; splice its bytes in rather than re-encoding
+    body = b"".join([
+        b'{"application":', dumps(from_db(Application, application)),
+        b',"assessment":', snapshot.body,
+        b',"session":', dumps(session),
+        b"}"
+    ])
+    return Response(content=body, media_type="application/json", headers={"Cache-Control": "no-store"})
+
+
+@router.put("/draft/{application_id}")
+async def save_draft(application_id: str, draft: DraftPatch, current_user=Depends(get_current_candidate)):
+    """Autosave answer patches for an in-progress attempt"""
+    patches = [patch.model_dump() for patch in draft.patches]
+    
+    redis_available = True
+    try:
+        accepted = await autosave_service.save_patches(application_id, current_user.email, patches)
+    except Exception as e:
+        logger.warning(f"Autosave via Redis failed for {application_id}, writing to MongoDB: {e}")
+        accepted, redis_available = None, False
+    if accepted is not None:
+        return {"accepted": accepted}
+    
+    # Attempt not registered (or Redis down): verify it against MongoDB
+    db = get_database()
+    user = await db.users.find_one({"email": current_user.email}, {"_id": 1})
+    application = await db.applications.find_one(
+        {"_id": application_id, "candidate_id": user["_id"]},
+        {"status": 1}
+    )
+    if not application:
+        raise HTTPException(status_code=404, detail="Application not found")
+    if application["status"] != "assessment_pending":
+        raise HTTPException(status_code=409, detail="Assessment is not in progress")
+    
+    if not redis_available:
+        return {"accepted": await autosave_service.save_direct(db, application_id, user["_id"], patches)}
+    
+    await autosave_service.open(application_id, current_user.email, user["_id"])
+    accepted = await autosave_service.save_patches(application_id, current_user.email, patches)
+    return {"accepted": accepted or 0}
+
+
 @router.get("/{submission_id}", response_model=Submission)
 async def get_submission(submission_id: str, current_user=Depends(get_current_candidate)):
     """Get submission details"""
@@ -124,4 +312,4 @@ async def get_submission(submission_id: str, current_user=Depends(get_current_ca
     if not submission:
         raise HTTPException(status_code=404, detail="Submission not found")
     
-    return Submission(**submission)
+    return fast_response(Submission, submission)
@@ -0,0 +1,65 @@
+"""
+Candidate-safe assessment snapshots
+
+Each published assessment is compiled once into pre-serialized JSON with
+answer keys and hidden test cases stripped, then served from the cache as
+raw bytes. Snapshots are keyed by job and by assessment id, not by
+version (knowing the version would take a MongoDB read per request): they
+expire after ASSESSMENT_SNAPSHOT_TTL_SECONDS, and whatever creates or
+changes an assessment (bumping its version) must call
+invalidate_assessment_snapshot. The version is in each snapshot's meta.
+"""
+
+from app.models.assessment import CandidateAssessment
+from app.utils.cache import cache_service, dumps_json, CachedBody
+from app.config import settings
+from typing import Optional
+
+
+def snapshot_key_for_job(job_id: str) -> str:
+    return f"assessments:snapshot:job:{job_id}"
+
+
+def snapshot_key(assessment_id: str) -> str:
+    return f"assessments:snapshot:{assessment_id}"
+
+
+def compile_candidate_snapshot(assessment: dict) -> CachedBody:
+    """Strip answer keys/hidden tests and serialize once"""
+    questions = []
+    for question in assessment["questions"]:
+        question = {k: v for k, v in question.items() if k not in ("correct_option_id", "ai_rationale")}
+        if question.get("test_cases"):
+            question["test_cases"] = [tc for tc in question["test_cases"] if not tc.get("is_hidden")]
+        questions.append(question)
+
+    snapshot = CandidateAssessment(**{**assessment, "questions": questions})
+    body = dumps_json(snapshot.model_dump(by_alias=True))
+
+    return CachedBody(body, {
+        "assessment_id": assessment["_id"],
+        "job_id": assessment["job_id"],
+        "version": snapshot.version,
+        "duration_minutes": snapshot.config.duration_minutes
+    })
+
+
+async def get_candidate_snapshot(db, job_id: str = None, assessment_id: str = None) -> Optional[CachedBody]:
+    """Get the snapshot by job or assessment id, compiling it on first use"""
+    cache_key = snapshot_key_for_job(job_id) if job_id else snapshot_key(assessment_id)
+    query = {"job_id": job_id} if job_id else {"_id": assessment_id}
+
+    async def fetch():
+        assessment = await db.assessments.find_one(query)
+        return compile_candidate_snapshot(assessment) if assessment else None
+
+    return await cache_service.get_or_fetch(cache_key, fetch, ttl=settings.ASSESSMENT_SNAPSHOT_TTL_SECONDS)
+
+
+async def invalidate_assessment_snapshot(assessment_id: str, job_id: str):
+    """Call whenever an assessment is created or its content (and version) changes"""
+    await cache_service.delete(snapshot_key(assessment_id), snapshot_key_for_job(job_id))
+
+
+def snapshot_cache_control() -> str:
+    return f"private, max-age={settings.ASSESSMENT_SNAPSHOT_MAX_AGE}"
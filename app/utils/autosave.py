@@ -0,0 +1,205 @@
+"""
+Answer autosave
+
+Candidates send small per-question patches while taking an assessment.
+Patches land in a Redis hash per attempt (a newer seq replaces an older
+one, so repeated edits coalesce) and the attempt is marked dirty. A
+flusher in each web worker writes at most AUTOSAVE_FLUSH_BATCH dirty
+drafts to the answer_drafts collection per AUTOSAVE_FLUSH_INTERVAL_SECONDS
+with one bulk_write, so MongoDB write load is bounded no matter how often
+candidates type. The exam page submits its full answer set; a submit
+without answers falls back to the draft (which also restores a resumed
+attempt after a crash or reload).
+
+If Redis is unavailable, patches are written straight to MongoDB.
+"""
+
+from pymongo import UpdateOne
+from app.redis_client import get_redis
+from app.database import get_database
+from app.utils.periodic import PeriodicTask
+from app.utils.serialization import dumps, loads
+from app.config import settings
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DIRTY_KEY = "autosave:dirty"
+
+# ARGV: owner, ttl, application id, then (question id, seq, answer json) triples
+PATCH_SCRIPT = """
+if redis.call('HGET', KEYS[1], '_owner') ~= ARGV[1] then
+    return -1
+end
+local accepted = 0
+for i = 4, #ARGV, 3 do
+    local current = redis.call('HGET', KEYS[1], 's:' .. ARGV[i])
+    if not current or tonumber(ARGV[i + 1]) > tonumber(current) then
+        redis.call('HSET', KEYS[1], 's:' .. ARGV[i], ARGV[i + 1], 'a:' .. ARGV[i], ARGV[i + 2])
+        accepted = accepted + 1
+    end
+end
+if accepted > 0 then
+    redis.call('SADD', KEYS[2], ARGV[3])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return accepted
+"""
+
+
+def draft_key(application_id: str) -> str:
+    return f"autosave:draft:{application_id}"
+
+
+def _merge_stage(answers: Dict[str, Dict[str, Any]], candidate_id: Optional[str], now: datetime) -> List[dict]:
+    """Update pipeline that keeps, per question, whichever answer has the higher seq.
+
+    Guarding on seq makes concurrent flushers (and the direct-write fallback)
+    safe: an older write landing late is a no-op.
+    """
+    fields = {
+        f"answers.{question_id}": {
+            "$cond": [
+                {"$gt": [answer["seq"], {"$ifNull": [f"$answers.{question_id}.seq", -1]}]},
+                {"$literal": answer},
+                f"$answers.{question_id}"
+            ]
+        }
+        for question_id, answer in answers.items()
+    }
+    fields["updated_at"] = now
+    if candidate_id:
+        fields["candidate_id"] = candidate_id
+    return [{"$set": fields}]
+
+
+class AutosaveService:
+    def __init__(self):
+        self.flusher = PeriodicTask(
+            "autosave flush",
+            settings.AUTOSAVE_FLUSH_INTERVAL_SECONDS,
+            lambda: self.flush(get_database())
+        )
+
+    async def open(self, application_id: str, owner_email: str, candidate_id: str):
+        """Register an attempt so patches can be authorized from Redis alone"""
+        try:
+            key = draft_key(application_id)
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping={"_owner": owner_email, "_candidate": candidate_id})
+                pipe.expire(key, settings.AUTOSAVE_DRAFT_TTL_SECONDS)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Autosave registration failed for {application_id}: {e}")
+
+    async def attempt(self, application_id: str) -> Tuple[Optional[str], Optional[str]]:
+        """(owner email, candidate id) of a registered attempt; raises on Redis errors"""
+        owner, candidate_id = await get_redis().hmget(draft_key(application_id), "_owner", "_candidate")
+        if owner is None:
+            return None, None
+        return owner.decode(), candidate_id.decode() if candidate_id else None
+
+    async def save_patches(self, application_id: str, owner_email: str, patches: List[Dict[str, Any]]) -> Optional[int]:
+        """Coalesce patches into the Redis draft.
+
+        Returns the number of patches accepted, or None when the attempt is
+        not registered (the caller verifies it and calls open()).
+        Raises on Redis errors so the caller can fall back to save_direct().
+        """
+        args = [owner_email, settings.AUTOSAVE_DRAFT_TTL_SECONDS, application_id]
+        for patch in patches:
+            args.extend([patch["question_id"], patch["seq"], dumps(patch)])
+
+        redis = get_redis()
+        accepted = await redis.eval(PATCH_SCRIPT, 2, draft_key(application_id), DIRTY_KEY, *args)
+        return None if accepted == -1 else accepted
+
+    async def save_direct(self, db, application_id: str, candidate_id: str, patches: List[Dict[str, Any]]) -> int:
+        """Write patches straight to MongoDB (used when Redis is unavailable)"""
+        answers = {}
+        for patch in patches:
+            if patch["seq"] > answers.get(patch["question_id"], {}).get("seq", -1):
+                answers[patch["question_id"]] = patch
+        await db.answer_drafts.update_one(
+            {"_id": application_id},
+            _merge_stage(answers, candidate_id, datetime.utcnow()),
+            upsert=True
+        )
+        return len(patches)
+
+    async def flush(self, db, limit: int = None) -> int:
+        """Write up to `limit` dirty drafts to MongoDB in one bulk_write"""
+        redis = get_redis()
+        application_ids = await redis.spop(DIRTY_KEY, limit or settings.AUTOSAVE_FLUSH_BATCH)
+        if not application_ids:
+            return 0
+        application_ids = [a.decode() if isinstance(a, bytes) else a for a in application_ids]
+
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                for application_id in application_ids:
+                    pipe.hgetall(draft_key(application_id))
+                drafts = await pipe.execute()
+
+            now = datetime.utcnow()
+            operations = []
+            for application_id, draft in zip(application_ids, drafts):
+                answers, candidate_id = self._parse_draft(draft)
+                if answers:
+                    operations.append(UpdateOne(
+                        {"_id": application_id},
+                        _merge_stage(answers, candidate_id, now),
+                        upsert=True
+                    ))
+            if operations:
+                await db.answer_drafts.bulk_write(operations, ordered=False)
+        except Exception:
+            # Put them back so the next flush retries
+            await redis.sadd(DIRTY_KEY, *application_ids)
+            raise
+
+        return len(application_ids)
+
+    async def collect(self, db, application_id: str) -> Dict[str, Dict[str, Any]]:
+        """Current draft answers by question id (Redis merged over MongoDB, higher seq wins)"""
+        stored = await db.answer_drafts.find_one({"_id": application_id}, {"answers": 1})
+        answers = dict(stored.get("answers", {})) if stored else {}
+
+        try:
+            draft = await get_redis().hgetall(draft_key(application_id))
+        except Exception as e:
+            logger.warning(f"Autosave read failed for {application_id}: {e}")
+            draft = {}
+
+        for question_id, answer in self._parse_draft(draft)[0].items():
+            if answer["seq"] > answers.get(question_id, {}).get("seq", -1):
+                answers[question_id] = answer
+        return answers
+
+    async def discard(self, db, application_id: str):
+        """Drop an attempt's draft once its submission exists"""
+        try:
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.delete(draft_key(application_id))
+                pipe.srem(DIRTY_KEY, application_id)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Autosave cleanup failed for {application_id}: {e}")
+        await db.answer_drafts.delete_one({"_id": application_id})
+
+    @staticmethod
+    def _parse_draft(draft: Dict[bytes, bytes]):
+        answers, candidate_id = {}, None
+        for field, value in draft.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            if field.startswith("a:"):
+                answers[field[2:]] = loads(value)
+            elif field == "_candidate":
+                candidate_id = value.decode() if isinstance(value, bytes) else value
+        return answers, candidate_id
+
+
+# Create singleton instance
+autosave_service = AutosaveService()
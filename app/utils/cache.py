@@ -0,0 +1,291 @@
+"""
+Two-tier response cache
+
+A small in-process tier (short TTL, per worker) sits in front of Redis
+(shared across workers). Cache failures never fail a request: a Redis
+error is logged and treated as a miss, so the caller falls back to MongoDB.
+
+get_or_fetch adds single-flight misses and stale-while-revalidate: an
+expired entry keeps being served for CACHE_STALE_TTL_SECONDS while one
+background refresh runs.
+
+Keys that must not outlive an invalidation carry a namespace version read
+before the fetch (job listings and details, rankings): a fill that raced
+a change is written under the old version, which nothing reads any more.
+"""
+
+from fastapi import Request, Response
+from app.redis_client import get_redis
+from app.utils.singleflight import single_flight
+from app.utils.serialization import dumps, loads
+from app.config import settings
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+JOBS_NAMESPACE = "jobs"
+
+
+def candidate_dashboard_key(candidate_id: str) -> str:
+    return f"dashboard:candidate:{candidate_id}"
+
+
+def recruiter_dashboard_key(company_id: str) -> str:
+    return f"dashboard:recruiter:{company_id}"
+
+
+def job_detail_key(job_id: str, version: int, fields: str = "*") -> str:
+    return f"jobs:detail:v{version}:{job_id}:{fields}"
+
+
+def rankings_namespace(job_id: str) -> str:
+    return f"rankings:{job_id}"
+
+
+def dumps_json(value: Any) -> bytes:
+    """Serialize a response body (compact UTF-8 JSON via orjson)"""
+    return dumps(value)
+
+
+class CachedBody:
+    """Pre-serialized response body with its strong ETag and small metadata"""
+
+    __slots__ = ("body", "etag", "meta", "stored_at")
+
+    def __init__(self, body: bytes, meta: Optional[Dict[str, Any]] = None, stored_at: float = None):
+        self.body = body
+        self.meta = meta or {}
+        self.etag = f'"{hashlib.sha256(body).hexdigest()}"'
+        self.stored_at = stored_at or time.time()
+
+    def is_fresh(self, ttl: int) -> bool:
+        return time.time() - self.stored_at < ttl
+
+    def dumps(self) -> bytes:
+        # Compact JSON never contains a raw newline, so it separates safely
+        header = json.dumps({"meta": self.meta, "stored_at": self.stored_at})
+        return header.encode("utf-8") + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "CachedBody":
+        header, body = raw.split(b"\n", 1)
+        header = json.loads(header)
+        return cls(body, header["meta"], header["stored_at"])
+
+
+class LocalCache:
+    """Per-process TTL cache with LRU eviction"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def delete(self, *keys: str):
+        for key in keys:
+            self._entries.pop(key, None)
+
+
+class CacheService:
+    def __init__(self):
+        self.local = LocalCache(settings.CACHE_LOCAL_TTL_SECONDS, settings.CACHE_LOCAL_MAX_ENTRIES)
+
+    async def get_json(self, key: str) -> Optional[Any]:
+        """Get a cached JSON value, None on miss or error"""
+        try:
+            raw = await get_redis().get(key)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            return None
+        return loads(raw) if raw is not None else None
+
+    async def set_json(self, key: str, value: Any, ttl: int = None):
+        """Cache a value as JSON"""
+        try:
+            await get_redis().set(key, dumps(value), ex=ttl or settings.CACHE_TTL_SECONDS)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+
+    async def get_body(self, key: str) -> Optional[CachedBody]:
+        """Get a pre-serialized body from the local tier, then Redis"""
+        entry = self.local.get(key)
+        if entry is not None:
+            return entry
+
+        try:
+            raw = await get_redis().get(key)
+        except Exception as e:
+            logger.warning(f"Cache read failed for {key}: {e}")
+            return None
+        if raw is None:
+            return None
+
+        try:
+            entry = CachedBody.loads(raw)
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Discarding unreadable cache entry {key}: {e}")
+            return None
+        self.local.set(key, entry)
+        return entry
+
+    async def set_body(self, key: str, entry: CachedBody, ttl: int = None):
+        """Store a pre-serialized body in both tiers (kept past ttl for stale reads)"""
+        self.local.set(key, entry)
+        expire = (ttl or settings.CACHE_TTL_SECONDS) + settings.CACHE_STALE_TTL_SECONDS
+        try:
+            await get_redis().set(key, entry.dumps(), ex=expire)
+        except Exception as e:
+            logger.warning(f"Cache write failed for {key}: {e}")
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Optional[CachedBody]]],
+        ttl: int = None
+    ) -> Optional[CachedBody]:
+        """Read-through get with single-flight misses and stale-while-revalidate.
+
+        fetch returns None for missing data, which is not cached.
+        """
+        ttl = ttl or settings.CACHE_TTL_SECONDS
+
+        entry = self.local.get(key)
+        if entry is None:
+            # Coalesce the Redis read and, on a miss, the backend fetch
+            entry = await single_flight.do(key, lambda: self._load(key, fetch, ttl))
+        elif not entry.is_fresh(ttl):
+            self._schedule_refresh(key, fetch, ttl)
+        return entry
+
+    async def _load(self, key: str, fetch, ttl: int) -> Optional[CachedBody]:
+        entry = await self.get_body(key)
+        if entry is None:
+            return await self._fetch_and_store(key, fetch, ttl)
+        if not entry.is_fresh(ttl):
+            self._schedule_refresh(key, fetch, ttl)
+        return entry
+
+    async def _fetch_and_store(self, key: str, fetch, ttl: int) -> Optional[CachedBody]:
+        entry = await fetch()
+        if entry is not None:
+            await self.set_body(key, entry, ttl=ttl)
+        return entry
+
+    def _schedule_refresh(self, key: str, fetch, ttl: int):
+        refresh_key = f"{key}#refresh"
+        if not single_flight.in_flight(refresh_key):
+            asyncio.ensure_future(self._refresh(refresh_key, key, fetch, ttl))
+
+    async def _refresh(self, refresh_key: str, key: str, fetch, ttl: int):
+        try:
+            await single_flight.do(refresh_key, lambda: self._fetch_and_store(key, fetch, ttl))
+        except Exception as e:
+            logger.warning(f"Background refresh failed for {key}: {e}")
+
+    async def namespace_version(self, namespace: str) -> int:
+        """Current generation of a key namespace; bumping it orphans old keys"""
+        local_key = f"ns:{namespace}"
+        version = self.local.get(local_key)
+        if version is not None:
+            return version
+
+        try:
+            version = int(await get_redis().get(f"cache:ns:{namespace}") or 0)
+        except Exception as e:
+            logger.warning(f"Cache namespace read failed for {namespace}: {e}")
+            return 0
+
+        self.local.set(local_key, version)
+        return version
+
+    async def bump_namespace(self, namespace: str):
+        """Invalidate every key built from the namespace version"""
+        self.local.delete(f"ns:{namespace}")
+        try:
+            version = await get_redis().incr(f"cache:ns:{namespace}")
+            self.local.set(f"ns:{namespace}", version)
+        except Exception as e:
+            logger.warning(f"Cache namespace bump failed for {namespace}: {e}")
+
+    async def delete(self, *keys: str):
+        """Drop cached keys"""
+        if not keys:
+            return
+        self.local.delete(*keys)
+        try:
+            await get_redis().delete(*keys)
+        except Exception as e:
+            logger.warning(f"Cache invalidation failed for {keys}: {e}")
+
+
+# Create singleton instance
+cache_service = CacheService()
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Check If-None-Match against an ETag (weak comparison, as compression weakens tags)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag.removeprefix("W/") in [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+def cached_response(request: Request, entry: CachedBody, cache_control: str) -> Response:
+    """Serve cached bytes, or 304 when the client already has them"""
+    headers = {"ETag": entry.etag, "Cache-Control": cache_control}
+    if etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+async def invalidate_candidate_dashboard(candidate_id: str):
+    """Call whenever one of the candidate's applications changes status"""
+    await cache_service.delete(candidate_dashboard_key(candidate_id))
+
+
+async def invalidate_recruiter_dashboard(company_id: str):
+    """Call whenever a recruiter's jobs change"""
+    await cache_service.delete(recruiter_dashboard_key(company_id))
+
+
+async def invalidate_application_views(candidate_id: str, company_id: Optional[str]):
+    """Call whenever an application changes status (both dashboards see it)"""
+    keys = [candidate_dashboard_key(candidate_id)]
+    if company_id:
+        keys.append(recruiter_dashboard_key(company_id))
+    await cache_service.delete(*keys)
+
+
+async def invalidate_job(job_id: str):
+    """Call whenever a job document changes (orphans every catalog listing and job detail)"""
+    await cache_service.bump_namespace(JOBS_NAMESPACE)
+
+
+async def invalidate_rankings(job_id: str):
+    """Call whenever a result for the job is created or changes"""
+    await cache_service.bump_namespace(rankings_namespace(job_id))
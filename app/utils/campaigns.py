@@ -0,0 +1,217 @@
+"""
+Bulk notification campaigns
+
+A recruiter notifies a job's whole cohort at once (results or assessment
+invitations). The route only records the campaign; the Celery task
+(run_campaign in celery_worker.py) calls queue_campaign, which streams the
+recipients from `applications` through an aggregation cursor and inserts
+one outbox job per recipient, CAMPAIGN_BATCH_SIZE at a time, so memory use
+doesn't grow with the cohort. The outbox sender delivers them over its
+SMTP pool like any other email, rendering each claimed batch of a
+campaign in one pass with the fields stored once on the campaign.
+
+Throttling is done by scheduling: recipient i is due at
+started_at + i / CAMPAIGN_RATE_PER_MINUTE minutes, so a drive-wide send
+trickles out instead of flooding the pool, and transactional emails (due
+immediately) don't queue behind it.
+
+Outbox job ids are "<campaign_id>:<application_id>", so a task redelivered
+after a worker crash resumes without emailing anyone twice.
+
+Progress lives on the campaign document: `recipients` grows as jobs are
+queued and the sender $incs sent / bounced / failed / deferred as it
+records outcomes. The campaign is completed once every recipient has been
+sent, bounced or failed.
+"""
+
+from pymongo.errors import BulkWriteError
+from app.config import settings
+from app.models.application import ApplicationStatus
+from app.models.campaign import CampaignKind, CampaignStatus
+from app.utils.helpers import generate_id
+from app.utils.outbox import DEAD, campaign_job
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = [CampaignStatus.QUEUED.value, CampaignStatus.QUEUING.value, CampaignStatus.SENDING.value]
+
+# Who each kind of campaign goes to
+RECIPIENT_STATUSES = {
+    CampaignKind.RESULTS_NOTIFICATION: [
+        ApplicationStatus.UNDER_REVIEW.value,
+        ApplicationStatus.SHORTLISTED.value,
+        ApplicationStatus.REJECTED.value,
+    ],
+    CampaignKind.ASSESSMENT_INVITATION: [
+        ApplicationStatus.APPLIED.value,
+        ApplicationStatus.ASSESSMENT_PENDING.value,
+    ],
+}
+
+
+def new_campaign(job: Dict[str, Any], kind: CampaignKind, created_by: str) -> Dict[str, Any]:
+    return {
+        "_id": generate_id(),
+        "job_id": job["_id"],
+        "company_id": job["company_id"],
+        "kind": kind.value,
+        "status": CampaignStatus.QUEUED.value,
+        "shared": {"job_title": job["title"]},
+        "recipients": 0,
+        "sent": 0,
+        "bounced": 0,
+        "failed": 0,
+        "deferred": 0,
+        "created_by": created_by,
+        "created_at": datetime.utcnow()
+    }
+
+
+def campaign_progress(campaign: Dict[str, Any]) -> Dict[str, Any]:
+    """The campaign document with its pending count"""
+    done = campaign["sent"] + campaign["bounced"] + campaign["failed"]
+    return {**campaign, "pending": max(campaign["recipients"] - done, 0)}
+
+
+def recipients_pipeline(kind: CampaignKind, job_id: str) -> List[Dict[str, Any]]:
+    """Aggregation yielding _id, candidate_name, candidate_email (and score for results)"""
+    pipeline = [
+        {"$match": {"job_id": job_id, "status": {"$in": RECIPIENT_STATUSES[kind]}}},
+        {"$project": {"candidate_name": 1, "candidate_email": 1}},
+    ]
+    if kind == CampaignKind.RESULTS_NOTIFICATION:
+        pipeline += [
+            {"$lookup": {
+                "from": "results",
+                "localField": "_id",
+                "foreignField": "application_id",
+                "pipeline": [{"$project": {"_id": 0, "percentage": 1}}],
+                "as": "result"
+            }},
+            {"$unwind": "$result"},  # no result yet: nothing to announce
+        ]
+    return pipeline
+
+
+def recipient_fields(kind: CampaignKind, row: Dict[str, Any]) -> Dict[str, Any]:
+    base_url = settings.APP_BASE_URL.rstrip("/")
+    if kind == CampaignKind.RESULTS_NOTIFICATION:
+        return {
+            "candidate_name": row["candidate_name"],
+            "score": row["result"]["percentage"],
+            "results_link": f"{base_url}/results/{row['_id']}"
+        }
+    return {
+        "candidate_name": row["candidate_name"],
+        "assessment_link": f"{base_url}/assessment/{row['_id']}"
+    }
+
+
+async def _insert(db, campaign_id: str, jobs: List[Dict[str, Any]]) -> int:
+    """Insert a batch of outbox jobs, skipping ones a previous run already queued"""
+    try:
+        await db.email_outbox.insert_many(jobs, ordered=False)
+        inserted = len(jobs)
+    except BulkWriteError as e:
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+        inserted = e.details["nInserted"]
+    if inserted:
+        await db.email_campaigns.update_one({"_id": campaign_id}, {"$inc": {"recipients": inserted}})
+    return inserted
+
+
+async def queue_campaign(db, campaign_id: str) -> Optional[int]:
+    """Stream a campaign's recipients into the outbox; returns how many were queued
+    (None if the campaign isn't waiting to be queued)"""
+    campaign = await db.email_campaigns.find_one(
+        {"_id": campaign_id, "status": {"$in": [CampaignStatus.QUEUED.value, CampaignStatus.QUEUING.value]}}
+    )
+    if not campaign:
+        return None
+
+    kind = CampaignKind(campaign["kind"])
+    started_at = campaign.get("started_at") or datetime.utcnow()
+    await db.email_campaigns.update_one(
+        {"_id": campaign_id},
+        {"$set": {"status": CampaignStatus.QUEUING.value, "started_at": started_at}}
+    )
+
+    interval = timedelta(minutes=1) / settings.CAMPAIGN_RATE_PER_MINUTE
+    batch_size = settings.CAMPAIGN_BATCH_SIZE
+    queued = 0
+    index = 0
+    batch = []
+    cursor = db.applications.aggregate(recipients_pipeline(kind, campaign["job_id"]), batchSize=batch_size)
+    async for row in cursor:
+        batch.append(campaign_job(
+            f"{campaign_id}:{row['_id']}",
+            campaign_id,
+            kind.value,
+            row["candidate_email"],
+            recipient_fields(kind, row),
+            started_at + index * interval
+        ))
+        index += 1
+        if len(batch) >= batch_size:
+            queued += await _insert(db, campaign_id, batch)
+            batch = []
+    if batch:
+        queued += await _insert(db, campaign_id, batch)
+
+    await db.email_campaigns.update_one(
+        {"_id": campaign_id},
+        {"$set": {"status": CampaignStatus.SENDING.value, "queued_at": datetime.utcnow()}}
+    )
+    await complete_if_done(db, campaign_id)  # empty cohort, or a fast sender
+    logger.info(f"Campaign {campaign_id}: queued {queued} of {index} recipients")
+    return queued
+
+
+async def fail_campaign(db, campaign_id: str, error: str):
+    await db.email_campaigns.update_one(
+        {"_id": campaign_id},
+        {"$set": {"status": CampaignStatus.FAILED.value, "error": error[:500]}}
+    )
+
+
+async def complete_if_done(db, campaign_id: str):
+    await db.email_campaigns.update_one(
+        {
+            "_id": campaign_id,
+            "status": CampaignStatus.SENDING.value,
+            "$expr": {"$gte": [{"$add": ["$sent", "$bounced", "$failed"]}, "$recipients"]}
+        },
+        {"$set": {"status": CampaignStatus.COMPLETED.value, "completed_at": datetime.utcnow()}}
+    )
+
+
+async def record_outcomes(db, tallies: Dict[str, Dict[str, int]]):
+    """Add a sender batch's outcomes ({campaign_id: {outcome: count}}) to the campaign counters"""
+    for campaign_id, counts in tallies.items():
+        await db.email_campaigns.update_one({"_id": campaign_id}, {"$inc": dict(counts)})
+        await complete_if_done(db, campaign_id)
+
+
+async def reopen_dead(db):
+    """Take dead-lettered campaign jobs back out of the counters before they are requeued"""
+    rows = await db.email_outbox.aggregate([
+        {"$match": {"status": DEAD, "campaign_id": {"$exists": True}}},
+        {"$group": {
+            "_id": "$campaign_id",
+            "bounced": {"$sum": {"$cond": ["$bounced", 1, 0]}},
+            "failed": {"$sum": {"$cond": ["$bounced", 0, 1]}}
+        }}
+    ]).to_list(None)
+    for row in rows:
+        await db.email_campaigns.update_one(
+            {"_id": row["_id"]},
+            {"$inc": {"bounced": -row["bounced"], "failed": -row["failed"]}}
+        )
+        await db.email_campaigns.update_one(
+            {"_id": row["_id"], "status": CampaignStatus.COMPLETED.value},
+            {"$set": {"status": CampaignStatus.SENDING.value}, "$unset": {"completed_at": ""}}
+        )
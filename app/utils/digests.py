@@ -0,0 +1,167 @@
+"""
+Recruiter application digests
+
+Recruiters choose how they hear about new applications
+(users.notification_preferences, see NotificationPreferences): instantly,
+in a digest (the default) or not at all. In digest mode apply_to_job
+doesn't email anyone; it records a small event in digest_events. The
+send_recruiter_digests beat task (every DIGEST_CHECK_MINUTES) turns each
+recruiter's events into one recruiter_digest email once their interval has
+passed since the previous digest: application counts per job, the most
+common skills and the latest applicants. During a drive that is one email
+per recruiter per interval instead of one per application.
+"""
+
+from app.config import settings
+from app.models.user import ApplicationAlerts, NotificationPreferences
+from app.utils.helpers import generate_id
+from app.utils.outbox import queue_email
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+DIGEST_TOP_JOBS = 10
+DIGEST_TOP_SKILLS = 5
+DIGEST_RECENT_CANDIDATES = 5
+
+
+def notification_preferences(user: Dict[str, Any]) -> NotificationPreferences:
+    return NotificationPreferences(**(user.get("notification_preferences") or {}))
+
+
+def digest_interval(preferences: NotificationPreferences) -> timedelta:
+    return timedelta(minutes=preferences.digest_interval_minutes or settings.DIGEST_INTERVAL_MINUTES)
+
+
+async def notify_new_application(
+    db,
+    recruiter: Dict[str, Any],
+    job: Dict[str, Any],
+    candidate: Dict[str, Any]
+) -> Optional[Tuple[str, str]]:
+    """Email the recruiter now, or add the application to their next digest;
+    returns the (collection, id) queued, for outbox.withdraw"""
+    preferences = notification_preferences(recruiter)
+    skills = candidate.get("skills", [])[:5]
+
+    if preferences.new_applications == ApplicationAlerts.INSTANT:
+        return "email_outbox", await queue_email(
+            db,
+            "new_application_notification",
+            recruiter["email"],
+            recruiter_name=recruiter["full_name"],
+            candidate_name=candidate["full_name"],
+            job_title=job["title"],
+            candidate_skills=skills
+        )
+    elif preferences.new_applications == ApplicationAlerts.DIGEST:
+        event_id = generate_id()
+        await db.digest_events.insert_one({
+            "_id": event_id,
+            "recruiter_id": recruiter["_id"],
+            "job_id": job["_id"],
+            "job_title": job["title"],
+            "candidate_name": candidate["full_name"],
+            "skills": skills,
+            "created_at": datetime.utcnow()
+        })
+        return "digest_events", event_id
+    return None
+
+
+async def digest_summary(db, recruiter_id: str, until: datetime) -> Optional[Dict[str, Any]]:
+    """Counts, per-job counts, top skills and latest applicants of a recruiter's pending events,
+    and the ids of the events summarised"""
+    rows = await db.digest_events.aggregate([
+        {"$match": {"recruiter_id": recruiter_id, "created_at": {"$lte": until}}},
+        {"$facet": {
+            "totals": [
+                {"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "since": {"$min": "$created_at"},
+                    "event_ids": {"$push": "$_id"}
+                }},
+            ],
+            "jobs": [
+                {"$group": {"_id": "$job_id", "title": {"$last": "$job_title"}, "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "title": 1}},
+                {"$limit": DIGEST_TOP_JOBS},
+            ],
+            "skills": [
+                {"$unwind": "$skills"},
+                {"$group": {"_id": {"$toLower": "$skills"}, "name": {"$first": "$skills"}, "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": DIGEST_TOP_SKILLS},
+            ],
+            "recent": [
+                {"$sort": {"created_at": -1}},
+                {"$limit": DIGEST_RECENT_CANDIDATES},
+                {"$project": {"_id": 0, "candidate_name": 1}},
+            ],
+        }}
+    ]).to_list(1)
+
+    if not rows or not rows[0]["totals"]:
+        return None
+    facets = rows[0]
+    return {
+        "total": facets["totals"][0]["count"],
+        "since": facets["totals"][0]["since"],
+        "jobs": [{"title": job["title"], "count": job["count"]} for job in facets["jobs"]],
+        "top_skills": [{"name": skill["name"], "count": skill["count"]} for skill in facets["skills"]],
+        "recent_candidates": [event["candidate_name"] for event in facets["recent"]],
+        "event_ids": facets["totals"][0]["event_ids"]
+    }
+
+
+async def send_digests(db, now: Optional[datetime] = None) -> int:
+    """Queue a digest for every recruiter whose interval has passed; returns how many"""
+    now = now or datetime.utcnow()
+    recruiter_ids = await db.digest_events.distinct("recruiter_id")
+    if not recruiter_ids:
+        return 0
+
+    sent = 0
+    recruiters = db.users.find(
+        {"_id": {"$in": recruiter_ids}},
+        {"email": 1, "full_name": 1, "notification_preferences": 1, "last_digest_at": 1}
+    )
+    async for recruiter in recruiters:
+        preferences = notification_preferences(recruiter)
+        last_digest_at = recruiter.get("last_digest_at")
+        if (
+            preferences.new_applications == ApplicationAlerts.DIGEST
+            and last_digest_at
+            and now - last_digest_at < digest_interval(preferences)
+        ):
+            continue
+
+        # Events left over from digest mode are still sent after a switch to instant, dropped after "off"
+        if preferences.new_applications == ApplicationAlerts.OFF:
+            await db.digest_events.delete_many({"recruiter_id": recruiter["_id"], "created_at": {"$lte": now}})
+        else:
+            summary = await digest_summary(db, recruiter["_id"], now)
+            if summary:
+                await queue_email(
+                    db,
+                    "recruiter_digest",
+                    recruiter["email"],
+                    recruiter_name=recruiter["full_name"],
+                    total=summary["total"],
+                    since=summary["since"].strftime("%b %d, %H:%M UTC"),
+                    jobs=summary["jobs"],
+                    top_skills=summary["top_skills"],
+                    recent_candidates=summary["recent_candidates"]
+                )
+                sent += 1
+                # Only the events summarised: ones landing meanwhile (stamped before their insert) wait for the next digest
+                await db.digest_events.delete_many({"_id": {"$in": summary["event_ids"]}})
+
+        await db.users.update_one({"_id": recruiter["_id"]}, {"$set": {"last_digest_at": now}})
+
+    if sent:
+        logger.info(f"Queued {sent} recruiter digests")
+    return sent
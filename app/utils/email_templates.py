@@ -0,0 +1,134 @@
+"""
+Precompiled email templates
+
+Email bodies live in templates/emails/ as Jinja2 templates extending a
+shared layout (CSS, header, footer). Each template is compiled once per
+process and cached by the environment, so rendering a message only fills
+in the per-recipient fields.
+
+The plain-text part is generated, not written by hand: the text
+environment's loader converts each template's HTML source to text once
+when it is loaded (Jinja tags pass through untouched), and the result is
+compiled and cached like the HTML version. Each template defines a
+`subject` block, rendered from the text template so it isn't HTML-escaped.
+"""
+
+from html.parser import HTMLParser
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+from app.config import settings
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import os
+import re
+
+EMAIL_TEMPLATES_PATH = os.path.join(settings.TEMPLATES_PATH, "emails")
+
+# Not part of the readable message
+SKIPPED_TAGS = {"head", "title", "style", "script"}
+BLOCK_TAGS = {"p", "div", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "table", "tr"}
+
+
+class _TextConverter(HTMLParser):
+    """HTML to plain text: paragraphs, "- " list items, "label: url" links"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts: List[str] = []
+        self.skipping = 0
+        self.link = None  # (href, start index in parts) while inside <a>
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+        elif tag == "br":
+            self.parts.append("\n")
+        elif tag == "li":
+            self.parts.append("\n- ")
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n\n")
+        elif tag == "a":
+            self.link = (dict(attrs).get("href"), len(self.parts))
+
+    def handle_endtag(self, tag):
+        if tag in SKIPPED_TAGS:
+            self.skipping -= 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n\n")
+        elif tag == "a" and self.link:
+            href, start = self.link
+            label = "".join(self.parts[start:]).strip().rstrip("→").strip()
+            self.parts[start:] = [f"{label}: {href}" if href and href != label else label]
+            self.link = None
+
+    def handle_data(self, data):
+        if not self.skipping:
+            self.parts.append(re.sub(r"\s+", " ", data))
+
+    def text(self) -> str:
+        return tidy_text("".join(self.parts))
+
+
+def html_to_text(html: str) -> str:
+    converter = _TextConverter()
+    converter.feed(html)
+    converter.close()
+    return converter.text()
+
+
+def tidy_text(text: str) -> str:
+    """Strip every line and collapse runs of blank lines"""
+    lines = [line.strip() for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip() + "\n"
+
+
+class TextLoader(FileSystemLoader):
+    """Loads the plain-text version of each HTML template"""
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        return html_to_text(source), filename, uptodate
+
+
+class EmailTemplates:
+    def __init__(self, path: str = EMAIL_TEMPLATES_PATH):
+        options = dict(auto_reload=False, cache_size=-1, undefined=StrictUndefined)
+        self.html = Environment(loader=FileSystemLoader(path), autoescape=True, **options)
+        self.text = Environment(loader=TextLoader(path), autoescape=False, **options)
+        for env in (self.html, self.text):
+            env.globals["app_url"] = settings.APP_BASE_URL.rstrip("/")
+
+    def _pair(self, kind: str):
+        name = f"{kind}.html"
+        return self.html.get_template(name), self.text.get_template(name)
+
+    @staticmethod
+    def _subject(template, context: Dict[str, Any]) -> str:
+        return "".join(template.blocks["subject"](template.new_context(context))).strip()
+
+    def render(self, kind: str, params: Dict[str, Any]) -> Tuple[str, str, str]:
+        """Subject, HTML and text for one message"""
+        html_template, text_template = self._pair(kind)
+        return (
+            self._subject(text_template, params),
+            html_template.render(params),
+            tidy_text(text_template.render(params))
+        )
+
+    def render_many(
+        self,
+        kind: str,
+        shared: Dict[str, Any],
+        recipients: Iterable[Dict[str, Any]]
+    ) -> Iterator[Tuple[str, str, str]]:
+        """Render a batch: templates are looked up once, `shared` merged into each recipient's fields"""
+        html_template, text_template = self._pair(kind)
+        for fields in recipients:
+            context = {**shared, **fields}
+            yield (
+                self._subject(text_template, context),
+                html_template.render(context),
+                tidy_text(text_template.render(context))
+            )
+
+
+# Create singleton instance
+email_templates = EmailTemplates()
@@ -0,0 +1,67 @@
+"""
+Evaluation progress
+
+The Celery evaluation task reports its state (queued, started,
+mcq_scored, grading question N of M, generating_feedback, retrying,
+final, failed) per application. The latest state is kept in a Redis
+key, so a page that connects mid-evaluation starts from the current
+step. Each change is also published on the application's channel for
+open SSE streams.
+
+Without Redis (TASK_BACKEND=local) the latest state is kept in the
+process that runs the evaluation and published to its own streams (see
+app/utils/events.py).
+"""
+
+from app.redis_client import get_redis
+from app.utils.events import event_hub
+from app.utils.serialization import dumps, loads
+from typing import Any, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Long enough to outlive a queued evaluation; results are permanent in MongoDB
+PROGRESS_TTL_SECONDS = 86400
+
+TERMINAL_STATES = ("final", "failed")
+
+# Latest state by application while Redis is unavailable; a finished one is read from MongoDB
+_local_progress: Dict[str, Dict[str, Any]] = {}
+
+
+def evaluation_channel(application_id: str) -> str:
+    return f"events:evaluation:{application_id}"
+
+
+def progress_key(application_id: str) -> str:
+    return f"evaluation:progress:{application_id}"
+
+
+async def publish_progress(application_id: str, state: str, **data: Any):
+    """Record and publish an evaluation step; never raises"""
+    event = {"type": "evaluation", "state": state, **data}
+    payload = dumps(event)
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.set(progress_key(application_id), payload, ex=PROGRESS_TTL_SECONDS)
+            pipe.publish(evaluation_channel(application_id), payload)
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Evaluation progress publish failed for {application_id}, delivering in-process: {e}")
+        if state in TERMINAL_STATES:
+            _local_progress.pop(application_id, None)
+        else:
+            _local_progress[application_id] = event
+        event_hub.publish_local(evaluation_channel(application_id), event)
+        return
+    _local_progress.pop(application_id, None)
+
+
+async def get_progress(application_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        raw = await get_redis().get(progress_key(application_id))
+    except Exception as e:
+        logger.warning(f"Evaluation progress read failed for {application_id}: {e}")
+        return _local_progress.get(application_id)
+    return loads(raw) if raw else None
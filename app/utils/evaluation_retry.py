@@ -0,0 +1,189 @@
+"""
+Evaluation failure handling
+
+evaluate_submission raises instead of returning an error dict, so Celery
+sees failures:
+
+- TransientEvaluationError (Mongo connection loss, Gemini 429/5xx,
+  timeouts) is retried by Celery with jittered exponential backoff, up to
+  EVALUATION_MAX_RETRIES times
+- PermanentEvaluationError (missing submission, assessment or
+  application) and any other exception fail the task at once
+
+A task that fails for good is recorded in evaluation_dead_letters (one
+document per submission). A running evaluation stamps
+applications.evaluation_heartbeat_at as it goes. The sweeper (beat task
+sweep_stuck_evaluations) re-enqueues, through the fair-share lanes,
+applications left in assessment_completed for longer than
+EVALUATION_STUCK_MINUTES whose evaluation is neither queued (see
+fair_queue.mark_pending, or task_outbox with the local backend) nor
+running (a heartbeat within
+EVALUATION_STUCK_MINUTES): evaluations lost with a worker or the broker,
+and dead-lettered ones that failed transiently, up to
+EVALUATION_MAX_REQUEUES times each. A drive-day backlog is left to the
+queue. Evaluation is idempotent (the result is keyed by submission), so a
+duplicate run only repeats the AI calls.
+"""
+
+from pymongo.errors import ConnectionFailure, OperationFailure
+from app.config import settings
+from app.utils import fair_queue
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Set
+import asyncio
+import httpx
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEAD_LETTER_COLLECTION = "evaluation_dead_letters"
+
+# HTTP statuses worth retrying (rate limits, timeouts, server errors)
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+class EvaluationError(Exception):
+    pass
+
+
+class TransientEvaluationError(EvaluationError):
+    """Likely to succeed if retried later"""
+
+
+class PermanentEvaluationError(EvaluationError):
+    """Will fail the same way on every attempt"""
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, TransientEvaluationError):
+        return True
+    if isinstance(error, PermanentEvaluationError):
+        return False
+    # AutoReconnect, NetworkTimeout and ServerSelectionTimeoutError are ConnectionFailures
+    if isinstance(error, ConnectionFailure):
+        return True
+    if isinstance(error, OperationFailure):
+        return error.has_error_label("RetryableWriteError") or error.has_error_label("TransientTransactionError")
+    # google.genai APIError (and HTTP client errors) carry the response status as `code`
+    code = getattr(error, "code", None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+        return True
+    return isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError, httpx.TransportError))
+
+
+def as_evaluation_error(error: Exception) -> EvaluationError:
+    """Wrap an exception in the typed error the task retries (or doesn't) on"""
+    if isinstance(error, EvaluationError):
+        return error
+    message = f"{type(error).__name__}: {error}"
+    if is_transient(error):
+        return TransientEvaluationError(message)
+    return PermanentEvaluationError(message)
+
+
+async def dead_letter(db, submission_id: str, application_id: str, error: Exception, retries: int):
+    """Record a submission whose evaluation failed for good"""
+    now = datetime.utcnow()
+    await db[DEAD_LETTER_COLLECTION].update_one(
+        {"_id": submission_id},
+        {
+            "$set": {
+                "application_id": application_id,
+                "error": str(error)[:1000],
+                "error_type": type(error).__name__,
+                "transient": is_transient(error),
+                "retries": retries,
+                "failed_at": now
+            },
+            "$setOnInsert": {"first_failed_at": now, "requeues": 0}
+        },
+        upsert=True
+    )
+    logger.error(f"Evaluation of submission {submission_id} dead-lettered after {retries} retries: {error}")
+
+
+async def heartbeat(db, application_id: str):
+    """Mark an evaluation as alive"""
+    await db.applications.update_one(
+        {"_id": application_id},
+        {"$set": {"evaluation_heartbeat_at": datetime.utcnow()}}
+    )
+
+
+async def queued_among(db, submission_ids: List[str]) -> Set[str]:
+    """The submissions still waiting in a queue (raises if that can't be told)"""
+    if settings.TASK_BACKEND == "local":
+        # The local backend's queue is task_outbox; an entry stays until its task settles
+        return {
+            entry["args"][0] async for entry in db.task_outbox.find(
+                {"task": "evaluate_submission", "args.0": {"$in": submission_ids}},
+                {"args": 1}
+            )
+        }
+    return await fair_queue.pending_among(submission_ids)
+
+
+async def find_stuck_submissions(db, limit: int) -> List[Dict[str, Any]]:
+    """Submissions (with application and job ids) of applications stuck in assessment_completed
+    that may be re-enqueued"""
+    now = datetime.utcnow()
+    stale = now - timedelta(minutes=settings.EVALUATION_STUCK_MINUTES)
+    applications = await db.applications.find(
+        {
+            "status": "assessment_completed",
+            "assessment_completed_at": {"$lt": stale},
+            "$or": [
+                {"evaluation_requeued_at": {"$exists": False}},
+                {"evaluation_requeued_at": {"$lt": stale}}
+            ]
+        },
+        {"job_id": 1, "evaluation_heartbeat_at": 1}
+    ).limit(limit).to_list(limit)
+    if not applications:
+        return []
+    applications_by_id = {application["_id"]: application for application in applications}
+
+    application_ids = [application["_id"] for application in applications]
+    submissions = await db.submissions.find(
+        {"application_id": {"$in": application_ids}},
+        {"_id": 1, "application_id": 1}
+    ).sort("submitted_at", -1).to_list(None)
+    latest = {}
+    for submission in submissions:
+        latest.setdefault(submission["application_id"], submission)
+
+    # Still waiting in a queue, or running: not stuck
+    try:
+        waiting = await queued_among(db, [s["_id"] for s in latest.values()])
+    except Exception as e:
+        logger.warning(f"Queued evaluations unknown, not sweeping: {e}")
+        return []
+    for application_id, submission in list(latest.items()):
+        beat = applications_by_id[application_id].get("evaluation_heartbeat_at")
+        if submission["_id"] in waiting or (beat and beat >= stale):
+            del latest[application_id]
+
+    # Leave permanent failures and ones out of requeues to an operator
+    given_up = set()
+    async for letter in db[DEAD_LETTER_COLLECTION].find(
+        {"_id": {"$in": [s["_id"] for s in latest.values()]}},
+        {"transient": 1, "requeues": 1}
+    ):
+        if not letter["transient"] or letter["requeues"] >= settings.EVALUATION_MAX_REQUEUES:
+            given_up.add(letter["_id"])
+
+    # Stamp every application looked at, so given-up ones are only rechecked once per period
+    await db.applications.update_many(
+        {"_id": {"$in": application_ids}},
+        {"$set": {"evaluation_requeued_at": now}}
+    )
+    stuck = [
+        {**s, "job_id": applications_by_id[s["application_id"]]["job_id"]}
+        for s in latest.values() if s["_id"] not in given_up
+    ]
+    if stuck:
+        await db[DEAD_LETTER_COLLECTION].update_many(
+            {"_id": {"$in": [s["_id"] for s in stuck]}},
+            {"$inc": {"requeues": 1}}
+        )
+    return stuck
@@ -0,0 +1,227 @@
+"""
+Redis pub/sub fan-out and Server-Sent Events
+
+Publishers (web workers and Celery tasks) PUBLISH small JSON events to
+Redis channels. Each web worker holds a single pub/sub connection in the
+EventHub and fans messages out to its local subscribers (open SSE
+streams), so a thousand open pages cost one Redis connection per worker.
+
+Every subscriber has a bounded queue (EVENTS_QUEUE_SIZE). A client that
+falls that far behind is dropped with a "reset" event and reloads its
+state over plain HTTP, so slow clients cannot grow server memory.
+
+Without Redis (it is optional with TASK_BACKEND=local, where tasks run in
+the web workers) an event that can't be published is delivered to the
+publishing process's own subscribers, and the hub keeps retrying its
+connection in the background. With several web workers, a stream then
+only sees the events of tasks run by its own worker; pages reload over
+HTTP when the hub reconnects.
+"""
+
+from fastapi.responses import StreamingResponse
+from app.redis_client import get_redis
+from app.utils.serialization import dumps, loads
+from app.config import settings
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Set
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+RESET = {"type": "reset"}
+
+
+async def publish(channel: str, event: Dict[str, Any]):
+    """Publish an event; failures are logged, never raised (events are best effort)"""
+    try:
+        await get_redis().publish(channel, dumps(event))
+    except Exception as e:
+        logger.warning(f"Event publish failed on {channel}, delivering in-process: {e}")
+        event_hub.publish_local(channel, event)
+
+
+class Subscription:
+    def __init__(self, hub: "EventHub", channels: Iterable[str], queue_size: int):
+        self.hub = hub
+        self.channels = tuple(channels)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def deliver(self, event: Dict[str, Any]) -> bool:
+        """Queue an event without blocking; False when the subscriber has fallen behind"""
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def reset(self):
+        """Replace the backlog with a single reset event"""
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESET)
+
+    async def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        await self.hub.unsubscribe(self)
+
+
+class EventHub:
+    """One Redis pub/sub connection per process, shared by all local subscribers"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._pubsub = None
+        self._reader: Optional[asyncio.Task] = None
+        self._running = False
+        self._connected = True
+        self._lock = asyncio.Lock()
+
+    async def subscribe(self, *channels: str) -> Subscription:
+        subscription = Subscription(self, channels, settings.EVENTS_QUEUE_SIZE)
+        async with self._lock:
+            new_channels = [c for c in channels if c not in self._subscribers]
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+            if self._pubsub is None:
+                self._pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            if new_channels:
+                try:
+                    await self._pubsub.subscribe(*new_channels)
+                except Exception as e:
+                    # In-process events still arrive; the reader resubscribes once Redis is back
+                    self._lost(e)
+            if self._reader is None or self._reader.done():
+                self._running = True
+                self._reader = asyncio.create_task(self._read())
+        return subscription
+
+    async def unsubscribe(self, subscription: Subscription):
+        async with self._lock:
+            idle = []
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+                    idle.append(channel)
+            if idle and self._pubsub is not None:
+                try:
+                    await self._pubsub.unsubscribe(*idle)
+                except Exception as e:
+                    logger.warning(f"Event unsubscribe failed: {e}")
+
+    def publish_local(self, channel: str, event: Dict[str, Any]):
+        """Deliver an event to this process's subscribers only"""
+        self._dispatch(channel, event)
+
+    def _lost(self, error: Exception):
+        if self._connected:
+            logger.warning(f"Event hub connection lost, delivering in-process events until it is back: {error}")
+        self._connected = False
+
+    def _dispatch(self, channel: str, event: Dict[str, Any]):
+        for subscription in list(self._subscribers.get(channel, ())):
+            if not subscription.deliver(event):
+                logger.info(f"Dropping slow event subscriber on {channel}")
+                subscription.reset()
+                asyncio.ensure_future(self.unsubscribe(subscription))
+
+    async def _read(self):
+        # A flag as well as cancel(): get_message() can absorb a cancellation
+        # that lands inside its own read timeout
+        while self._running:
+            if not self._connected:
+                await self._reconnect()
+                continue
+            if not self._pubsub.subscribed:
+                # Nothing to read until a stream subscribes
+                await asyncio.sleep(1.0)
+                continue
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._lost(e)
+                continue
+
+            if message is None or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            try:
+                event = loads(message["data"])
+            except ValueError:
+                logger.warning(f"Ignoring malformed event on {channel}")
+                continue
+            self._dispatch(channel, event)
+
+    async def _reconnect(self):
+        """Resubscribe after a Redis failure; subscribers reload since events may be lost"""
+        await asyncio.sleep(1.0)
+        async with self._lock:
+            try:
+                await self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            try:
+                if self._subscribers:
+                    await self._pubsub.subscribe(*self._subscribers)
+            except Exception as e:
+                logger.debug(f"Event hub resubscribe failed: {e}")
+                return
+            self._connected = True
+            logger.info("Event hub reconnected")
+            for subscribers in self._subscribers.values():
+                for subscription in subscribers:
+                    subscription.reset()
+
+    async def close(self):
+        self._running = False
+        if self._reader is not None:
+            self._reader.cancel()
+            try:
+                await self._reader
+            except asyncio.CancelledError:
+                pass
+            self._reader = None
+        if self._pubsub is not None:
+            try:
+                await self._pubsub.close()
+            except Exception:
+                pass
+            self._pubsub = None
+        self._subscribers.clear()
+
+
+# Create singleton instance
+event_hub = EventHub()
+
+
+def sse_event(data: Dict[str, Any], event: str = None) -> bytes:
+    """Encode one Server-Sent Event"""
+    lines = []
+    if event:
+        lines.append(f"event: {event}".encode())
+    lines.append(b"data: " + dumps(data))
+    return b"\n".join(lines) + b"\n\n"
+
+
+def sse_response(stream: AsyncIterator[bytes]) -> StreamingResponse:
+    return StreamingResponse(
+        stream,
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # nginx: don't buffer the stream
+        }
+    )
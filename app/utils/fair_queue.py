@@ -0,0 +1,193 @@
+"""
+Fair-share scheduling of evaluations
+
+With one FIFO Celery queue, a company running a 5,000-candidate drive
+holds up every other company's evaluations for hours. Submissions are
+instead pushed into lanes (one per company, or per job with
+EVALUATION_LANES=job) kept in Redis, and the task queue (Celery's, or the
+local backend's) carries interchangeable evaluate_next tokens, one per
+submission. A worker picking up a token asks the scheduler which
+submission to evaluate, so the order is decided when work starts, not
+when it was submitted.
+
+The scheduler is deficit round robin over the active lanes: each lane in
+the ring gets `weight` submissions per turn (1 normally,
+EVALUATION_DEADLINE_WEIGHT while it has work for a job whose
+shortlist_deadline is within EVALUATION_DEADLINE_WINDOW_HOURS). A company
+with three pending submissions waits for at most a few turns, however long
+the big drive's lane is. Push and pop are Lua scripts, so concurrent web
+processes and workers see a consistent ring.
+
+Redis keys: evalq:ring (list of active lanes), evalq:deficits and
+evalq:weights (hashes by lane; a lane is in the ring iff it has a deficit
+entry), evalq:lane:<lane> (FIFO list of submission ids).
+
+evalq:pending (sorted set, scored by time queued) holds every submission
+queued for evaluation, through a lane or not, until its evaluation
+starts. The stuck-evaluation sweeper leaves these alone; entries older
+than EVALUATION_QUEUED_MAX_HOURS count as lost.
+
+The local task backend needs no Redis: lanes are off and its queue,
+task_outbox, is what the sweeper checks instead of evalq:pending.
+"""
+
+from app.config import settings
+from app.redis_client import get_redis
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+import math
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+RING_KEY = "evalq:ring"
+DEFICITS_KEY = "evalq:deficits"
+WEIGHTS_KEY = "evalq:weights"
+LANE_PREFIX = "evalq:lane:"
+PENDING_KEY = "evalq:pending"
+
+# Append to the lane, join the ring if the lane was idle, keep the highest weight seen
+PUSH_SCRIPT = """
+local lane_key = ARGV[1] .. ARGV[2]
+redis.call('RPUSH', lane_key, ARGV[3])
+if redis.call('HSETNX', KEYS[2], ARGV[2], 0) == 1 then
+    redis.call('RPUSH', KEYS[1], ARGV[2])
+    redis.call('HSET', KEYS[3], ARGV[2], ARGV[4])
+elseif tonumber(redis.call('HGET', KEYS[3], ARGV[2]) or '1') < tonumber(ARGV[4]) then
+    redis.call('HSET', KEYS[3], ARGV[2], ARGV[4])
+end
+return {redis.call('LLEN', lane_key), redis.call('LLEN', KEYS[1])}
+"""
+
+# Deficit round robin: the lane at the head of the ring spends one unit of
+# deficit per submission and moves to the back once it has spent its weight
+POP_SCRIPT = """
+for _ = 1, 2 * redis.call('LLEN', KEYS[1]) + 1 do
+    local lane = redis.call('LINDEX', KEYS[1], 0)
+    if not lane then
+        return nil
+    end
+    local item = redis.call('LPOP', ARGV[1] .. lane)
+    if not item then
+        redis.call('LPOP', KEYS[1])
+        redis.call('HDEL', KEYS[2], lane)
+        redis.call('HDEL', KEYS[3], lane)
+    else
+        local deficit = tonumber(redis.call('HGET', KEYS[2], lane) or '0')
+        if deficit < 1 then
+            deficit = deficit + tonumber(redis.call('HGET', KEYS[3], lane) or '1')
+        end
+        deficit = deficit - 1
+        if deficit < 1 then
+            redis.call('RPUSH', KEYS[1], redis.call('LPOP', KEYS[1]))
+        end
+        redis.call('HSET', KEYS[2], lane, deficit)
+        return {lane, item}
+    end
+end
+return nil
+"""
+
+
+def fair_scheduling_enabled() -> bool:
+    return settings.EVALUATION_LANES in ("company", "job") and settings.TASK_BACKEND != "local"
+
+
+def lane_for(job: Dict[str, Any]) -> str:
+    return job["_id"] if settings.EVALUATION_LANES == "job" else job["company_id"]
+
+
+def lane_weight(job: Dict[str, Any], now: Optional[datetime] = None) -> int:
+    deadline = job.get("shortlist_deadline")
+    if deadline:
+        now = now or datetime.utcnow()
+        if deadline.tzinfo:
+            deadline = deadline.replace(tzinfo=None) - deadline.utcoffset()
+        if deadline - now <= timedelta(hours=settings.EVALUATION_DEADLINE_WINDOW_HOURS):
+            return settings.EVALUATION_DEADLINE_WEIGHT
+    return 1
+
+
+async def push(job: Dict[str, Any], submission_id: str) -> Optional[int]:
+    """Add a submission to its lane; returns roughly how many evaluations will run
+    before it, or None if fair scheduling is off or Redis is unavailable"""
+    if not fair_scheduling_enabled():
+        return None
+    weight = lane_weight(job)
+    try:
+        lane_length, active_lanes = await get_redis().eval(
+            PUSH_SCRIPT, 3, RING_KEY, DEFICITS_KEY, WEIGHTS_KEY,
+            LANE_PREFIX, lane_for(job), submission_id, weight
+        )
+    except Exception as e:
+        logger.warning(f"Fair queue unavailable, evaluating {submission_id} in FIFO order: {e}")
+        return None
+    # Every other active lane gets about one turn per `weight` submissions of this one
+    return math.ceil((lane_length - 1) * active_lanes / weight) + active_lanes - 1
+
+
+def _pending_since() -> float:
+    return time.time() - settings.EVALUATION_QUEUED_MAX_HOURS * 3600
+
+
+async def mark_pending(submission_id: str):
+    if settings.TASK_BACKEND == "local":
+        return
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            pipe.zadd(PENDING_KEY, {submission_id: time.time()})
+            pipe.zremrangebyscore(PENDING_KEY, "-inf", _pending_since())
+            await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not mark submission {submission_id} as queued: {e}")
+
+
+async def clear_pending(submission_id: str):
+    if settings.TASK_BACKEND == "local":
+        return
+    try:
+        await get_redis().zrem(PENDING_KEY, submission_id)
+    except Exception as e:
+        logger.warning(f"Could not clear queued mark of submission {submission_id}: {e}")
+
+
+async def pending_among(submission_ids: List[str]) -> Set[str]:
+    """The submissions still waiting in a queue (raises if Redis is unavailable)"""
+    if not submission_ids:
+        return set()
+    async with get_redis().pipeline(transaction=False) as pipe:
+        for submission_id in submission_ids:
+            pipe.zscore(PENDING_KEY, submission_id)
+        scores = await pipe.execute()
+    since = _pending_since()
+    return {sid for sid, score in zip(submission_ids, scores) if score is not None and score > since}
+
+
+async def pop() -> Optional[Tuple[str, str]]:
+    """(lane, submission id) of the next submission to evaluate, or None when all lanes are empty"""
+    popped = await get_redis().eval(POP_SCRIPT, 3, RING_KEY, DEFICITS_KEY, WEIGHTS_KEY, LANE_PREFIX)
+    if not popped:
+        return None
+    lane, submission_id = popped
+    return lane.decode(), submission_id.decode()
+
+
+async def lane_stats(limit: int = 20) -> Dict[str, Any]:
+    """Active lanes, total backlog and the busiest lanes' backlogs. Anonymous: lanes are
+    company or job ids, and this is served on an unauthenticated health route."""
+    redis = get_redis()
+    lanes = [lane.decode() for lane in await redis.lrange(RING_KEY, 0, -1)]
+    backlogs, weights = [], []
+    if lanes:
+        async with redis.pipeline(transaction=False) as pipe:
+            for lane in lanes:
+                pipe.llen(f"{LANE_PREFIX}{lane}")
+            pipe.hmget(WEIGHTS_KEY, lanes)
+            *backlogs, weights = await pipe.execute()
+    return {
+        "active": len(lanes),
+        "backlog": sum(backlogs),
+        "largest_backlogs": sorted(backlogs, reverse=True)[:limit],
+        "deadline_priority": sum(1 for weight in weights if int(weight or 1) > 1)
+    }
@@ -0,0 +1,216 @@
+"""
+In-process task backend (TASK_BACKEND=local)
+
+Single-box installs can run evaluations and the other background tasks
+inside the web workers instead of a Celery worker and celery beat. The
+task_outbox collection, which the Celery backend only uses until a publish
+goes through, is the queue itself:
+
+- enqueue() inserts an entry with the task's name, args and run_at
+- each web worker runs TASK_LOCAL_CONCURRENCY workers on its event loop;
+  they claim due entries atomically (so several web workers can share the
+  queue), await the task's coroutine and delete the entry
+- a running task refreshes its claim every third of
+  TASK_LOCAL_CLAIM_TIMEOUT_SECONDS, so only an entry claimed by a process
+  that died mid-task is claimed again, once the timeout has passed; a
+  worker shut down mid-task releases its claim at once
+
+Tasks are the coroutines the Celery tasks wrap, registered in
+celery_worker.py with the same retry options (backoff doubling per retry,
+capped, full jitter) and failure hooks. Periodic tasks take celery beat's
+schedule; task_schedule holds each one's next run, so only one web
+worker queues it. In-process tasks share the web worker's MongoDB client,
+and blocking calls (the Gemini client) run in threads, so the event loop
+keeps serving requests during an evaluation.
+"""
+
+from pymongo.errors import DuplicateKeyError
+from app.config import settings
+from app.database import get_database
+from app.utils.helpers import generate_id
+from app.utils.periodic import PeriodicTask
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+import asyncio
+import random
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LocalTask:
+    """A named coroutine and how failures are handled"""
+
+    def __init__(
+        self,
+        fn: Callable[..., Awaitable[Any]],
+        retry_for: Tuple[Type[Exception], ...] = (),
+        max_retries: int = 0,
+        backoff: float = 0,
+        backoff_max: float = 600,
+        on_failure: Optional[Callable[..., Awaitable[None]]] = None
+    ):
+        self.fn = fn
+        self.retry_for = retry_for
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.on_failure = on_failure  # Called with the task's args, the error and the retries made
+        self.every: Optional[float] = None  # Seconds between periodic runs
+
+    def countdown(self, retries: int) -> float:
+        return random.uniform(0, min(self.backoff * 2 ** retries, self.backoff_max))
+
+
+TASKS: Dict[str, LocalTask] = {}
+
+
+def register(name: str, fn: Callable[..., Awaitable[Any]], **options: Any):
+    TASKS[name] = LocalTask(fn, **options)
+
+
+def task_entry(name: str, args: List[Any], countdown: float = 0) -> Dict[str, Any]:
+    """A task_outbox document"""
+    now = datetime.utcnow()
+    return {
+        "_id": generate_id(),
+        "task": name,
+        "args": args,
+        "created_at": now,
+        "run_at": now + timedelta(seconds=countdown)
+    }
+
+
+class LocalTaskRunner:
+    def __init__(self):
+        self.scheduler = PeriodicTask(
+            "task schedule",
+            settings.TASK_LOCAL_POLL_SECONDS,
+            lambda: self.schedule_due(get_database())
+        )
+        self._workers: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    def start(self):
+        import app.celery_worker  # noqa: F401 - registers the tasks
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._work(get_database()))
+            for _ in range(settings.TASK_LOCAL_CONCURRENCY)
+        ]
+        self.scheduler.start()
+        logger.info(f"Running background tasks in-process ({len(self._workers)} workers)")
+
+    async def stop(self):
+        await self.scheduler.stop(drain=False)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def wake(self):
+        """A task was queued by this process; an idle worker picks it up without waiting for a poll"""
+        self._wakeup.set()
+
+    async def schedule_due(self, db) -> int:
+        """Queue periodic tasks whose time has come; returns how many"""
+        queued = 0
+        now = datetime.utcnow()
+        for name, task in TASKS.items():
+            if not task.every:
+                continue
+            try:
+                # Not due (or another web worker got there first) means the upsert's insert collides
+                await db.task_schedule.update_one(
+                    {"_id": name, "next_run_at": {"$lte": now}},
+                    {"$set": {"next_run_at": now + timedelta(seconds=task.every)}},
+                    upsert=True
+                )
+            except DuplicateKeyError:
+                continue
+            await db.task_outbox.insert_one(task_entry(name, []))
+            queued += 1
+        if queued:
+            self.wake()
+        return queued
+
+    async def _claim(self, db) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        abandoned = now - timedelta(seconds=settings.TASK_LOCAL_CLAIM_TIMEOUT_SECONDS)
+        return await db.task_outbox.find_one_and_update(
+            {
+                "run_at": {"$lte": now},
+                "$or": [{"claimed_at": None}, {"claimed_at": {"$lt": abandoned}}]
+            },
+            {"$set": {"claimed_at": now}},
+            sort=[("run_at", 1)]
+        )
+
+    async def _work(self, db):
+        while True:
+            self._wakeup.clear()
+            try:
+                entry = await self._claim(db)
+            except Exception as e:
+                logger.warning(f"Claiming a task failed: {e}")
+                entry = None
+            if entry is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), settings.TASK_LOCAL_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self._run(db, entry)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Task {entry['task']} {entry['args']} could not be settled: {e}")
+
+    async def _keep_claim(self, db, entry_id: str):
+        """Refresh a running task's claim until cancelled, so no other worker reruns it"""
+        while True:
+            await asyncio.sleep(settings.TASK_LOCAL_CLAIM_TIMEOUT_SECONDS / 3)
+            try:
+                await db.task_outbox.update_one({"_id": entry_id}, {"$set": {"claimed_at": datetime.utcnow()}})
+            except Exception as e:
+                logger.warning(f"Could not refresh the claim on task {entry_id}: {e}")
+
+    async def _run(self, db, entry: Dict[str, Any]):
+        task = TASKS.get(entry["task"])
+        if task is None:
+            logger.error(f"Unknown task {entry['task']}, dropped")
+            await db.task_outbox.delete_one({"_id": entry["_id"]})
+            return
+
+        retries = entry.get("retries", 0)
+        keeper = asyncio.create_task(self._keep_claim(db, entry["_id"]))
+        try:
+            try:
+                await task.fn(*entry["args"])
+            finally:
+                keeper.cancel()
+        except asyncio.CancelledError:
+            # Shutting down: let the next process have it straight away
+            await asyncio.shield(db.task_outbox.update_one({"_id": entry["_id"]}, {"$set": {"claimed_at": None}}))
+            raise
+        except Exception as e:
+            if isinstance(e, task.retry_for) and retries < task.max_retries:
+                countdown = task.countdown(retries)
+                await db.task_outbox.update_one(
+                    {"_id": entry["_id"]},
+                    {
+                        "$set": {"run_at": datetime.utcnow() + timedelta(seconds=countdown), "claimed_at": None},
+                        "$inc": {"retries": 1}
+                    }
+                )
+                logger.warning(f"Task {entry['task']} {entry['args']} retrying in {countdown:.0f}s: {e}")
+                return
+            logger.error(f"Task {entry['task']} {entry['args']} failed: {e!r}")
+            if task.on_failure:
+                await task.on_failure(*entry["args"], e, retries)
+        await db.task_outbox.delete_one({"_id": entry["_id"]})
+
+
+local_task_runner = LocalTaskRunner()
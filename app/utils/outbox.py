@@ -0,0 +1,95 @@
+"""
+Transactional email outbox
+
+Routes don't send email. They insert a small job (email kind, recipient
+and template parameters) into the email_outbox collection just before
+the state change it reports (and withdraw it if the change fails, see
+withdraw), and the dedicated sender
+(python -m app.email_sender) renders and delivers it. A restart of a web
+worker therefore can't drop a notification, and request latency doesn't
+depend on SMTP.
+
+Job lifecycle: pending -> sending (claimed by a sender) -> sent, or back
+to pending with a backoff after a temporary failure, or dead after
+EMAIL_MAX_ATTEMPTS / a permanent failure (kept for inspection and
+`python -m app.email_sender retry-dead`).
+
+Campaign jobs (app/utils/campaigns.py) carry only the per-recipient
+fields plus a campaign_id; the sender merges in the fields shared by the
+whole campaign, stored once on the campaign document.
+"""
+
+from app.utils.email import EMAIL_KINDS
+from app.utils.helpers import generate_id
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+DEAD = "dead"
+
+
+def email_job(kind: str, to: str, **params: Any) -> Dict[str, Any]:
+    if kind not in EMAIL_KINDS:
+        raise ValueError(f"Unknown email kind: {kind}")
+    now = datetime.utcnow()
+    return {
+        "_id": generate_id(),
+        "kind": kind,
+        "to": to,
+        "params": params,
+        "status": PENDING,
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now
+    }
+
+
+def campaign_job(
+    job_id: str,
+    campaign_id: str,
+    kind: str,
+    to: str,
+    fields: Dict[str, Any],
+    due: datetime
+) -> Dict[str, Any]:
+    """An outbox job for one campaign recipient, first attempted at `due`"""
+    job = email_job(kind, to, **fields)
+    job.update({"_id": job_id, "campaign_id": campaign_id, "next_attempt_at": due})
+    return job
+
+
+async def queue_email(db, kind: str, to: str, **params: Any) -> str:
+    """Queue one email for the sender; returns the outbox job id"""
+    job = email_job(kind, to, **params)
+    await db.email_outbox.insert_one(job)
+    return job["_id"]
+
+
+async def withdraw(db, queued: List[Tuple[str, str]]):
+    """Take back notifications ((collection, id) pairs) queued ahead of a state change that failed"""
+    for collection, doc_id in queued:
+        try:
+            await db[collection].delete_one({"_id": doc_id})
+        except Exception as e:
+            logger.error(f"Could not withdraw {collection} {doc_id}: {e}")
+
+
+async def queue_emails(db, emails: Iterable[Tuple[str, str, Dict[str, Any]]]) -> int:
+    """Queue (kind, to, params) emails with one insert_many"""
+    jobs = [email_job(kind, to, **params) for kind, to, params in emails]
+    if jobs:
+        await db.email_outbox.insert_many(jobs, ordered=False)
+    return len(jobs)
+
+
+async def outbox_stats(db) -> Dict[str, int]:
+    """Job counts by status"""
+    counts = await db.email_outbox.aggregate([
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]).to_list(None)
+    return {row["_id"]: row["count"] for row in counts}
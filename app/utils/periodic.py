@@ -0,0 +1,54 @@
+"""
+Periodic background work inside a web worker (buffer flushers and the like)
+"""
+
+from typing import Awaitable, Callable, Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Run `fn` every `interval` seconds until stopped.
+
+    Errors are logged and the loop carries on. On stop, `fn` is called
+    repeatedly until it returns a falsy value, so buffers are drained.
+    """
+
+    def __init__(self, name: str, interval: float, fn: Callable[[], Awaitable[int]]):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self, drain: bool = True):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+        if drain:
+            try:
+                while await self.fn():
+                    pass
+            except Exception as e:
+                logger.warning(f"Final {self.name} failed: {e}")
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                done = await self.fn()
+                if done:
+                    logger.debug(f"{self.name}: {done}")
+            except Exception as e:
+                logger.warning(f"{self.name} failed: {e}")
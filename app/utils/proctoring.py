@@ -0,0 +1,178 @@
+"""
+Proctoring event ingestion
+
+The exam page posts batches of client-side events (tab switches, focus
+loss, copy/paste, ...). Batches are appended to a Redis list and a
+flusher in each web worker moves up to PROCTORING_FLUSH_BATCH events per
+PROCTORING_FLUSH_INTERVAL_SECONDS into the proctoring_events time-series
+collection with one insert_many, so MongoDB never sees a write per event.
+If Redis is unavailable, the batch is inserted directly.
+
+Each event gets its id when it is received. A flush whose outcome is
+unknown (the connection dropped mid-insert) puts its events back, so a
+retry may store some of them twice; time-series collections have no
+unique _id index, so summarize() counts each id once. Events MongoDB
+rejected and buffer entries that can't be decoded are logged and dropped
+rather than retried forever.
+
+summarize() builds the per-attempt violation timeline shown to recruiters.
+"""
+
+from pymongo.errors import BulkWriteError
+from app.redis_client import get_redis
+from app.database import get_database
+from app.models.proctoring import ProctoringEventType, VIOLATION_TYPES
+from app.utils.helpers import generate_id
+from app.utils.periodic import PeriodicTask
+from app.utils.serialization import dumps, loads
+from app.config import settings
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = "proctoring:buffer"
+
+# Longest timeline returned to recruiters; counts always cover every event
+TIMELINE_LIMIT = 500
+
+
+def _utc(ts: datetime) -> datetime:
+    """Naive UTC, like every other timestamp we store"""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _to_document(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Buffered event (epoch milliseconds) to a time-series document"""
+    return {
+        "_id": raw.get("id") or generate_id(),
+        "ts": datetime.utcfromtimestamp(raw["ts"] / 1000),
+        "meta": raw["meta"],
+        "type": raw["type"],
+        "question_id": raw.get("question_id"),
+        "detail": raw.get("detail"),
+        "received_at": datetime.utcfromtimestamp(raw["received_at"] / 1000)
+    }
+
+
+class ProctoringService:
+    def __init__(self):
+        self.flusher = PeriodicTask(
+            "proctoring flush",
+            settings.PROCTORING_FLUSH_INTERVAL_SECONDS,
+            lambda: self.flush(get_database())
+        )
+
+    async def ingest(self, db, application_id: str, candidate_id: str, events: List[Dict[str, Any]]) -> int:
+        """Buffer a client batch; returns the number of events accepted"""
+        if not events:
+            return 0
+
+        now = datetime.utcnow()
+        received_ms = int(now.replace(tzinfo=timezone.utc).timestamp() * 1000)
+        meta = {"application_id": application_id, "candidate_id": candidate_id}
+        buffered = []
+        for event in events:
+            # Client clocks can run ahead; never record an event in the future
+            ts = min(_utc(event["ts"]), now)
+            buffered.append({
+                "id": generate_id(),
+                "ts": int(ts.replace(tzinfo=timezone.utc).timestamp() * 1000),
+                "meta": meta,
+                "type": event["type"].value if isinstance(event["type"], ProctoringEventType) else event["type"],
+                "question_id": event.get("question_id"),
+                "detail": event.get("detail"),
+                "received_at": received_ms
+            })
+
+        try:
+            await get_redis().rpush(BUFFER_KEY, *[dumps(event) for event in buffered])
+        except Exception as e:
+            logger.warning(f"Proctoring buffer unavailable, inserting {len(buffered)} events directly: {e}")
+            await db.proctoring_events.insert_many([_to_document(event) for event in buffered], ordered=False)
+        return len(buffered)
+
+    async def flush(self, db, limit: int = None) -> int:
+        """Move up to `limit` buffered events into MongoDB with one insert_many"""
+        redis = get_redis()
+        raw_events = await redis.lpop(BUFFER_KEY, limit or settings.PROCTORING_FLUSH_BATCH)
+        if not raw_events:
+            return 0
+
+        documents, stored = [], []
+        for raw in raw_events:
+            try:
+                documents.append(_to_document(loads(raw)))
+                stored.append(raw)
+            except Exception as e:
+                logger.error(f"Dropping undecodable proctoring event {raw[:200]!r}: {e}")
+        if not documents:
+            return len(raw_events)
+
+        try:
+            await db.proctoring_events.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            # Unordered: everything but the rejected documents was stored, and those would fail again
+            for error in e.details.get("writeErrors", []):
+                logger.error(f"Dropping proctoring event rejected by MongoDB: {error.get('errmsg')}")
+        except Exception:
+            # Outcome unknown: put them back so the next flush retries (time-series order is by ts, not insert)
+            await redis.rpush(BUFFER_KEY, *stored)
+            raise
+
+        return len(raw_events)
+
+    async def summarize(self, db, application_id: str) -> Dict[str, Any]:
+        """Violation counts, timeline and per-minute violation buckets for one attempt"""
+        violation_types = [t.value for t in VIOLATION_TYPES]
+        pipeline = [
+            {"$match": {"meta.application_id": application_id}},
+            # A retried flush may have stored an event twice
+            {"$group": {"_id": "$_id", "event": {"$first": "$$ROOT"}}},
+            {"$replaceRoot": {"newRoot": "$event"}},
+            {"$sort": {"ts": 1}},
+            {"$facet": {
+                "by_type": [
+                    {"$group": {
+                        "_id": "$type",
+                        "count": {"$sum": 1},
+                        "first_at": {"$min": "$ts"},
+                        "last_at": {"$max": "$ts"}
+                    }}
+                ],
+                "timeline": [
+                    {"$limit": TIMELINE_LIMIT},
+                    {"$project": {"_id": 0, "ts": 1, "type": 1, "question_id": 1, "detail": 1}}
+                ],
+                "per_minute": [
+                    {"$match": {"type": {"$in": violation_types}}},
+                    {"$group": {
+                        "_id": {"$dateTrunc": {"date": "$ts", "unit": "minute"}},
+                        "violations": {"$sum": 1}
+                    }},
+                    {"$sort": {"_id": 1}},
+                    {"$project": {"_id": 0, "minute": "$_id", "violations": 1}}
+                ]
+            }}
+        ]
+        facets = (await db.proctoring_events.aggregate(pipeline).to_list(1))[0]
+
+        by_type = {
+            group["_id"]: {"count": group["count"], "first_at": group["first_at"], "last_at": group["last_at"]}
+            for group in facets["by_type"]
+        }
+        return {
+            "application_id": application_id,
+            "total_events": sum(group["count"] for group in by_type.values()),
+            "violations": sum(group["count"] for t, group in by_type.items() if t in violation_types),
+            "by_type": by_type,
+            "timeline": facets["timeline"],
+            "per_minute": facets["per_minute"]
+        }
+
+
+# Create singleton instance
+proctoring_service = ProctoringService()
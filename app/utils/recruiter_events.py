@@ -0,0 +1,68 @@
+"""
+Recruiter notifications
+
+Changes that recruiter pages display (new applications, started and
+submitted assessments, graded results, shortlist/reject decisions) are
+published as small deltas on the company's channel. Open dashboard and
+candidates pages apply them in place: `funnel` holds the JobFunnel
+counter increments for the job, and result events carry the rankings row,
+so neither the dashboard aggregation nor the rankings are re-run.
+"""
+
+from app.utils.events import publish
+from typing import Any, Dict, Optional
+
+# Funnel counters that follow the application's current status
+STATUS_COUNTERS = ("under_review", "shortlisted", "rejected")
+
+
+def company_channel(company_id: str) -> str:
+    return f"events:company:{company_id}"
+
+
+def status_delta(previous: Optional[str], current: str) -> Dict[str, int]:
+    """JobFunnel increments for an application moving between statuses"""
+    delta = {}
+    if previous in STATUS_COUNTERS:
+        delta[previous] = -1
+    if current in STATUS_COUNTERS:
+        delta[current] = delta.get(current, 0) + 1
+    return {counter: n for counter, n in delta.items() if n}
+
+
+def ranking_row(result: Dict[str, Any], application: Dict[str, Any]) -> Dict[str, Any]:
+    """The slim rankings row (see RANKINGS_DEFAULT_FIELDS) for a new result"""
+    return {
+        "_id": result["_id"],
+        "application_id": result["application_id"],
+        "candidate_id": result["candidate_id"],
+        "candidate_name": application.get("candidate_name") or "Unknown",
+        "candidate_email": application.get("candidate_email", ""),
+        "percentage": result["percentage"],
+        "total_score": result["total_score"],
+        "max_score": result["max_score"],
+        "is_shortlisted": result.get("is_shortlisted", False),
+        "evaluated_at": result["evaluated_at"],
+        "feedback_report": {"skill_scores": result["feedback_report"].get("skill_scores", [])},
+        "ai_reasoning": {"confidence_score": (result.get("ai_reasoning") or {}).get("confidence_score")}
+    }
+
+
+async def notify_company(
+    company_id: Optional[str],
+    event_type: str,
+    job_id: str,
+    application_id: str,
+    funnel: Dict[str, int] = None,
+    **data: Any
+):
+    """Publish a delta to the company's open recruiter pages (best effort)"""
+    if not company_id:
+        return
+    await publish(company_channel(company_id), {
+        "type": event_type,
+        "job_id": job_id,
+        "application_id": application_id,
+        "funnel": funnel or {},
+        **data
+    })
@@ -0,0 +1,137 @@
+"""
+Fast response serialization
+
+Documents read from MongoDB were validated when they were written, so
+hot read paths can skip building Pydantic models (and FastAPI's second
+validation through response_model). from_db keeps only the model's
+fields, fills top-level defaults and leaves nested data as stored;
+dumps serializes with orjson.
+
+Opt-in per route: return fast_response(Model, doc) instead of Model(**doc).
+
+Sparse fieldsets: parse_fields turns a `fields=` query parameter into a
+validated field tuple that feeds both the Mongo projection and the
+trimmed response shape.
+"""
+
+from fastapi import HTTPException, Response
+from pydantic import BaseModel
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+import orjson
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize to compact JSON bytes (datetimes as ISO 8601, UTC as 'Z')"""
+    return orjson.dumps(value, default=_default, option=orjson.OPT_UTC_Z)
+
+
+def loads(raw: Union[bytes, str]) -> Any:
+    return orjson.loads(raw)
+
+
+@lru_cache(maxsize=None)
+def _field_plan(model_cls: Type[BaseModel]) -> Tuple[Tuple[str, str, Any], ...]:
+    """(output key, attribute name, FieldInfo) per field, computed once per model"""
+    return tuple(
+        (field.alias or name, name, field)
+        for name, field in model_cls.model_fields.items()
+    )
+
+
+def parse_fields(
+    fields: Optional[str],
+    model_cls: Type[BaseModel],
+    extra: Tuple[str, ...] = ()
+) -> Optional[Tuple[str, ...]]:
+    """Validate a comma-separated `fields=` value; None (or '*') means the full document.
+
+    Dotted paths select nested data (e.g. ai_reasoning.confidence_score);
+    `id` is accepted for `_id`, which is always included.
+    """
+    if not fields or fields.strip() == "*":
+        return None
+
+    aliases = {name: key for key, name, _ in _field_plan(model_cls)}
+    allowed = set(aliases.values()) | set(extra)
+
+    selected = ["_id"]
+    for path in fields.split(","):
+        path = path.strip()
+        if not path:
+            continue
+        top, _, rest = path.partition(".")
+        top = aliases.get(top, top)
+        if top not in allowed:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {path}")
+        path = f"{top}.{rest}" if rest else top
+        if path not in selected:
+            selected.append(path)
+
+    # Mongo rejects a projection containing both a field and one of its subpaths
+    whole = {path for path in selected if "." not in path}
+    return tuple(p for p in selected if "." not in p or p.split(".")[0] not in whole)
+
+
+def projection(fields: Optional[Tuple[str, ...]], *required: str) -> Optional[Dict[str, int]]:
+    """Mongo projection for a fieldset, plus fields the handler itself needs"""
+    if fields is None:
+        return None
+    selected = set(fields)
+    for path in required:
+        if path in selected or path.split(".")[0] in selected:
+            continue
+        # A whole field replaces any of its subpaths already selected
+        selected = {f for f in selected if not f.startswith(path + ".")}
+        selected.add(path)
+    return {f: 1 for f in selected}
+
+
+def from_db(
+    model_cls: Type[BaseModel],
+    doc: Dict[str, Any],
+    fields: Optional[Tuple[str, ...]] = None
+) -> Dict[str, Any]:
+    """Shape a trusted document like model_cls(**doc).model_dump(by_alias=True), without validation.
+
+    With a fieldset, only the selected top-level keys are returned (no defaults).
+    """
+    if fields is not None:
+        tops = {f.split(".")[0] for f in fields}
+        return {key: doc[key] for key in doc if key in tops}
+
+    out = {}
+    for key, name, field in _field_plan(model_cls):
+        if key in doc:
+            out[key] = doc[key]
+        elif name in doc:
+            out[key] = doc[name]
+        elif not field.is_required():
+            out[key] = field.get_default(call_default_factory=True)
+    return out
+
+
+def fast_response(
+    model_cls: Type[BaseModel],
+    data: Union[Dict[str, Any], List[Dict[str, Any]]],
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None,
+    fields: Optional[Tuple[str, ...]] = None
+) -> Response:
+    """JSON response for trusted documents, bypassing response_model validation"""
+    if isinstance(data, list):
+        content = [from_db(model_cls, doc, fields) for doc in data]
+    else:
+        content = from_db(model_cls, data, fields)
+    return Response(
+        content=dumps(content),
+        status_code=status_code,
+        media_type="application/json",
+        headers=headers
+    )
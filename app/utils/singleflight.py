@@ -0,0 +1,43 @@
+"""
+Single-flight request coalescing
+
+Concurrent callers asking for the same key share one in-flight fetch
+instead of each hitting MongoDB. Coalescing is per process; with N web
+workers at most N identical queries run at once.
+"""
+
+from typing import Any, Awaitable, Callable, Dict
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._calls
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once for all concurrent callers of key and share its result"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+
+        # Shield so one caller disconnecting doesn't cancel the others' fetch
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception retrieved even if every waiter went away
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Single-flight fetch for {key} failed: {task.exception()}")
+
+
+# Create singleton instance
+single_flight = SingleFlight()
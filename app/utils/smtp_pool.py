@@ -0,0 +1,268 @@
+"""
+Pooled SMTP transport
+
+Opening a connection, running STARTTLS and logging in costs several
+round-trips and a TLS handshake, so doing it per message makes bulk sends
+(e.g. result notifications after a drive) handshake-bound. SMTPPool keeps
+up to SMTP_POOL_SIZE authenticated connections alive and reuses them:
+
+- a connection is retired after SMTP_MAX_MESSAGES_PER_CONNECTION messages
+  (many providers cap messages per session)
+- a connection idle for longer than SMTP_IDLE_TIMEOUT_SECONDS is closed
+  rather than reused, since servers drop idle sessions
+- a reused connection that turns out to be dead is replaced and the
+  message retried once on a fresh one
+
+The pool is thread-safe: senders run in the web threadpool
+(BackgroundTasks) and in Celery workers. AsyncSMTPPool is the asyncio
+(aiosmtplib) equivalent used by the outbox sender.
+"""
+
+from email.message import Message
+from typing import Optional, Tuple
+import aiosmtplib
+import asyncio
+import collections
+import smtplib
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def connection_lost(error: Exception) -> bool:
+    """True when the session is unusable, False when only the message was refused"""
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code == 421  # service closing the channel
+    # SMTPException subclasses OSError; anything else here is a socket error
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+class PooledConnection:
+    __slots__ = ("smtp", "sent", "last_used")
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = True,
+        size: int = 4,
+        max_messages: int = 100,
+        idle_timeout: float = 30.0,
+        timeout: float = 10.0
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = collections.deque()  # most recently used last
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self.connections_opened = 0
+
+    def _connect(self) -> PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                smtp.starttls()
+            if self.user and self.password:
+                smtp.login(self.user, self.password)
+        except Exception:
+            self._close(PooledConnection(smtp))
+            raise
+        self.connections_opened += 1
+        return PooledConnection(smtp)
+
+    @staticmethod
+    def _close(connection: PooledConnection):
+        try:
+            connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    def _checkout(self) -> Tuple[PooledConnection, bool]:
+        """A warm connection if one is fresh enough, else a new one; (connection, reused)"""
+        while True:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                return self._connect(), False
+            if time.monotonic() - connection.last_used <= self.idle_timeout:
+                return connection, True
+            self._close(connection)
+
+    def _checkin(self, connection: PooledConnection):
+        connection.last_used = time.monotonic()
+        if connection.sent >= self.max_messages:
+            self._close(connection)
+            return
+        with self._lock:
+            self._idle.append(connection)
+
+    def send(self, message: Message):
+        """Send one message over a pooled connection; raises smtplib errors"""
+        with self._slots:
+            connection, reused = self._checkout()
+            try:
+                connection.smtp.send_message(message)
+            except Exception as e:
+                if not connection_lost(e):
+                    # Refused message (e.g. bad recipient): the session is still usable
+                    self._reset(connection)
+                    raise
+                self._close(connection)
+                if not reused:
+                    raise
+                # The server dropped a kept-alive session; retry once on a fresh one
+                logger.info(f"Pooled SMTP connection lost ({e}), reconnecting")
+                connection = self._connect()
+                try:
+                    connection.smtp.send_message(message)
+                except Exception as e:
+                    if connection_lost(e):
+                        self._close(connection)
+                    else:
+                        self._reset(connection)
+                    raise
+            connection.sent += 1
+            self._checkin(connection)
+
+    def _reset(self, connection: PooledConnection):
+        try:
+            connection.smtp.rset()
+        except Exception:
+            self._close(connection)
+        else:
+            self._checkin(connection)
+
+    def close(self):
+        """Close the idle connections (for shutdown)"""
+        with self._lock:
+            idle, self._idle = list(self._idle), collections.deque()
+        for connection in idle:
+            self._close(connection)
+
+
+def async_connection_lost(error: Exception) -> bool:
+    """connection_lost() for aiosmtplib errors"""
+    if isinstance(error, aiosmtplib.SMTPResponseException):
+        return error.code == 421
+    # SMTPServerDisconnected/SMTPConnectError are ConnectionErrors, SMTPTimeoutError a TimeoutError
+    return isinstance(error, OSError)
+
+
+class AsyncSMTPPool:
+    """Same policy as SMTPPool (message cap, idle timeout, one retry on a dropped session)"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: Optional[str] = None,
+        password: Optional[str] = None,
+        starttls: bool = True,
+        size: int = 4,
+        max_messages: int = 100,
+        idle_timeout: float = 30.0,
+        timeout: float = 10.0
+    ):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self._idle = collections.deque()
+        self._slots = asyncio.Semaphore(size)
+        self.connections_opened = 0
+
+    async def _connect(self) -> PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            username=self.user or None,
+            password=self.password or None,
+            start_tls=self.starttls,
+            timeout=self.timeout
+        )
+        await smtp.connect()  # also runs STARTTLS and login
+        self.connections_opened += 1
+        return PooledConnection(smtp)
+
+    @staticmethod
+    async def _close(connection: PooledConnection):
+        try:
+            await connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
+
+    async def _checkout(self) -> Tuple[PooledConnection, bool]:
+        while self._idle:
+            connection = self._idle.pop()
+            if time.monotonic() - connection.last_used <= self.idle_timeout and connection.smtp.is_connected:
+                return connection, True
+            await self._close(connection)
+        return await self._connect(), False
+
+    async def _checkin(self, connection: PooledConnection):
+        connection.last_used = time.monotonic()
+        if connection.sent >= self.max_messages:
+            await self._close(connection)
+        else:
+            self._idle.append(connection)
+
+    async def _reset(self, connection: PooledConnection):
+        try:
+            await connection.smtp.rset()
+        except Exception:
+            await self._close(connection)
+        else:
+            await self._checkin(connection)
+
+    async def send(self, message: Message):
+        """Send one message over a pooled connection; raises aiosmtplib errors"""
+        async with self._slots:
+            connection, reused = await self._checkout()
+            try:
+                await connection.smtp.send_message(message)
+            except Exception as e:
+                if not async_connection_lost(e):
+                    await self._reset(connection)
+                    raise
+                await self._close(connection)
+                if not reused:
+                    raise
+                logger.info(f"Pooled SMTP connection lost ({e}), reconnecting")
+                connection = await self._connect()
+                try:
+                    await connection.smtp.send_message(message)
+                except Exception as e:
+                    if async_connection_lost(e):
+                        await self._close(connection)
+                    else:
+                        await self._reset(connection)
+                    raise
+            connection.sent += 1
+            await self._checkin(connection)
+
+    async def close(self):
+        while self._idle:
+            await self._close(self._idle.pop())
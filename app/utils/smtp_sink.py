@@ -0,0 +1,142 @@
+"""
+Local SMTP sink for development and load tests
+
+    python -m app.utils.smtp_sink --port 1025 [--maildir ./mail] [--latency 0.05]
+
+Accepts every message (no TLS; any AUTH PLAIN/LOGIN succeeds) and logs one
+line per message, or writes each one as an .eml file with --maildir.
+--latency delays every reply to mimic a remote server, which makes the
+cost of per-message handshakes visible. Point the app at it with:
+
+    SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=false SMTP_USER=dev SMTP_PASSWORD=dev
+"""
+
+from pathlib import Path
+from typing import List, Optional
+import argparse
+import asyncio
+import collections
+import itertools
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SMTPSink:
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025, maildir: Optional[str] = None,
+                 latency: float = 0.0, keep: int = 1000):
+        self.host = host
+        self.port = port
+        self.maildir = Path(maildir) if maildir else None
+        self.latency = latency
+        self.messages = collections.deque(maxlen=keep)  # (mail_from, rcpt_to, data)
+        self.connections = 0
+        self.received = 0
+        self._ids = itertools.count(1)
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        if self.maildir:
+            self.maildir.mkdir(parents=True, exist_ok=True)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]  # resolves port 0
+        logger.info(f"SMTP sink listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _reply(self, writer: asyncio.StreamWriter, *lines: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        writer.write("".join(f"{line}\r\n" for line in lines).encode())
+        await writer.drain()
+
+    def _store(self, mail_from: str, rcpt_to: List[str], data: bytes):
+        self.received += 1
+        self.messages.append((mail_from, rcpt_to, data))
+        if self.maildir:
+            (self.maildir / f"{next(self._ids):06d}.eml").write_bytes(data)
+        logger.info(f"Message from {mail_from} to {', '.join(rcpt_to)} ({len(data)} bytes)")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        mail_from, rcpt_to = None, []
+        try:
+            await self._reply(writer, "220 smtp-sink ESMTP ready")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command, _, argument = line.decode(errors="replace").strip().partition(" ")
+                command = command.upper()
+
+                if command == "EHLO":
+                    await self._reply(writer, "250-smtp-sink", "250-PIPELINING", "250-8BITMIME",
+                                      "250-SIZE 35882577", "250 AUTH PLAIN LOGIN")
+                elif command == "HELO":
+                    await self._reply(writer, "250 smtp-sink")
+                elif command == "AUTH":
+                    if argument.upper().startswith("LOGIN"):
+                        await self._reply(writer, "334 VXNlcm5hbWU6")
+                        await reader.readline()
+                        await self._reply(writer, "334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    await self._reply(writer, "235 2.7.0 Authentication successful")
+                elif command == "MAIL":
+                    mail_from, rcpt_to = argument.partition(":")[2].strip(), []
+                    await self._reply(writer, "250 2.1.0 OK")
+                elif command == "RCPT":
+                    rcpt_to.append(argument.partition(":")[2].strip())
+                    await self._reply(writer, "250 2.1.5 OK")
+                elif command == "DATA":
+                    await self._reply(writer, "354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        data_line = await reader.readline()
+                        if data_line in (b".\r\n", b".\n", b""):
+                            break
+                        lines.append(data_line[1:] if data_line.startswith(b"..") else data_line)
+                    self._store(mail_from, rcpt_to, b"".join(lines))
+                    mail_from, rcpt_to = None, []
+                    await self._reply(writer, "250 2.0.0 OK: queued")
+                elif command == "RSET":
+                    mail_from, rcpt_to = None, []
+                    await self._reply(writer, "250 2.0.0 OK")
+                elif command == "NOOP":
+                    await self._reply(writer, "250 2.0.0 OK")
+                elif command == "STARTTLS":
+                    await self._reply(writer, "454 4.7.0 TLS not available")
+                elif command == "QUIT":
+                    await self._reply(writer, "221 2.0.0 Bye")
+                    return
+                else:
+                    await self._reply(writer, "502 5.5.2 Command not recognized")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(args):
+    sink = SMTPSink(args.host, args.port, args.maildir, args.latency)
+    await sink.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await sink.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    parser = argparse.ArgumentParser(description="Local SMTP sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--maildir", help="write each message to this directory as an .eml file")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to delay every reply")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,166 @@
+"""
+Task dispatch, non-blocking publishing and queue depth
+
+Routes queue background tasks by name with enqueue(db, name, *args), on
+the backend TASK_BACKEND selects: "celery" (a Redis broker, celery worker
+and celery beat), or "local", which runs them on the web workers' own
+event loops from a queue in MongoDB (see app/utils/local_tasks.py).
+
+Publishing a Celery task is blocking socket I/O to the broker; called from
+an async route it holds the event loop (every request on the worker) for
+as long as Redis takes to answer. enqueue() instead:
+
+1. records the task in the task_outbox collection, next to the
+   submission written by the same request, then
+2. hands the publish to a small dedicated thread pool and returns.
+
+A successful publish deletes the outbox entry. If the broker is slow or
+down the entry stays, and the drain_task_outbox beat task republishes
+entries older than TASK_OUTBOX_GRACE_SECONDS; beat itself goes through the
+broker, so draining resumes as soon as it recovers. Evaluation is
+idempotent (see app/utils/evaluation_retry.py), so a task published twice
+(the publish went through but the delete didn't) costs a no-op run.
+
+Queue depth is the broker queue's length plus undrained outbox entries.
+The estimated time to a result divides it by the recent evaluation rate
+(results saved in the last EVALUATION_RATE_WINDOW_SECONDS) and adds one
+evaluation. Both, with anonymous fair-share lane backlogs, are cached
+for QUEUE_STATS_TTL_SECONDS per process and served at /health/queue for
+dashboards and autoscalers.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from app.config import settings
+from app.redis_client import get_broker_redis
+from app.utils import fair_queue
+from app.utils.fair_queue import lane_stats
+from app.utils.local_tasks import local_task_runner, task_entry
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Set
+import asyncio
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CELERY_QUEUE = "celery"  # Celery's default queue, a Redis list on the broker
+
+_publisher = ThreadPoolExecutor(max_workers=settings.TASK_PUBLISH_THREADS, thread_name_prefix="task-publish")
+_publishing: Set[asyncio.Task] = set()  # keeps fire-and-forget publishes referenced
+
+_stats: Optional[Dict[str, Any]] = None
+_stats_at = 0.0
+
+
+def local_backend() -> bool:
+    return settings.TASK_BACKEND == "local"
+
+
+def _publish_before(deadline: float, name: str, args: list, countdown: float):
+    # Still queued for a thread when the caller gave up: the outbox entry will be drained instead
+    if time.monotonic() > deadline:
+        raise TimeoutError("publish queue backed up")
+    # Imported here: app.celery_worker imports this module
+    from app.celery_worker import celery_app
+    celery_app.send_task(name, args=args, countdown=countdown or None, retry=False)
+
+
+async def _publish(db, entry: Dict[str, Any], countdown: float):
+    loop = asyncio.get_running_loop()
+    deadline = time.monotonic() + settings.TASK_PUBLISH_TIMEOUT_SECONDS
+    publish = partial(_publish_before, deadline, entry["task"], entry["args"], countdown)
+    try:
+        await asyncio.wait_for(loop.run_in_executor(_publisher, publish), settings.TASK_PUBLISH_TIMEOUT_SECONDS)
+    except Exception as e:
+        logger.warning(f"Publishing {entry['task']} {entry['args']} failed, left in the task outbox: {e!r}")
+        return
+    try:
+        await db.task_outbox.delete_one({"_id": entry["_id"]})
+    except Exception as e:
+        logger.warning(f"Could not clear task outbox entry {entry['_id']}: {e}")
+
+
+async def enqueue(db, name: str, *args: Any, countdown: float = 0) -> str:
+    """Queue a task without waiting on the broker; returns the outbox entry id"""
+    entry = task_entry(name, list(args), countdown)
+    await db.task_outbox.insert_one(entry)
+    if local_backend():
+        local_task_runner.wake()
+        return entry["_id"]
+
+    publishing = asyncio.create_task(_publish(db, entry, countdown))
+    _publishing.add(publishing)
+    publishing.add_done_callback(_publishing.discard)
+    return entry["_id"]
+
+
+async def queue_evaluation(db, job: Optional[Dict[str, Any]], submission_id: str, send=None) -> Optional[int]:
+    """Queue a submission's evaluation through its fair-share lane, or FIFO when lanes are off
+    or Redis is down; returns the lane position. `send` replaces enqueue on a Celery worker."""
+    send = send or enqueue
+    await fair_queue.mark_pending(submission_id)
+    position = await fair_queue.push(job, submission_id) if job else None
+    if position is None:
+        await send(db, "evaluate_submission", submission_id)
+    else:
+        await send(db, "evaluate_next")
+    return position
+
+
+async def drain_outbox(db, send_task: Callable[..., Any]) -> int:
+    """Republish tasks whose publish didn't go through; returns how many"""
+    grace = datetime.utcnow() - timedelta(seconds=settings.TASK_OUTBOX_GRACE_SECONDS)
+    entries = await db.task_outbox.find({"created_at": {"$lt": grace}}).sort("created_at", 1).to_list(
+        settings.TASK_OUTBOX_DRAIN_BATCH
+    )
+    for entry in entries:
+        send_task(entry["task"], args=entry["args"], eta=entry.get("run_at"))
+        await db.task_outbox.delete_one({"_id": entry["_id"]})
+    if entries:
+        logger.warning(f"Republished {len(entries)} tasks from the task outbox")
+    return len(entries)
+
+
+def estimate_seconds(position: int, rate_per_second: float) -> int:
+    """Time until a task `position` places from the front of the queue has a result"""
+    if rate_per_second <= 0:
+        rate_per_second = 1 / settings.EVALUATION_SECONDS_ESTIMATE
+    return round(settings.EVALUATION_SECONDS_ESTIMATE + position / rate_per_second)
+
+
+async def queue_stats(db) -> Dict[str, Any]:
+    """Evaluation queue depth, recent throughput and estimated time to a new task's result"""
+    global _stats, _stats_at
+    if _stats is not None and time.monotonic() - _stats_at < settings.QUEUE_STATS_TTL_SECONDS:
+        return _stats
+
+    broker_depth = None
+    if not local_backend():
+        try:
+            broker_depth = await get_broker_redis().llen(CELERY_QUEUE)
+        except Exception as e:
+            logger.warning(f"Broker queue length unavailable: {e}")
+    outbox = await db.task_outbox.count_documents({})
+    since = datetime.utcnow() - timedelta(seconds=settings.EVALUATION_RATE_WINDOW_SECONDS)
+    completed = await db.results.count_documents({"created_at": {"$gte": since}})
+    rate = completed / settings.EVALUATION_RATE_WINDOW_SECONDS
+
+    lanes = None
+    if fair_queue.fair_scheduling_enabled():
+        try:
+            lanes = await lane_stats()
+        except Exception as e:
+            logger.warning(f"Fair queue lanes unavailable: {e}")
+
+    depth = (broker_depth or 0) + outbox
+    _stats = {
+        "depth": depth,
+        "broker_depth": broker_depth,
+        "outbox": outbox,
+        "evaluations_per_minute": round(rate * 60, 2),
+        "eta_seconds": estimate_seconds(depth, rate),
+        "lanes": lanes
+    }
+    _stats_at = time.monotonic()
+    return _stats
@@ -21,6 +21,10 @@ pip install -q -r requirements.txt
 # Create necessary directories
 mkdir -p uploads static/css static/js templates
 
+# Apply database migrations (indexes, schema version)
+echo "Applying database migrations..."
+python -m app.migrations || exit 1
+
 # Run the application
 echo "Starting FastAPI server..."
 echo "Access at: http://localhost:8000"
@@ -191,6 +191,39 @@ style.textContent = `
 `;
 document.head.appendChild(style);
 
+// Follow a Server-Sent Events stream (fetch keeps the auth header EventSource can't send).
+// Calls onEvent(event) for each event; returning false closes the stream.
+async function streamEvents(url, onEvent) {
+    const token = localStorage.getItem('token');
+    const response = await fetch(url, {
+        headers: { 'Authorization': `Bearer ${token}` }
+    });
+    if (!response.ok) return;
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) return;
+        buffer += decoder.decode(value, { stream: true });
+        
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+            const chunk = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            const data = chunk.split('\n').find(line => line.startsWith('data: '));
+            if (!data) continue;  // keep-alive
+            
+            if (onEvent(JSON.parse(data.slice(6))) === false) {
+                reader.cancel();
+                return;
+            }
+        }
+    }
+}
+
 // Protect routes
 function protectRoute(allowedUserTypes = []) {
     const token = localStorage.getItem('token');
@@ -217,6 +250,7 @@ window.apiRequest = apiRequest;
 window.formatDate = formatDate;
 window.formatTime = formatTime;
 window.showNotification = showNotification;
+window.streamEvents = streamEvents;
 window.protectRoute = protectRoute;
 window.logout = logout;
 window.toggleMenu = toggleMenu;
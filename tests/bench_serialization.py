@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Serializer microbenchmark
+
+Compares the default response path (Model(**doc) validated again by
+FastAPI's response_model, then json) with the fast path in
+app/utils/serialization.py for a typical evaluated Result and a
+rankings page.
+
+Usage: python tests/bench_serialization.py [iterations]
+"""
+
+import os
+import sys
+
+# Run from anywhere: the app package lives in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from fastapi.encoders import jsonable_encoder
+from app.models.result import Result
+from app.utils.serialization import fast_response, loads
+import json
+import timeit
+
+
+def make_result_doc(i: int = 0) -> dict:
+    """A result shaped like the ones written by the Celery evaluation task"""
+    return {
+        "_id": f"result_sub{i}",
+        "submission_id": f"sub{i}",
+        "application_id": f"app{i}",
+        "candidate_id": f"cand{i}",
+        "assessment_id": "assess1",
+        "total_score": 72.5,
+        "max_score": 100,
+        "percentage": 72.5,
+        "question_evaluations": [
+            {
+                "question_id": f"q{q}",
+                "question_type": "coding" if q % 3 == 0 else "mcq",
+                "points_earned": 7.5,
+                "max_points": 10,
+                "is_correct": q % 2 == 0,
+                "correctness_score": 80.0,
+                "efficiency_score": 70.0,
+                "readability_score": 90.0,
+                "ai_feedback": "The solution handles the main cases well. " * 6,
+                "strengths": ["Clear variable names", "Good decomposition"],
+                "improvements": ["Handle empty input", "Reduce nested loops"]
+            }
+            for q in range(15)
+        ],
+        "ai_reasoning": {
+            "overall_assessment": "Solid fundamentals with room to grow. " * 5,
+            "ranking_factors": [
+                {"factor": "Technical Skills", "impact": "high", "score": 85, "explanation": "Strong coding"},
+                {"factor": "Problem Solving", "impact": "medium", "score": 75, "explanation": "Methodical"}
+            ],
+            "confidence_score": 0.85,
+            "bias_check": {"detected": False, "notes": "No significant bias detected"},
+            "prediction": "High likelihood of success"
+        },
+        "feedback_report": {
+            "overall_score": 72.5,
+            "percentile": None,
+            "skill_scores": [
+                {"skill_name": s, "score": 70.0, "level": "intermediate", "feedback": f"Scored 70% in {s}"}
+                for s in ["python", "sql", "algorithms", "communication"]
+            ],
+            "top_strengths": ["Strength 1", "Strength 2", "Strength 3"],
+            "improvement_areas": ["Area 1", "Area 2", "Area 3"],
+            "learning_resources": [
+                {"title": "Course", "url": "https://example.com", "type": "course", "duration": "4 weeks"}
+            ] * 3,
+            "improvement_plan": "Focus on data structures over the next 2-3 weeks. " * 4,
+            "estimated_improvement_time": "2-3 weeks",
+            "positive_message": "You've shown great potential!",
+            "next_steps": ["Step 1", "Step 2", "Step 3"]
+        },
+        "is_shortlisted": False,
+        "evaluated_at": datetime(2026, 1, 15, 10, 30, 0, 123000),
+        "created_at": datetime(2026, 1, 15, 10, 30, 0, 123000)
+    }
+
+
+def default_path(doc: dict) -> bytes:
+    """What a handler returning Result(**doc) with response_model=Result costs"""
+    model = Result(**doc)
+    validated = Result.model_validate(model.model_dump())  # response_model re-validation
+    content = jsonable_encoder(validated, by_alias=True)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(data) -> bytes:
+    """A document or a page of them, shaped through from_db as a route does"""
+    return fast_response(Result, data).body
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    doc = make_result_doc()
+    assert loads(default_path(doc)) == loads(fast_path(doc)), "Fast path output differs"
+
+    page = [make_result_doc(i) for i in range(100)]
+    assert [loads(default_path(d)) for d in page] == loads(fast_path(page)), "Fast page output differs"
+
+    print("=" * 60)
+    print("Serializer microbenchmark")
+    print("=" * 60)
+
+    for label, fn, arg, n in [
+        ("single result", default_path, doc, iterations),
+        ("single result (fast)", fast_path, doc, iterations),
+        ("100-row rankings page", lambda p: [default_path(d) for d in p], page, iterations // 100 or 1),
+        ("100-row rankings page (fast)", fast_path, page, iterations // 100 or 1),
+    ]:
+        seconds = timeit.timeit(lambda: fn(arg), number=n)
+        print(f"{label:<32} {seconds / n * 1e6:>10.1f} µs/op")
+
+
+if __name__ == "__main__":
+    main()